@@ -1,18 +1,15 @@
 ﻿# app.py
 import streamlit as st
-import yfinance as yf
 from datetime import date
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
 
 # theming
-from utils.theming import apply_base_css, PALETTE
+from utils.theming import apply_base_css
+from utils.downsample import DEFAULT_MAX_POINTS
+from utils.instrument import Recorder, ProfileCapture
 
-# domain logic
-from src.signals import ma_signals
-from src.backtest import run_backtest
-from src.metrics import cagr, sharpe, max_drawdown
+# pandas, plotly and the domain modules are imported on the first run (see below),
+# scikit-learn on the first Research fit and yfinance on the first download, so the
+# landing page paints without them. `python -m benchmarks.startup` tracks this.
 
 
 # ------------------ Page setup ------------------
@@ -43,44 +40,138 @@ with st.sidebar:
     colA, colB = st.columns(2)
     start  = colA.date_input("Start date", value=None, help="Leave empty for max history")
     end    = colB.date_input("End date", value=None, help="Optional — leave empty for today")
+    bar    = st.selectbox("Bar size", ["1D", "1h", "30min", "15min", "5min", "1min"],
+                          help="Daily bars come from Yahoo; intraday bars are resampled from minute bars "
+                               "ingested into the local minute store (src.intraday, TRENDEDGE_MINUTE_DIR)")
     run = st.button("▶️ Run backtest", use_container_width=True)
+    with st.expander("Costs & sizing"):
+        bps        = st.number_input("Commission (bps)", min_value=0.0, max_value=500.0, value=0.0, step=0.5,
+                                     help="Charged per unit of turnover, in basis points of traded notional")
+        spread_bps = st.number_input("Bid/ask spread (bps)", min_value=0.0, max_value=500.0, value=0.0, step=0.5,
+                                     help="Half the spread is paid on every trade")
+        fixed_fee  = st.number_input("Fixed fee per trade ($)", min_value=0.0, value=0.0, step=0.5)
+        capital    = st.number_input("Starting capital ($)", min_value=100.0, value=10_000.0, step=1_000.0)
+        sizing     = st.radio("Position sizing", ["Fixed fraction", "Volatility target"], horizontal=True)
+        if sizing == "Fixed fraction":
+            fraction = st.slider("Fraction invested", 0.05, 1.0, 1.0, 0.05)
+            sizing_kw = dict(sizing="fixed", fraction=fraction)
+        else:
+            target_vol   = st.slider("Target vol (annualised %)", 1, 50, 15)
+            vol_lookback = st.number_input("Vol lookback (bars)", min_value=5, max_value=250, value=20, step=1)
+            max_leverage = st.slider("Max leverage", 0.25, 3.0, 1.0, 0.25)
+            sizing_kw = dict(sizing="vol_target", target_vol=target_vol / 100,
+                             vol_lookback=int(vol_lookback), max_leverage=max_leverage)
+    with st.expander("Display"):
+        max_points = st.number_input("Max chart points", min_value=200, max_value=20000,
+                                     value=DEFAULT_MAX_POINTS, step=100,
+                                     help="Long histories are downsampled to this many points per chart trace")
 
 
 # ------------------ Helpers ------------------
-@st.cache_data(show_spinner=False, ttl=60*30)
-def fetch_prices(ticker: str, start: date | None, end: date | None) -> tuple[pd.DataFrame, str | None]:
+@st.cache_resource(show_spinner=False)
+def price_store():
+    """One on-disk src.store.PriceStore per server process (location via TRENDEDGE_DATA_DIR)."""
+    from src.store import PriceStore
+    return PriceStore()
+
+
+@st.cache_resource(show_spinner=False)
+def minute_store():
+    """Memory-mapped minute bars and their cached aggregates (src.intraday.MinuteStore; TRENDEDGE_MINUTE_DIR)."""
+    from src.intraday import MinuteStore
+    return MinuteStore()
+
+
+def fetch_prices(ticker: str, start: date | None, end: date | None, bar: str = "1D") -> tuple["pd.DataFrame", str | None]:
     """
     Return a DataFrame with whatever Yahoo gives among:
     Open, High, Low, Close, Adj Close, Volume.
     Robust to missing 'Adj Close' or 'Close'.
+    Served from the local price store; only bars newer than the last stored one are downloaded.
+    Intraday bar sizes are read from the minute store instead (resampled once, then cached on disk).
     """
-    try:
-        kw = dict(auto_adjust=False, progress=False, threads=False)
-        if start or end:
-            df = yf.download(ticker, start=start or None, end=end or None, **kw)
-        else:
-            df = yf.download(ticker, period="max", **kw)
+    if bar != "1D":
+        return minute_store().get(ticker, None if bar == "1min" else bar, start, end)
+    return price_store().get(ticker, start, end)
 
-        if df is None or df.empty:
-            return pd.DataFrame(), "Empty dataframe from Yahoo (check ticker/dates/internet)."
 
-        # keep only known columns that actually exist
-        cols = [c for c in ["Open", "High", "Low", "Close", "Adj Close", "Volume"] if c in df.columns]
-        if not cols:
-            return pd.DataFrame(), "No usable OHLC/Adj Close columns returned."
-        df = df[cols].copy()
+@st.cache_resource(show_spinner=False)
+def result_cache():
+    """Backtest / metrics / model-output cache shared by all sessions (disk tier via TRENDEDGE_CACHE_DIR)."""
+    from src.cache import ResultCache
+    return ResultCache()
 
-        # choose a 'close-like' series safely
-        close_series = df.get("Adj Close", df.get("Close"))
-        if close_series is None:
-            return pd.DataFrame(), "No Close or Adj Close column returned."
 
-        # drop rows where our chosen close is NaN (use its index to filter)
-        df = df.loc[close_series.dropna().index]
+@st.cache_resource(show_spinner=False)
+def sweep_store():
+    """Saved parameter-sweep cubes (src.sweep.SweepStore; location via TRENDEDGE_SWEEP_DIR)."""
+    from src.sweep import SweepStore
+    return SweepStore()
 
-        return df, None
-    except Exception as e:
-        return pd.DataFrame(), f"{type(e).__name__}: {e}"
+
+@st.cache_resource(show_spinner=False)
+def job_runner():
+    """Background backtests, sweeps and model fits shared by all sessions; identical jobs run once."""
+    from src.jobs import JobRunner
+    return JobRunner(max_workers=2)
+
+
+def session_id() -> str:
+    if "session_id" not in st.session_state:
+        import uuid
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
+
+
+def background_job(key: str, compute, label: str, inline: bool = False, wait: float = 0.5):
+    """
+    Run compute(job) on the shared job runner under `key` (a src.cache key; the result is
+    cached there too) and wait up to `wait` seconds, so quick jobs render in the same pass.
+    Returns the Job, or None if this session cancelled it (it is not resubmitted until the next Run).
+    inline: run in the script thread instead (used while profiling)
+    compute times its stages on job.timings (a Recorder); they are merged into this session's
+    Performance panel once, on the run that first finds the job finished.
+    """
+    if key in st.session_state.get("cancelled_jobs", ()):
+        return None
+    runner = job_runner()
+    record = (perf.enabled, perf.track_memory)  # read here: fn runs on a worker thread
+
+    def fn(job):
+        job.timings = Recorder(*record)
+        return result_cache().get_or_compute(key, lambda: compute(job))
+
+    if inline:
+        job = runner.run(key, fn, label=label, owner=session_id())
+    else:
+        job = runner.submit(key, fn, label=label, owner=session_id())
+        job.wait(wait)
+    merged = st.session_state.setdefault("merged_timings", set())
+    if job.done and job.timings is not None and (job.key, job.submitted) not in merged:
+        merged.add((job.key, job.submitted))
+        perf.merge(job.timings)
+    return job
+
+
+def cancel_job(key: str):
+    st.session_state.setdefault("cancelled_jobs", set()).add(key)
+    job_runner().cancel(key, owner=session_id())
+
+
+@st.fragment(run_every=0.5)
+def job_progress(key: str, show_partial=None):
+    """
+    Progress bar and Cancel button for a running job; reruns the page when it finishes.
+    show_partial: optional callable rendering job.partial (e.g. heatmap cells scored so far)
+    """
+    job = job_runner().get(key)
+    if job is None or job.done:
+        st.rerun()
+    text = "cancelling…" if job.cancelled else (job.message or job.status)
+    st.progress(min(job.progress, 1.0), text=f"{job.label}: {text} ({job.elapsed:.1f}s)")
+    st.button("Cancel", key=f"cancel-{key}", on_click=cancel_job, args=(key,), disabled=job.cancelled)
+    if show_partial is not None and job.partial is not None:
+        show_partial(job.partial)
 
 
 def validate_params(fast: int, slow: int) -> list[str]:
@@ -94,58 +185,6 @@ def validate_params(fast: int, slow: int) -> list[str]:
     return errs
 
 
-def plot_candles(df: pd.DataFrame, ticker: str, cols=None) -> go.Figure:
-    """
-    df: DataFrame with OHLC columns (any names or even MultiIndex flattened)
-    """
-    cols = cols or {}
-
-    # robust column finder: works even if labels are tuples
-    def pick(name: str):
-        # explicit mapping takes priority
-        if name in cols:
-            return cols[name]
-        # exact case-insensitive match
-        for c in df.columns:
-            if str(c).lower() == name:
-                return c
-        # substring match (e.g., "('Open','SPY')" -> 'open')
-        for c in df.columns:
-            if name in str(c).lower():
-                return c
-        return None
-
-    open_col  = pick("open")
-    high_col  = pick("high")
-    low_col   = pick("low")
-    close_col = pick("close")
-
-    missing = [n for n, v in {"Open": open_col, "High": high_col, "Low": low_col, "Close": close_col}.items() if v is None]
-    if missing:
-        raise ValueError(f"plot_candles: missing columns: {', '.join(missing)}")
-
-    fig = go.Figure([
-        go.Candlestick(
-            x=df.index,
-            open=df[open_col],
-            high=df[high_col],
-            low=df[low_col],
-            close=df[close_col],
-            increasing_line_color="#22c55e",
-            decreasing_line_color="#ef4444",
-            name=f"{ticker} OHLC",
-        )
-    ])
-    fig.update_layout(
-        template="plotly_dark",
-        height=500,
-        margin=dict(l=30, r=20, t=10, b=30),
-        xaxis_title="Date",
-        yaxis_title="Price",
-        xaxis_rangeslider_visible=False,
-    )
-    return fig
-
 def flashy_metric(label, value, delta=None, color="violet"):
     """Render a styled metric with flashy colors (uses CSS classes defined in theming.py)."""
     st.markdown(
@@ -164,11 +203,44 @@ tab_overview, tab_strategy, tab_research, tab_data, tab_settings = st.tabs(
     ["Overview", "Strategy", "Research (ML)", "Data", "Settings"]
 )
 
+# ------------------ Instrumentation (toggled in Settings → Performance) ------------------
+perf = st.session_state.setdefault("perf", Recorder())
+perf.enabled = st.session_state.get("perf_enabled", False)
+perf.track_memory = st.session_state.get("perf_memory", False)
+
 # ------------------ Click to run ------------------
-if not run:
+# keep the last submitted parameters so in-page widgets (e.g. chart range) don't clear the results
+if run:
+    from src.costs import CostModel
+    st.session_state["params"] = dict(ticker=ticker, fast=int(fast), slow=int(slow), start=start, end=end, bar=bar,
+                                      costs=CostModel(bps=bps, spread_bps=spread_bps, fixed_fee=fixed_fee,
+                                                      capital=capital, **sizing_kw))
+    st.session_state.pop("cancelled_jobs", None)  # a new Run restarts anything cancelled
+params = st.session_state.get("params")
+
+if params is None:
     with tab_overview:
         st.info("Set parameters in the sidebar and click **Run backtest** to begin.")
 else:
+    import numpy as np
+    import pandas as pd
+    from src.backtest import run_backtest
+    from src.cache import cache_key, fingerprint
+    from src.data import close_prices, select_symbol
+    from src.indicators import IndicatorEngine
+    from src.metrics import bars_per_year, compute_all_metrics
+    from src import research
+    from src.signals import ma_signals
+    from utils.charts import equity_figure, plot_candles, price_ma_figure, probability_figure
+    from utils.downsample import clip_range
+
+    ticker, fast, slow, start, end = (params[k] for k in ("ticker", "fast", "slow", "start", "end"))
+    bar = params.get("bar", "1D")
+    perf.clear()
+    profiler = ProfileCapture() if st.session_state.pop("perf_profile_next", False) else None
+    if profiler:
+        profiler.start()
+
     # Validate inputs
     errors = validate_params(int(fast), int(slow))
     if errors:
@@ -178,31 +250,25 @@ else:
         st.stop()
 
     # Fetch data (DataFrame)
-    data, err = fetch_prices(ticker, start if start else None, end if end else None)
+    with perf.stage("fetch_prices"):
+        data, err = fetch_prices(ticker, start if start else None, end if end else None, bar)
     if err or data.empty:
         with tab_overview:
             st.error(f"No data found for that ticker/date range. {'' if err is None else 'Details: ' + err}")
         st.stop()
     # If Yahoo returned MultiIndex columns (e.g., multiple tickers), pick the current ticker
-    if isinstance(data.columns, pd.MultiIndex):
-        # try last level as ticker first (yfinance usual: level0=field, level1=symbol)
-        if ticker in data.columns.get_level_values(-1):
-            data = data.xs(ticker, axis=1, level=-1)
-        elif ticker in data.columns.get_level_values(0):
-            data = data.xs(ticker, axis=1, level=0)
-        else:
-            # fallback to first available symbol
-            first_sym = data.columns.get_level_values(-1)[0]
-            data = data.xs(first_sym, axis=1, level=-1)
+    data = select_symbol(data, ticker)
 
     # pick price series for MA/backtest (prefer Adj Close if present)
-    px = data.get("Adj Close", data.get("Close")).dropna()
+    px = close_prices(data)
 
     # build OHLC for candlesticks (real if available; else synthesize from px)
     if all(c in data.columns for c in ["Open", "High", "Low", "Close"]):
-        ohlc = data[["Open", "High", "Low", "Close"]].copy()
-        # align to px index in case some rows were dropped by px
-        ohlc = ohlc.reindex(px.index).dropna()
+        ohlc = data[["Open", "High", "Low", "Close"]]
+        # align to px in case some rows were dropped by px (stored/downloaded data normally has none)
+        if len(ohlc) != len(px):
+            ohlc = ohlc.loc[px.index]
+        ohlc = ohlc.dropna()
     else:
         c = px
         ohlc = pd.DataFrame(index=c.index)
@@ -217,8 +283,22 @@ else:
             st.warning("Not enough data after the chosen start/end to compute both moving averages.")
         st.stop()
 
-    with st.spinner("Running backtest…"):
-        sig_raw = ma_signals(px, int(fast), int(slow))
+    # annualisation follows the bars: 252 for daily, bars per session x 252 intraday
+    ppy = bars_per_year(px.index)
+
+    # results are keyed by the exact bars in px, so appended bars miss the cache automatically
+    cache = result_cache()
+    with perf.stage("fingerprint"):
+        px_key = fingerprint(px)
+
+    # one indicator engine per price series: signals, charts and ML features share its MAs
+    ind = IndicatorEngine(px)
+    ma_fast, ma_slow = ind.series(("sma", int(fast))), ind.series(("sma", int(slow)))
+
+    def compute_backtest(job):
+        job.report(0.0, message="signals")
+        with job.timings.stage("ma_signals"):
+            sig_raw = ma_signals(px, int(fast), int(slow), engine=ind)
 
         # If a tuple was returned (e.g., (signals, extra)), take the first element
         if isinstance(sig_raw, tuple) and len(sig_raw) > 0:
@@ -245,108 +325,331 @@ else:
         # Final cleanup/alignment
         sig = pd.Series(sig).reindex(px.index).fillna(0)
 
-        res = run_backtest(px, sig)
+        job.report(0.5, message="backtest")
+        with job.timings.stage("run_backtest"):
+            res = run_backtest(px, sig, costs=params["costs"], periods_per_year=ppy)
+        return sig, res
+
+    # runs on the job runner; the page polls until it is done instead of blocking on it
+    bt_job = background_job(cache_key("backtest", px_key, fast=int(fast), slow=int(slow), costs=params["costs"]),
+                            compute_backtest, f"Backtest {ticker} {int(fast)}/{int(slow)}", inline=profiler is not None)
+    if bt_job is None or bt_job.status != "done":
+        with tab_overview:
+            if bt_job is None or bt_job.status == "cancelled":
+                st.info("Backtest cancelled. Click **Run backtest** to start it again.")
+            elif bt_job.status == "failed":
+                st.error(f"Backtest failed: {bt_job.error}")
+            else:
+                job_progress(bt_job.key)
+        st.stop()
+    sig, res = bt_job.result
 
 
     # ------------------ Overview ------------------
     with tab_overview:
         k1, k2, k3, k4 = st.columns(4)
-        mdd_val, dd_series = max_drawdown(res["eq_strategy"])
+        # one fused pass over both curves (columns: strategy, buy & hold)
+        with perf.stage("metrics"):
+            m = cache.get_or_compute(
+                cache_key("metrics", px_key, fast=int(fast), slow=int(slow), costs=params["costs"]),
+                lambda: compute_all_metrics(res[["ret_strategy", "ret_buyhold"]].to_numpy(),
+                                            res[["eq_strategy", "eq_buyhold"]].to_numpy(), periods_per_year=ppy))
+        m_strat, m_bh = m.iloc[0], m.iloc[1]
 
         with k1:
-            flashy_metric("CAGR (Strategy)",  f"{cagr(res['eq_strategy']):.2%}", color="green")
+            flashy_metric("CAGR (Strategy)",  f"{m_strat['cagr']:.2%}", color="green")
         with k2:
-            flashy_metric("CAGR (Buy & Hold)", f"{cagr(res['eq_buyhold']):.2%}", color="violet")
+            flashy_metric("CAGR (Buy & Hold)", f"{m_bh['cagr']:.2%}", color="violet")
         with k3:
-            flashy_metric("Sharpe",            f"{sharpe(res['ret_strategy']):.2f}", color="green")
+            flashy_metric("Sharpe",            f"{m_strat['sharpe']:.2f}", color="green")
         with k4:
-            flashy_metric("Max Drawdown",      f"{mdd_val:.2%}", color="red")
+            flashy_metric("Max Drawdown",      f"{m_strat['max_dd']:.2%}", color="red")
+
+        with st.expander("How robust are these numbers? (bootstrap)"):
+            st.caption("Resamples the strategy's per-bar returns in random-length blocks (stationary bootstrap) "
+                       "and recomputes every metric, giving a 95% interval around each point estimate.")
+            bs1, bs2 = st.columns([3, 1])
+            n_boot = bs1.select_slider("Resamples", [500, 1_000, 2_000, 5_000, 10_000], value=2_000)
+            if bs2.button("Run bootstrap", use_container_width=True):
+                st.session_state["bootstrap_n"] = n_boot
+            if "bootstrap_n" in st.session_state:
+                from src.robustness import bootstrap_ci
+                n_boot = st.session_state["bootstrap_n"]
+
+                def compute_bootstrap(job):
+                    return bootstrap_ci(res["ret_strategy"], res["position"] if "position" in res else None,
+                                        n_boot=n_boot, periods_per_year=ppy, seed=0, progress=job.report)
+
+                bs_job = background_job(cache_key("bootstrap", px_key, fast=int(fast), slow=int(slow),
+                                                  costs=params["costs"], n_boot=n_boot),
+                                        compute_bootstrap, f"Bootstrap ({n_boot:,} resamples)",
+                                        inline=profiler is not None)
+                if bs_job is None or bs_job.status == "cancelled":
+                    st.info("Bootstrap cancelled.")
+                elif bs_job.status == "failed":
+                    st.error(f"Bootstrap failed: {bs_job.error}")
+                elif not bs_job.done:
+                    job_progress(bs_job.key)
+                else:
+                    ci = bs_job.result
+                    pct = ["cagr", "max_dd", "hit_rate", "exposure"]
+                    st.dataframe(pd.DataFrame({
+                        "Estimate": [f"{v:.2%}" if m in pct else f"{v:.2f}" for m, v in ci["estimate"].items()],
+                        "95% interval": [f"{lo:.2%} … {hi:.2%}" if m in pct else f"{lo:.2f} … {hi:.2f}"
+                                         for m, lo, hi in zip(ci.index, ci["lo"], ci["hi"])],
+                    }, index=ci.index), use_container_width=True)
 
         st.divider()
 
+        # chart range: zooming re-aggregates just the visible window at the full point budget
+        lo, hi = px.index[0].date(), px.index[-1].date()
+        if lo < hi:
+            view = st.slider("Chart range", min_value=lo, max_value=hi, value=(lo, hi), format="YYYY-MM-DD")
+        else:
+            view = (lo, hi)
+        # the end day is inclusive through its last intraday bar (bounds follow the index's timezone)
+        tz = getattr(px.index, "tz", None)
+        v0 = pd.Timestamp(view[0]).tz_localize(tz)
+        v1 = pd.Timestamp(view[1]).tz_localize(tz) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+
         c1, c2 = st.columns(2)
 
         # Price + MAs
         with c1:
             st.subheader("Price & Moving Averages")
-            ma_fast = px.rolling(int(fast)).mean()
-            ma_slow = px.rolling(int(slow)).mean()
-            fig1 = go.Figure()
-            fig1.add_scatter(x=px.index, y=px, name=f"{ticker} Price",
-                             line=dict(color=PALETTE["text"], width=2))
-            fig1.add_scatter(x=px.index, y=ma_fast, name=f"MA {int(fast)}",
-                             line=dict(color=PALETTE["accent"], width=2))
-            fig1.add_scatter(x=px.index, y=ma_slow, name=f"MA {int(slow)}",
-                             line=dict(color="#60a5fa", width=2))
-            fig1.update_layout(height=420, margin=dict(l=30, r=20, t=10, b=30),
-                               xaxis_title="Date", yaxis_title="Price")
-            st.plotly_chart(fig1, use_container_width=True)
+            with perf.stage("plotly: price & MAs"):
+                fig1 = price_ma_figure(clip_range(px, v0, v1), clip_range(ma_fast, v0, v1), clip_range(ma_slow, v0, v1),
+                                       ticker, int(fast), int(slow), max_points=int(max_points))
+                st.plotly_chart(fig1, use_container_width=True)
 
         # Equity curves
         with c2:
             st.subheader("Equity Curves")
-            fig2 = go.Figure()
-            fig2.add_scatter(x=res.index, y=res["eq_strategy"], name="Strategy",
-                             line=dict(color=PALETTE["accent"], width=3))
-            fig2.add_scatter(x=res.index, y=res["eq_buyhold"], name="Buy & Hold",
-                             line=dict(color="#9aa4b2", width=2, dash="dash"))
-            fig2.update_layout(height=420, margin=dict(l=30, r=20, t=10, b=30),
-                               xaxis_title="Date", yaxis_title="Equity")
-            st.plotly_chart(fig2, use_container_width=True)
+            with perf.stage("plotly: equity curves"):
+                fig2 = equity_figure(clip_range(res, v0, v1), max_points=int(max_points))
+                st.plotly_chart(fig2, use_container_width=True)
 
         st.subheader("Downloads")
-        out = res.copy()
-        out["signal"] = sig.reindex(res.index).fillna(0).astype(int)
-        st.download_button(
-            label="⬇️ Download results (CSV)",
-            data=out.to_csv(index=True).encode("utf-8"),
-            file_name=f"trendedge_{ticker}_{fast}_{slow}.csv",
-            mime="text/csv",
+        from src.export import export_file, export_name
+
+        export_formats = {"CSV": ("csv", None), "CSV (gzip)": ("csv", "gzip"),
+                          "Parquet": ("parquet", "zstd"), "Arrow IPC": ("arrow", "zstd")}
+        dl_fmt, dl_btn = st.columns([1, 2])
+        fmt, compression = export_formats[dl_fmt.selectbox("Format", list(export_formats), label_visibility="collapsed")]
+        file_name, mime = export_name(f"trendedge_{ticker}_{fast}_{slow}", fmt, compression)
+        # serialised in chunks only when the button is clicked, not on every rerun
+        dl_btn.download_button(
+            label=f"⬇️ Download results ({fmt.upper()})",
+            data=lambda: export_file(res.assign(signal=sig.reindex(res.index).fillna(0).astype(int)), fmt, compression),
+            file_name=file_name,
+            mime=mime,
+            on_click="ignore",
             use_container_width=True
         )
 
         st.subheader(f"{ticker} Candlestick Chart")
-        st.plotly_chart(plot_candles(ohlc, ticker), use_container_width=True)
+        with perf.stage("plotly: candlesticks"):
+            st.plotly_chart(plot_candles(clip_range(ohlc, v0, v1), ticker, max_points=int(max_points)),
+                            use_container_width=True)
         st.caption(f"Data source: Yahoo Finance — {ticker}")
 
     # ------------------ Strategy ------------------
     with tab_strategy:
-        st.write("**Signals preview** (1 = long, 0 = flat):")
-        prev = pd.DataFrame({
-            "price": px,
-            f"MA{int(fast)}": px.rolling(int(fast)).mean(),
-            f"MA{int(slow)}": px.rolling(int(slow)).mean(),
-            "signal": sig
-        }).dropna().tail(200)
-        st.dataframe(prev, use_container_width=True, height=360)
+        strategy_view = st.radio("View", ["Trades", "Parameter sweep"], horizontal=True,
+                                 label_visibility="collapsed")
+        if strategy_view == "Trades":
+            from src.export import export_file
+            from src.trades import trade_list, trade_stats
+
+            # one row per round trip; returns come from the strategy curve, so costs are included
+            def compute_trades():
+                hl = ohlc[["High", "Low"]].reindex(px.index)
+                return trade_list(px, sig, returns=res["ret_strategy"],
+                                  high=hl["High"].fillna(px), low=hl["Low"].fillna(px))
+
+            with perf.stage("trade_list"):
+                trades = cache.get_or_compute(
+                    cache_key("trades", px_key, fast=int(fast), slow=int(slow), costs=params["costs"]), compute_trades)
+            ts_ = trade_stats(trades)
+            t1, t2, t3, t4, t5 = st.columns(5)
+            t1.metric("Trades", f"{int(ts_['trades']):,}")
+            t2.metric("Win rate", f"{ts_['win_rate']:.0%}" if ts_["trades"] else "–")
+            t3.metric("Avg trade", f"{ts_['avg_return']:.2%}" if ts_["trades"] else "–",
+                      help=f"Median {ts_['median_return']:.2%} · best {ts_['best']:.2%} · worst {ts_['worst']:.2%}"
+                      if ts_["trades"] else None)
+            t4.metric("Profit factor", f"{ts_['profit_factor']:.2f}" if ts_["trades"] else "–",
+                      help="Sum of winning trade returns / sum of losing ones")
+            t5.metric("Longest streak", f"{ts_['max_win_streak']:.0f}W / {ts_['max_loss_streak']:.0f}L"
+                      if ts_["trades"] else "–")
+            st.caption("Entries and exits at the close of the crossover bar (positions apply from the next bar). "
+                       "MAE / MFE: worst / best open excursion from the entry price, using bar highs and lows.")
+            pct = st.column_config.NumberColumn(format="percent")
+            st.dataframe(trades.iloc[::-1], use_container_width=True, height=360, hide_index=True,
+                         column_config={"return": pct, "mae": pct, "mfe": pct,
+                                        "entry_price": st.column_config.NumberColumn(format="%.2f"),
+                                        "exit_price": st.column_config.NumberColumn(format="%.2f")})
+            st.download_button("⬇️ Download trades (CSV)", data=lambda: export_file(trades, "csv", index=False),
+                               file_name=f"trendedge_{ticker}_{int(fast)}_{int(slow)}_trades.csv", mime="text/csv",
+                               on_click="ignore")
+
+            with st.expander("Signals (last 200 bars)"):
+                st.write("1 = long, 0 = flat")
+                prev = pd.DataFrame({
+                    "price": px,
+                    f"MA{int(fast)}": ma_fast,
+                    f"MA{int(slow)}": ma_slow,
+                    "signal": sig
+                }).dropna().tail(200)
+                st.dataframe(prev, use_container_width=True, height=360)
+        else:
+            from src.sweep import SWEEP_METRICS
+            from utils.charts import SWEEP_LABELS, sweep_heatmap
+
+            sw1, sw2, sw3, sw4 = st.columns([3, 3, 1, 2])
+            f_lo, f_hi = sw1.slider("Fast MA range", 2, 200, (5, 100))
+            s_lo, s_hi = sw2.slider("Slow MA range", 5, 500, (20, 300))
+            step = int(sw3.number_input("Step", min_value=1, max_value=50, value=5))
+            metric = sw4.selectbox("Metric", SWEEP_METRICS, index=SWEEP_METRICS.index("sharpe"),
+                                   format_func=SWEEP_LABELS.get)
+            fasts, slows = list(range(f_lo, f_hi + 1, step)), list(range(s_lo, s_hi + 1, step))
+
+            # the cube is saved per ticker / bar range / costs, so reopening or re-slicing reads it back
+            def compute_sweep(job):
+                return sweep_store().sweep(ticker, px, fasts, slows, costs=params["costs"], progress=job.report,
+                                           periods_per_year=ppy)
+
+            sweep_key = cache_key("sweep", px_key, ticker=ticker, fasts=tuple(fasts), slows=tuple(slows),
+                                  costs=params["costs"])
+            previous = st.session_state.get("sweep_job")
+            if previous and previous != sweep_key:  # ranges changed: stop scoring the old grid
+                job_runner().cancel(previous, owner=session_id())
+            st.session_state["sweep_job"] = sweep_key
+            sw_job = background_job(sweep_key, compute_sweep,
+                                    f"Sweep {len(fasts)}×{len(slows)} windows", inline=profiler is not None)
+
+            def show_heatmap(cube, interactive=False):
+                grid = cube.metric(metric)
+                if not interactive:
+                    st.plotly_chart(sweep_heatmap(grid, metric), use_container_width=True)
+                    return None
+                # the last click (widget state) picks the drill-down pair; default: best cell
+                clicked = [pt for pt in (st.session_state.get("sweep_heatmap") or {}).get("selection", {}).get("points", [])
+                           if pt.get("curve_number", 0) == 0]
+                best = cube.best(metric)
+                pick = (int(clicked[0]["y"]), int(clicked[0]["x"])) if clicked else (best[:2] if best else None)
+                if pick is not None and not (pick[0] in cube.fasts and pick[1] in cube.slows and pick[0] < pick[1]):
+                    pick = best[:2] if best else None
+                st.plotly_chart(sweep_heatmap(grid, metric, pick), use_container_width=True, key="sweep_heatmap",
+                                on_select="rerun", selection_mode="points")
+                return pick
+
+            if sw_job is None or sw_job.status == "cancelled":
+                st.info("Sweep cancelled. Click **Run backtest** to start it again.")
+            elif sw_job.status == "failed":
+                st.error(f"Sweep failed: {sw_job.error}")
+            elif not sw_job.done:
+                job_progress(sw_job.key, show_heatmap)
+            else:
+                cube = sw_job.result
+                st.caption(f"{cube.scored:,} pairs · click a cell to see its equity curve")
+                pick = show_heatmap(cube, interactive=True)
+                if pick is not None:
+                    pf, ps = pick
+
+                    def compute_pick():
+                        sig_p = ma_signals(px, pf, ps, engine=ind)
+                        return sig_p, run_backtest(px, sig_p, costs=params["costs"], periods_per_year=ppy)
+
+                    sig_p, res_p = cache.get_or_compute(
+                        cache_key("backtest", px_key, fast=pf, slow=ps, costs=params["costs"]), compute_pick)
+                    from src.trades import trade_list, trade_stats
+                    tp = trade_stats(trade_list(px, sig_p, returns=res_p["ret_strategy"]))
+                    i, j = np.searchsorted(cube.fasts, pf), np.searchsorted(cube.slows, ps)
+                    cg, sh, dd = (cube.values[SWEEP_METRICS.index(m), i, j] for m in ("cagr", "sharpe", "max_dd"))
+                    st.subheader(f"MA {pf} / {ps}")
+                    st.caption(f"CAGR {cg:.2%} · Sharpe {sh:.2f} · Max drawdown {dd:.2%} · "
+                               f"{int(tp['trades'])} trades, {tp['win_rate']:.0%} winners")
+                    st.plotly_chart(equity_figure(res_p, max_points=int(max_points)), use_container_width=True)
+
+                # best-of-many selection bias: White's Reality Check and the deflated Sharpe ratio
+                if st.button("Is the best pair just luck? (data-snooping check)"):
+                    st.session_state["snoop_key"] = sweep_key
+                if st.session_state.get("snoop_key") == sweep_key:
+                    from src.robustness import deflated_sharpe, pair_returns, reality_check
+                    max_pairs = 2_000
+
+                    def compute_snooping(job):
+                        job.report(0.0, message="pair returns")
+                        R = pair_returns(px, fasts, slows, costs=params["costs"], periods_per_year=ppy)
+                        dsr = deflated_sharpe(R, periods_per_year=ppy)
+                        rc = reality_check(R, benchmark=res["ret_buyhold"].to_numpy(), n_boot=2_000, seed=0,
+                                           periods_per_year=ppy,
+                                           progress=lambda d, t: job.report(d, t, message="reality check"))
+                        return rc, dsr
+
+                    if cube.scored > max_pairs:
+                        st.warning(f"{cube.scored:,} pairs: narrow the ranges or raise the step "
+                                   f"(up to {max_pairs:,} pairs) for the data-snooping check.")
+                    else:
+                        sn_job = background_job(cache_key("snooping", sweep_key), compute_snooping,
+                                                "Data-snooping check", inline=profiler is not None)
+                        if sn_job is None or sn_job.status == "cancelled":
+                            st.info("Data-snooping check cancelled.")
+                        elif sn_job.status == "failed":
+                            st.error(f"Data-snooping check failed: {sn_job.error}")
+                        elif not sn_job.done:
+                            job_progress(sn_job.key)
+                        else:
+                            rc, dsr = sn_job.result
+                            d1, d2 = st.columns(2)
+                            d1.metric(f"Reality Check p-value (MA {rc['best'][0]}/{rc['best'][1]} vs buy & hold)",
+                                      f"{rc['p_value']:.3f}")
+                            d2.metric(f"Deflated Sharpe (MA {dsr['selected'][0]}/{dsr['selected'][1]})",
+                                      f"{dsr['dsr']:.1%}",
+                                      help=f"Probability the true Sharpe ({dsr['sharpe']:.2f}) beats the "
+                                           f"{dsr['sr0']:.2f} expected from the best of {dsr['n_trials']} "
+                                           f"lucky trials")
+                            st.caption(f"Across {rc['n_strategies']:,} tested pairs. A p-value above 0.05 means "
+                                       f"the best pair's edge over buy & hold is consistent with picking the "
+                                       f"luckiest of many; a deflated Sharpe well below 95% says the same for "
+                                       f"its Sharpe ratio.")
+
+                from src.export import export_file
+                st.download_button("⬇️ Download sweep (CSV)", data=lambda: export_file(cube.to_table(), "csv", index=False),
+                                   file_name=f"trendedge_{ticker}_sweep.csv", mime="text/csv", on_click="ignore")
 
     # ------------------ Research (ML) ------------------
     with tab_research:
-        st.caption("Prototype: simple ML classification of next-day up/down based on MA features.")
-        df = pd.DataFrame({"close": px})
-        df["ret1"] = df["close"].pct_change()
-        df[f"ma{int(fast)}"] = df["close"].rolling(int(fast)).mean()
-        df[f"ma{int(slow)}"] = df["close"].rolling(int(slow)).mean()
-        df["xover"] = (df[f"ma{int(fast)}"] > df[f"ma{int(slow)}"]).astype(int)
-        df["target_up"] = (df["close"].shift(-1) > df["close"]).astype(int)
-        df = df.dropna()
-
-        if len(df) > 100:
-            from sklearn.model_selection import train_test_split
-            from sklearn.linear_model import LogisticRegression
-            X = df[[f"ma{int(fast)}", f"ma{int(slow)}", "xover", "ret1"]]
-            y = df["target_up"]
-            Xtrain, Xtest, ytrain, ytest = train_test_split(X, y, test_size=0.25, shuffle=False)
-            clf = LogisticRegression(max_iter=200)
-            clf.fit(Xtrain, ytrain)
-            acc = clf.score(Xtest, ytest)
-            st.metric("Prototype accuracy (holdout)", f"{acc*100:.1f}%")
-
-            prob = pd.Series(clf.predict_proba(Xtest)[:, 1], index=Xtest.index, name="prob_up").tail(200)
-            fig3 = go.Figure()
-            fig3.add_scatter(x=prob.index, y=prob, mode="lines", name="P(up next day)",
-                             line=dict(color=PALETTE["accent"], width=2))
-            fig3.update_layout(height=300, margin=dict(l=30, r=20, t=10, b=30), yaxis_range=[0, 1])
+        st.caption("Prototype: logistic regression for next-day up/down on lagged returns, MA ratios, RSI and volatility.")
+        training = {"Holdout (75/25)": "holdout", "Rolling 3y window, monthly refit": "rolling",
+                    "Expanding window, monthly refit": "expanding"}
+        mode = training[st.selectbox(
+            "Training", list(training),
+            help="Rolling/expanding refits warm-start from the previous model; every prediction is out-of-sample")]
+
+        # the whole research result is cached on top of the per-fit model cache inside src.research;
+        # fits run in the background, so the other tabs render while the model trains
+        def compute_research(job):
+            job.report(0.0, message="training")
+            with job.timings.stage("ml_fit"):
+                return research.direction_model(px, int(fast), int(slow), mode=mode, engine=ind, cache=cache,
+                                                progress=job.report)
+
+        ml_job = background_job(cache_key("research", px_key, fast=int(fast), slow=int(slow), mode=mode),
+                                compute_research, f"Model fit ({mode})", inline=profiler is not None)
+        out_ml = ml_job.result if ml_job is not None and ml_job.status == "done" else None
+        if ml_job is None or ml_job.status == "cancelled":
+            st.info("Model fit cancelled. Click **Run backtest** to start it again.")
+        elif ml_job.status == "failed":
+            st.error(f"Model fit failed: {ml_job.error}")
+        elif not ml_job.done:
+            job_progress(ml_job.key)
+        elif out_ml is not None:
+            acc, prob = out_ml["accuracy"], out_ml["prob"].tail(200)
+            label = "holdout" if mode == "holdout" else f"out-of-sample, {out_ml['refits']} refits"
+            st.metric(f"Prototype accuracy ({label})", f"{acc*100:.1f}%")
+
+            fig3 = probability_figure(prob)
             st.plotly_chart(fig3, use_container_width=True)
         else:
             st.info("Not enough data for the demo model yet. Try a longer date range.")
@@ -355,6 +658,9 @@ else:
     with tab_data:
         st.dataframe(pd.DataFrame({"Price": px}).tail(1000), use_container_width=True, height=420)
 
+    if profiler:
+        st.session_state["perf_profile"] = (profiler.engine, profiler.stop())
+
     # ------------------ Settings ------------------
     with tab_settings:
         st.write("Theme follows `.streamlit/config.toml`. You can also change the theme from the ☰ menu → Settings.")
@@ -365,12 +671,46 @@ else:
             language="toml"
         )
 
+        with st.expander("Performance"):
+            pc1, pc2, pc3 = st.columns(3)
+            pc1.checkbox("Record stage timings", key="perf_enabled")
+            pc2.checkbox("Track memory (slower)", key="perf_memory")
+            pc3.button("Profile this run", on_click=lambda: st.session_state.update(perf_profile_next=True),
+                       help="Re-runs the backtest once under pyinstrument (if installed) or cProfile")
+
+            if perf.events:
+                st.dataframe(perf.summary(), use_container_width=True, hide_index=True)
+                dl1, dl2 = st.columns(2)
+                dl1.download_button("⬇️ Timings (JSON)", perf.to_json(), file_name="trendedge_timings.json",
+                                    mime="application/json", use_container_width=True)
+                dl2.download_button("⬇️ Chrome trace", perf.to_chrome_trace(), file_name="trendedge_trace.json",
+                                    mime="application/json", use_container_width=True,
+                                    help="Open in chrome://tracing or ui.perfetto.dev")
+            elif perf.enabled:
+                st.caption("Timings appear after the next run.")
+
+            cs = result_cache().stats
+            rc1, rc2 = st.columns([3, 1])
+            rc1.caption(f"Result cache: {len(result_cache())} entries, {result_cache().nbytes / 2**20:.1f} MB · "
+                        f"{cs['hits']} hits, {cs['disk_hits']} disk hits, {cs['misses']} misses, "
+                        f"{cs['evictions']} evictions")
+            rc2.button("Clear result cache", on_click=lambda: result_cache().clear(), use_container_width=True)
+            js = job_runner().stats
+            running = sum(not j.done for j in job_runner().jobs())
+            st.caption(f"Background jobs: {running} queued/running · {js['submitted']} submitted, "
+                       f"{js['deduplicated']} shared with an identical job, {js['cancelled']} cancelled")
+
+            if "perf_profile" in st.session_state:
+                engine, report = st.session_state["perf_profile"]
+                st.caption(f"Last profile ({engine}):")
+                st.code(report, language="text")
+
 # ------------------ Notes & Disclaimer ------------------
 with st.expander("Notes & Disclaimer"):
     st.markdown(
         """
 - Signals use **next-day execution** (`signal.shift(1)`), i.e., trade on the bar after the crossover.
-- Transaction costs, slippage, and taxes **are not included**.
+- Commission, spread and fixed fees are charged on every position change as set under **Costs & sizing** (all zero by default); market impact and taxes **are not included**.
 - Past performance does **not** guarantee future results. Educational use only.
         """
     )
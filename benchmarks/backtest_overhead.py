@@ -0,0 +1,36 @@
+# benchmarks/backtest_overhead.py
+"""
+Per-call overhead of the pandas run_backtest vs the array path run_backtest_np.
+
+    python -m benchmarks.backtest_overhead
+
+Synthetic prices only (no network). "pandas" is the DataFrame-in/DataFrame-out
+call; "np" passes pre-aligned arrays and reuses the same output buffers on
+every call, returning only eq_strategy as an optimisation loop would.
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks.common import synthetic_prices
+from src.backtest import run_backtest, run_backtest_np
+from src.signals import ma_signals
+
+
+def main():
+    print(f"{'bars':>8} {'pandas us/call':>15} {'np us/call':>11} {'speedup':>8}")
+    for n in (250, 2_500, 7_500, 25_000):
+        px = synthetic_prices(n)
+        sig = ma_signals(px, 20, 50)
+        p, s = px.to_numpy(), sig.to_numpy(dtype=np.float64)
+        buffers = {}
+
+        reps = max(20, 200_000 // n)
+        t_pd = min(timeit.repeat(lambda: run_backtest(px, sig), number=reps, repeat=3)) / reps
+        t_np = min(timeit.repeat(lambda: run_backtest_np(p, s, columns=("eq_strategy",), out=buffers),
+                                 number=reps, repeat=3)) / reps
+        print(f"{n:>8} {t_pd * 1e6:>15.1f} {t_np * 1e6:>11.1f} {t_pd / t_np:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
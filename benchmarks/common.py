@@ -0,0 +1,36 @@
+# benchmarks/common.py
+import numpy as np
+import pandas as pd
+
+
+def synthetic_prices(n: int, seed: int = 0) -> pd.Series:
+    """Geometric random walk on business days; deterministic for a given seed, no network needed."""
+    rng = np.random.default_rng(seed)
+    # daily bars stop fitting in pandas' Timestamp range around 100k rows, so large series use minutes
+    idx = pd.bdate_range("1990-01-01", periods=n) if n <= 100_000 else pd.date_range("1990-01-01", periods=n, freq="min")
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, n))), index=idx, name="price")
+
+
+def synthetic_ohlc(px: pd.Series, seed: int = 1) -> pd.DataFrame:
+    """OHLC bars around a close series (open = previous close, high/low padded by noise)."""
+    rng = np.random.default_rng(seed)
+    close = px.to_numpy()
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    pad = np.abs(rng.normal(0, 0.003, len(close))) * close
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + pad,
+        "Low": np.minimum(open_, close) - pad,
+        "Close": close,
+    }, index=px.index)
+
+
+def pair_grid(pairs: int) -> tuple[list[int], list[int]]:
+    """(fasts, slows) whose cross product has exactly `pairs` valid fast < slow combinations."""
+    nf = max(1, int(round(pairs ** 0.5)))
+    while pairs % nf:
+        nf -= 1
+    ns = pairs // nf
+    fasts = list(range(2, 2 + nf))
+    slows = list(range(2 + nf, 2 + nf + ns))
+    return fasts, slows
@@ -0,0 +1,193 @@
+# benchmarks/fake_price_server.py
+"""
+Local stand-in for a bulk price API, for exercising src.ingest without the network.
+
+    python -m benchmarks.fake_price_server --port 8765 --latency 0.05 --fail-rate 0.1
+    python -m src.ingest universe.txt --source http://127.0.0.1:8765/prices
+
+GET /prices?symbols=A,B&start=YYYY-MM-DD&end=YYYY-MM-DD returns long-format CSV
+(Date, Symbol, Open, High, Low, Close, Volume). Each symbol gets its own
+deterministic random walk (seeded from the name), so reruns return identical
+bars. Symbols starting with "BAD" are left out of the response. A fraction of
+requests fail with 503, and more than `max_rps` requests per second get 429
+with a Retry-After header.
+
+    with FakePriceServer(latency=0.02, fail_rate=0.1) as srv:
+        HTTPSource(srv.url)(["AAA", "BBB"])
+"""
+import argparse
+import functools
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import synthetic_ohlc
+
+COLUMNS = ["Date", "Symbol", "Open", "High", "Low", "Close", "Volume"]
+
+
+@functools.lru_cache(maxsize=4)
+def _dates(bars: int) -> pd.DatetimeIndex:
+    return pd.bdate_range("2015-01-01", periods=bars, name="Date")
+
+
+def symbol_history(symbol: str, bars: int = 2_500) -> pd.DataFrame:
+    """Deterministic daily OHLCV for `symbol` (business days from 2015-01-01)."""
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    idx = _dates(bars)
+    px = pd.Series(50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, bars))), index=idx)
+    df = synthetic_ohlc(px, seed=zlib.crc32(symbol.encode()) + 1)
+    df["Volume"] = rng.integers(100_000, 5_000_000, bars)
+    return df
+
+
+class FakePriceServer:
+    """
+    latency: seconds each request sleeps before answering
+    fail_rate: probability of a 503 response
+    max_rps: requests per second above which the server answers 429 (None = unlimited)
+    bars: history length per symbol
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_rate: float = 0.0,
+                 max_rps: float | None = None, retry_after: float = 0.1, bars: int = 2_500, seed: int = 0):
+        self.latency, self.fail_rate, self.max_rps = latency, fail_rate, max_rps
+        self.retry_after, self.bars = retry_after, bars
+        self.requests = 0
+        self.status_counts = {}
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._recent = []  # request timestamps within the last second
+        self._histories = {}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/prices"
+
+    def history(self, symbol: str) -> tuple[np.ndarray, list[bytes]]:
+        """(dates, pre-rendered CSV rows) for `symbol`, built once per server."""
+        with self._lock:
+            hit = self._histories.get(symbol)
+        if hit is None:
+            df = symbol_history(symbol, self.bars)
+            lines = df.assign(Symbol=symbol).reset_index()[COLUMNS].to_csv(
+                index=False, header=False, date_format="%Y-%m-%d", float_format="%.4f").encode().splitlines(keepends=True)
+            hit = (df.index.to_numpy(), lines)
+            with self._lock:
+                self._histories[symbol] = hit
+        return hit
+
+    def warm(self, symbols):
+        """Build the histories up front, so timings measure the client rather than data generation."""
+        for sym in symbols:
+            self.history(sym)
+        return self
+
+    def _admit(self) -> int:
+        """HTTP status for the next request (200, 429 or 503)."""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            self._recent.append(now)
+            if self.max_rps is not None and len(self._recent) > self.max_rps:
+                code = 429
+            elif self._rng.random() < self.fail_rate:
+                code = 503
+            else:
+                code = 200
+            self.status_counts[code] = self.status_counts.get(code, 0) + 1
+            return code
+
+    def body(self, symbols, start=None, end=None) -> bytes:
+        parts = []
+        for sym in symbols:
+            if not sym or sym.startswith("BAD"):
+                continue
+            dates, lines = self.history(sym)
+            a = np.searchsorted(dates, np.datetime64(start), "left") if start else 0
+            b = np.searchsorted(dates, np.datetime64(end), "right") if end else len(lines)
+            parts.extend(lines[a:b])
+        if not parts:
+            return b""
+        return (",".join(COLUMNS) + "\n").encode() + b"".join(parts)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/prices":
+                    self.send_error(404)
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                code = server._admit()
+                if code != 200:
+                    self.send_response(code)
+                    if code == 429:
+                        self.send_header("Retry-After", str(server.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                q = parse_qs(url.query)
+                symbols = q.get("symbols", [""])[0].split(",")
+                body = server.body(symbols, q.get("start", [None])[0], q.get("end", [None])[0])
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.fake_price_server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    ap.add_argument("--max-rps", type=float, default=None, help="answer 429 above this many requests/second")
+    ap.add_argument("--bars", type=int, default=2_500, help="history length per symbol")
+    args = ap.parse_args(argv)
+    srv = FakePriceServer(args.host, args.port, args.latency, args.fail_rate, args.max_rps, bars=args.bars)
+    print(f"serving {srv.url}  (Ctrl+C to stop)")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
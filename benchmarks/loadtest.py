@@ -0,0 +1,217 @@
+# benchmarks/loadtest.py
+"""
+Load test for the HTTP API (src.server): latency percentiles and requests per second.
+
+    python -m benchmarks.loadtest                                   # in-process server, synthetic prices
+    python -m benchmarks.loadtest --requests 5000 --concurrency 64 --mix backtest=8,sweep=1,batch=1
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --symbols SPY,QQQ,IWM --format arrow
+
+Without --url a server is started on a free local port over deterministic
+synthetic histories (benchmarks.fake_price_server.symbol_history, with
+--load-latency standing in for a store read), so it runs offline. Each client
+thread keeps one connection open and sends requests back to back; every
+request picks a symbol and MA pair at random from small sets, so concurrent
+requests overlap on symbols the way real traffic does. The report gives
+p50 / p99 latency per endpoint, overall requests per second, and the server's
+/stats (loads coalesced, moving averages computed, jobs deduplicated).
+"""
+import argparse
+import http.client
+import json
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+ENDPOINTS = ("backtest", "sweep", "batch")
+FASTS = (5, 10, 20, 30, 50)
+SLOWS = (60, 100, 150, 200)
+SWEEP_FASTS = list(range(5, 55, 5))
+SWEEP_SLOWS = list(range(60, 260, 20))
+
+
+def parse_mix(text: str) -> dict:
+    """Endpoint weights from "backtest=8,sweep=1" (a missing weight counts as 1)."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r}; use {ENDPOINTS}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_requests(n: int, symbols: list[str], mix: dict, batch_size: int = 10, seed: int = 0) -> list[tuple[str, dict]]:
+    """n (endpoint, body) pairs drawn with the mix's weights."""
+    rng = np.random.default_rng(seed)
+    names = list(mix)
+    weights = np.array([mix[k] for k in names], dtype=float)
+    out = []
+    for ep in rng.choice(names, size=n, p=weights / weights.sum()):
+        sym = str(rng.choice(symbols))
+        if ep == "backtest":
+            body = {"symbol": sym, "fast": int(rng.choice(FASTS)), "slow": int(rng.choice(SLOWS))}
+        elif ep == "sweep":
+            body = {"symbol": sym, "fasts": SWEEP_FASTS, "slows": SWEEP_SLOWS}
+        else:
+            picks = rng.choice(symbols, size=min(batch_size, len(symbols)), replace=False)
+            body = {"symbols": [str(s) for s in picks], "fast": int(rng.choice(FASTS)), "slow": int(rng.choice(SLOWS))}
+        out.append((str(ep), body))
+    return out
+
+
+def _connect(target) -> http.client.HTTPConnection:
+    conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=300)
+    conn.connect()
+    # http.client writes headers and body separately; without this Nagle + delayed ACK add ~40 ms per request
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def run_load(url: str, requests: list[tuple[str, dict]], concurrency: int = 16, fmt: str = "json") -> list[tuple]:
+    """Send `requests` from `concurrency` threads; returns (endpoint, status, seconds, bytes) per request."""
+    target = urlparse(url)
+    todo = iter(range(len(requests)))
+    lock = threading.Lock()
+    results = [None] * len(requests)
+
+    def client():
+        conn = _connect(target)
+        try:
+            while True:
+                with lock:
+                    i = next(todo, None)
+                if i is None:
+                    return
+                ep, body = requests[i]
+                t0 = time.perf_counter()
+                try:
+                    conn.request("POST", f"{target.path.rstrip('/')}/{ep}?format={fmt}", json.dumps(body),
+                                 {"Content-Type": "application/json"})
+                    resp = conn.getresponse()
+                    size = len(resp.read())
+                    status = resp.status
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = _connect(target)
+                    status, size = 0, 0
+                results[i] = (ep, status, time.perf_counter() - t0, size)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def summarize(results: list[tuple], wall: float) -> list[dict]:
+    """One row per endpoint plus "all": requests, errors, p50 / p99 / mean latency (ms), KB per response."""
+    rows = []
+    for ep in [*sorted({r[0] for r in results}), "all"]:
+        sel = [r for r in results if ep in ("all", r[0])]
+        lat = np.array([r[2] for r in sel]) * 1e3
+        rows.append({"endpoint": ep, "requests": len(sel), "errors": sum(r[1] != 200 for r in sel),
+                     "p50_ms": float(np.percentile(lat, 50)), "p99_ms": float(np.percentile(lat, 99)),
+                     "mean_ms": float(lat.mean()), "kb_per_resp": float(np.mean([r[3] for r in sel]) / 1e3),
+                     "req_per_s": len(sel) / wall})
+    return rows
+
+
+def _server_stats(url: str) -> dict | None:
+    target = urlparse(url)
+    conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+    try:
+        conn.request("GET", f"{target.path.rstrip('/')}/stats")
+        resp = conn.getresponse()
+        return json.loads(resp.read()) if resp.status == 200 else None
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def synthetic_server(bars: int = 2_500, load_latency: float = 0.05, ttl: float = 60.0, workers: int = 4):
+    """src.server.LocalServer over symbol_history prices (not started)."""
+    import tempfile
+
+    from benchmarks.fake_price_server import symbol_history
+    from src.server import BacktestService, LocalServer, PricePool, create_app
+    from src.sweep import SweepStore
+
+    def loader(symbol, start=None, end=None, bar="1D"):
+        time.sleep(load_latency)
+        return symbol_history(symbol, bars), None
+
+    service = BacktestService(PricePool(loader, ttl=ttl), SweepStore(tempfile.mkdtemp(prefix="trendedge-loadtest-")),
+                              workers=workers)
+    return LocalServer(create_app(service))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Load test the src.server HTTP API.")
+    ap.add_argument("--url", default=None, help="server to test (default: start one in-process over synthetic prices)")
+    ap.add_argument("--symbols", default="20", help="comma-separated symbols, or a count of synthetic ones")
+    ap.add_argument("--requests", type=int, default=2_000)
+    ap.add_argument("--concurrency", type=int, default=32, help="client threads (one connection each)")
+    ap.add_argument("--mix", default="backtest=8,sweep=1,batch=1", help="endpoint weights")
+    ap.add_argument("--batch-size", type=int, default=10, help="symbols per /batch request")
+    ap.add_argument("--format", choices=["json", "arrow"], default="json")
+    ap.add_argument("--warmup", type=int, default=0, help="requests sent (and not counted) before the timed run")
+    ap.add_argument("--bars", type=int, default=2_500, help="synthetic history length")
+    ap.add_argument("--load-latency", type=float, default=0.05, help="seconds per synthetic price load")
+    ap.add_argument("--ttl", type=float, default=60.0, help="in-process server: seconds a loaded series is reused")
+    ap.add_argument("--workers", type=int, default=4, help="in-process server: job threads")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    symbols = ([f"S{i:03d}" for i in range(int(args.symbols))] if args.symbols.isdigit()
+               else [s.strip().upper() for s in args.symbols.split(",") if s.strip()])
+    server = None
+    if args.url is None:
+        server = synthetic_server(args.bars, args.load_latency, args.ttl, args.workers).start()
+    url = args.url or server.url
+    try:
+        if args.warmup:
+            run_load(url, make_requests(args.warmup, symbols, mix, args.batch_size, args.seed + 1),
+                     args.concurrency, args.format)
+        reqs = make_requests(args.requests, symbols, mix, args.batch_size, args.seed)
+        t0 = time.perf_counter()
+        results = run_load(url, reqs, args.concurrency, args.format)
+        wall = time.perf_counter() - t0
+        stats = _server_stats(url)
+    finally:
+        if server is not None:
+            server.stop()
+
+    rows = summarize(results, wall)
+    print(f"{len(results)} requests, {args.concurrency} clients, {len(symbols)} symbols, {args.format} "
+          f"-> {len(results) / wall:,.1f} req/s over {wall:.2f}s")
+    print(f"{'endpoint':<10} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'KB/resp':>9}")
+    for r in rows:
+        print(f"{r['endpoint']:<10} {r['requests']:>8} {r['errors']:>7} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+              f"{r['mean_ms']:>9.1f} {r['kb_per_resp']:>9.1f}")
+    if stats:
+        p, j = stats["prices"], stats["jobs"]
+        print(f"server: {p['loads']} loads ({p['coalesced']} coalesced, {p['hits']} reused), "
+              f"{p['sma_computed']} moving averages, {j['submitted']} jobs ({j['deduplicated']} deduplicated)")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"url": args.url, "requests": len(results), "concurrency": args.concurrency,
+                       "format": args.format, "mix": mix, "wall_s": wall, "endpoints": rows, "server": stats},
+                      fh, indent=2)
+    if any(r[1] != 200 for r in results):
+        print(f"{sum(r[1] != 200 for r in results)} requests failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
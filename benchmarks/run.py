@@ -0,0 +1,128 @@
+# benchmarks/run.py
+"""
+Run the benchmark suite, optionally save a baseline and/or fail on regressions.
+
+    python -m benchmarks.run                                  # print results
+    python -m benchmarks.run --save benchmarks/baseline.json  # record a baseline
+    python -m benchmarks.run --compare benchmarks/baseline.json --time-tolerance 0.25
+
+Wall time is the best of several repeats; peak memory comes from a separate
+tracemalloc run so the tracing overhead doesn't skew the timings.
+"""
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.suite import BENCHMARKS
+
+
+def _cases(name_filter: str | None, max_bars: int, max_pairs: int):
+    for name, spec in BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        keys = list(spec["params"])
+        for values in itertools.product(*(spec["params"][k] for k in keys)):
+            params = dict(zip(keys, values))
+            if params.get("bars", 0) > max_bars or params.get("pairs", 0) > max_pairs:
+                continue
+            label = ",".join(f"{k}={v}" for k, v in params.items())
+            yield (f"{name}[{label}]" if label else name), spec["setup"], params
+
+
+def measure(run, min_time: float = 0.2, max_repeat: int = 20) -> tuple[float, float]:
+    """(best wall seconds, peak traced MB) for one call of `run`."""
+    run()  # warm-up (imports, caches, JIT)
+    best, total, reps = float("inf"), 0.0, 0
+    while reps < 3 or (total < min_time and reps < max_repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        run()
+        dt = time.perf_counter() - t0
+        best, total, reps = min(best, dt), total + dt, reps + 1
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def run_suite(name_filter=None, max_bars=1_000_000, max_pairs=10_000, verbose=True) -> dict:
+    results = {}
+    for key, setup, params in _cases(name_filter, max_bars, max_pairs):
+        try:
+            run = setup(**params)
+        except ImportError as e:  # optional dependency (e.g. plotly) not installed
+            if verbose:
+                print(f"{key:<60} skipped ({e})", file=sys.stderr)
+            continue
+        secs, peak_mb = measure(run)
+        results[key] = {"time_s": secs, "peak_mb": peak_mb}
+        if verbose:
+            print(f"{key:<60} {secs * 1e3:>11.3f} ms {peak_mb:>10.2f} MB", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, time_tol: float, mem_tol: float) -> list[str]:
+    """Human-readable regression messages (empty if none)."""
+    problems = []
+    for key, cur in results.items():
+        ref = baseline.get(key)
+        if not ref:
+            continue
+        if cur["time_s"] > ref["time_s"] * (1 + time_tol):
+            problems.append(f"{key}: time {ref['time_s'] * 1e3:.3f} -> {cur['time_s'] * 1e3:.3f} ms "
+                            f"(+{cur['time_s'] / ref['time_s'] - 1:.0%})")
+        if cur["peak_mb"] > ref["peak_mb"] * (1 + mem_tol) + 0.5:  # +0.5 MB slack for tiny cases
+            problems.append(f"{key}: peak memory {ref['peak_mb']:.2f} -> {cur['peak_mb']:.2f} MB")
+    return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    ap.add_argument("--filter", default=None, help="only benchmarks whose name contains this")
+    ap.add_argument("--max-bars", type=int, default=1_000_000, help="largest series size to run (suite goes to 10M)")
+    ap.add_argument("--max-pairs", type=int, default=10_000, help="largest grid size to run")
+    ap.add_argument("--save", default=None, help="write results to this JSON file")
+    ap.add_argument("--compare", default=None, help="baseline JSON to check against")
+    ap.add_argument("--time-tolerance", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = +25%%")
+    ap.add_argument("--mem-tolerance", type=float, default=0.25, help="allowed peak-memory growth")
+    args = ap.parse_args(argv)
+
+    results = run_suite(args.filter, args.max_bars, args.max_pairs)
+
+    if args.save:
+        doc = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(doc, fh, indent=2, sort_keys=True)
+        print(f"saved {len(results)} results to {args.save}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        problems = compare(results, baseline, args.time_tolerance, args.mem_tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
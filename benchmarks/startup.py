@@ -0,0 +1,106 @@
+# benchmarks/startup.py
+"""
+Cold-start profile of the Streamlit app: a fresh interpreter renders the
+landing page once (streamlit.testing AppTest, no network) under
+`python -X importtime`, and the import log is parsed to show what the first
+render paid for.
+
+    python -m benchmarks.startup                 # time-to-first-render + top imports
+    python -m benchmarks.startup --runs 5 --top 25
+
+The same measurement is registered in benchmarks/suite.py as
+"startup.first_render", so --save/--compare in benchmarks/run.py track it as a
+regression metric alongside the compute benchmarks.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# modules that should only load once a run (or a specific tab) needs them
+HEAVY = ("pandas", "numpy", "plotly.graph_objects", "pyarrow", "sklearn", "yfinance", "numba")
+
+_RENDER = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({{"streamlit_s": t1 - t0, "render_s": t2 - t1, "exceptions": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of `-X importtime` output as {module, self_us, cumulative_us, depth}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cum_us),
+            "depth": (len(name) - len(name.lstrip(" ")) - 1) // 2,
+        })
+    return rows
+
+
+def first_render(app: str | Path = ROOT / "app.py") -> dict:
+    """
+    Render `app` once in a fresh interpreter. Returns
+    {wall_s, streamlit_s, render_s, import_s, heavy, imports, exceptions}:
+      wall_s: process start -> landing page rendered (the cold-start number)
+      render_s: the app script's first run alone (excludes importing streamlit)
+      import_s: total import time inside the process
+      heavy: which HEAVY modules were imported by then
+    """
+    import time
+
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RENDER.format(app=str(app))],
+        cwd=ROOT, capture_output=True, text=True, check=False,
+    )
+    wall = time.perf_counter() - t0
+    out = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if proc.returncode != 0 or not out:
+        raise RuntimeError(f"first render failed:\n{proc.stderr[-2000:]}")
+    imports = parse_importtime(proc.stderr)
+    loaded = {r["module"] for r in imports}
+    return {
+        "wall_s": wall,
+        **json.loads(out[-1]),
+        "import_s": sum(r["self_us"] for r in imports) / 1e6,
+        "heavy": [m for m in HEAVY if m in loaded],
+        "imports": imports,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.split("\n\n")[0])
+    ap.add_argument("--runs", type=int, default=3, help="cold starts to take the best of")
+    ap.add_argument("--top", type=int, default=15, help="top-level imports to list")
+    args = ap.parse_args(argv)
+
+    runs = [first_render() for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["wall_s"])
+    if best["exceptions"]:
+        print("app raised:", *best["exceptions"], sep="\n  ")
+    print(f"time to first render: {best['wall_s']:.2f}s (best of {args.runs}; "
+          f"import streamlit {best['streamlit_s']:.2f}s, app script {best['render_s']:.2f}s, "
+          f"all imports {best['import_s']:.2f}s)")
+    print("heavy modules loaded:", ", ".join(best["heavy"]) or "none")
+    top = sorted((r for r in best["imports"] if r["depth"] == 0), key=lambda r: -r["cumulative_us"])
+    print(f"\n{'cumulative ms':>14}  module")
+    for r in top[:args.top]:
+        print(f"{r['cumulative_us'] / 1e3:14.1f}  {r['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# benchmarks/suite.py
+"""
+Benchmark definitions. Each entry has a `setup(**params)` that builds inputs
+(not timed) and a `run(state)` that is timed and memory-profiled by
+benchmarks/run.py. Everything uses synthetic data, so the suite runs offline.
+"""
+import numpy as np
+
+from benchmarks.common import pair_grid, synthetic_ohlc, synthetic_prices
+
+BAR_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+PAIR_COUNTS = [1, 10, 100, 1_000, 10_000]
+GRID_BARS = 7_500  # ~30 years of daily bars
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, **params):
+    """Register `setup` under `name`; the decorated setup returns (run, state)."""
+    def deco(setup):
+        BENCHMARKS[name] = {"setup": setup, "params": params}
+        return setup
+    return deco
+
+
+# ------------------ signals ------------------
+@benchmark("signals.ma_signals", bars=BAR_SIZES)
+def _ma_signals(bars):
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    return lambda: ma_signals(px, 20, 50)
+
+
+@benchmark("signals.sma_matrix", bars=BAR_SIZES)
+def _sma_matrix(bars):
+    from src.signals import sma_matrix
+    p = synthetic_prices(bars).to_numpy()
+    return lambda: sma_matrix(p, [20, 50])
+
+
+@benchmark("indicators.engine", bars=BAR_SIZES)
+def _indicator_engine(bars):
+    from src.indicators import IndicatorEngine
+    px = synthetic_prices(bars)
+    specs = [("sma", 20), ("sma", 50), ("ema", 12), ("wma", 10), ("rsi", 14), ("atr", 14),
+             ("bbands", 20, 2.0), ("donchian", 20), ("macd", 12, 26, 9)]
+    return lambda: IndicatorEngine(px).compute(specs)
+
+
+# ------------------ backtest ------------------
+@benchmark("backtest.run_backtest", bars=BAR_SIZES)
+def _run_backtest(bars):
+    from src.backtest import run_backtest
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    sig = ma_signals(px, 20, 50)
+    return lambda: run_backtest(px, sig)
+
+
+@benchmark("backtest.run_backtest_np", bars=BAR_SIZES)
+def _run_backtest_np(bars):
+    from src.backtest import run_backtest_np
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    p, s = px.to_numpy(), ma_signals(px, 20, 50).to_numpy(dtype=np.float64)
+    buffers = {}
+    return lambda: run_backtest_np(p, s, columns=("eq_strategy",), out=buffers)
+
+
+@benchmark("backtest.run_grid", pairs=PAIR_COUNTS)
+def _run_grid(pairs):
+    from src.backtest import run_grid
+    px = synthetic_prices(GRID_BARS)
+    fasts, slows = pair_grid(pairs)
+    return lambda: run_grid(px, fasts, slows)
+
+
+@benchmark("sweep.saved_cube", pairs=PAIR_COUNTS)
+def _saved_cube(pairs):
+    import tempfile
+
+    from src.sweep import SweepStore
+    px = synthetic_prices(GRID_BARS)
+    fasts, slows = pair_grid(pairs)
+    store = SweepStore(tempfile.mkdtemp(prefix="sweep-bench-"))
+    store.sweep("BENCH", px, fasts, slows)  # saved once; the timed call re-slices it from disk
+    return lambda: store.sweep("BENCH", px, fasts[: len(fasts) // 2 + 1], slows)
+
+
+@benchmark("robustness.bootstrap_ci", bars=BAR_SIZES[:3], n_boot=[1_000])
+def _bootstrap_ci(bars, n_boot):
+    from src.robustness import bootstrap_ci
+    r = synthetic_prices(bars).pct_change().fillna(0.0).to_numpy()
+    return lambda: bootstrap_ci(r, n_boot=n_boot, seed=0)
+
+
+@benchmark("robustness.reality_check", strategies=[10, 100, 1_000], n_boot=[1_000])
+def _reality_check(strategies, n_boot):
+    from src.robustness import reality_check
+    R = np.random.default_rng(0).normal(0.0, 0.01, (GRID_BARS, strategies))
+    return lambda: reality_check(R, n_boot=n_boot, seed=0)
+
+
+@benchmark("walkforward.walk_forward", pairs=PAIR_COUNTS)
+def _walk_forward(pairs):
+    from src.walkforward import walk_forward
+    px = synthetic_prices(GRID_BARS)
+    fasts, slows = pair_grid(pairs)
+    return lambda: walk_forward(px, fasts, slows, train=1_500, test=300)  # 20 folds
+
+
+# ------------------ multi-symbol panel (signals -> backtest -> metrics) ------------------
+@benchmark("panel.backtest_metrics", symbols=[10, 100, 1_000])
+def _panel(symbols):
+    from src.backtest import run_backtest_panel
+    from src.metrics import compute_all_metrics
+    from src.panel import PricePanel
+    from src.signals import panel_ma_signals
+    panel = PricePanel.from_frames({f"SYM{i}": synthetic_prices(GRID_BARS, seed=i) for i in range(symbols)})
+
+    def run():
+        res = run_backtest_panel(panel, panel_ma_signals(panel, 20, 50), columns=("ret_strategy", "eq_strategy"))
+        return compute_all_metrics(res["ret_strategy"], res["eq_strategy"], valid=panel.mask)
+    return run
+
+
+@benchmark("panel.backtest_costed", symbols=[10, 100, 1_000], sizing=["fixed", "vol_target"])
+def _panel_costed(symbols, sizing):
+    from src.backtest import run_backtest_panel
+    from src.costs import CostModel
+    from src.panel import PricePanel
+    from src.signals import panel_ma_signals
+    # staggered listing dates, so symbols have different bar counts
+    panel = PricePanel.from_frames({f"SYM{i}": synthetic_prices(GRID_BARS, seed=i).iloc[(i * 37) % 2_000:]
+                                    for i in range(symbols)})
+    signal = panel_ma_signals(panel, 20, 50)
+    costs = CostModel(bps=5, spread_bps=2, fixed_fee=1.0, sizing=sizing)
+    return lambda: run_backtest_panel(panel, signal, costs=costs, columns=("ret_strategy", "eq_strategy"))
+
+
+@benchmark("portfolio.run_portfolio", symbols=[10, 100, 1_000], rebalance=["M", "signal"])
+def _portfolio(symbols, rebalance):
+    from src.panel import PricePanel
+    from src.portfolio import run_portfolio
+    panel = PricePanel.from_frames({f"SYM{i}": synthetic_prices(GRID_BARS, seed=i) for i in range(symbols)})
+    return lambda: run_portfolio(panel, weighting="inverse_vol", cap=0.05, rebalance=rebalance)
+
+
+# ------------------ metrics ------------------
+@benchmark("metrics.cagr_sharpe_max_drawdown", bars=BAR_SIZES)
+def _metrics_separate(bars):
+    from src.backtest import run_backtest
+    from src.metrics import cagr, max_drawdown, sharpe
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    res = run_backtest(px, ma_signals(px, 20, 50))
+    return lambda: (cagr(res["eq_strategy"]), sharpe(res["ret_strategy"]), max_drawdown(res["eq_strategy"]))
+
+
+@benchmark("metrics.compute_all_metrics", bars=BAR_SIZES)
+def _metrics_fused(bars):
+    from src.backtest import run_backtest
+    from src.metrics import compute_all_metrics
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    res = run_backtest(px, ma_signals(px, 20, 50))
+    r, e = res["ret_strategy"].to_numpy(), res["eq_strategy"].to_numpy()
+    return lambda: compute_all_metrics(r, e)
+
+
+# ------------------ research (ML features) ------------------
+@benchmark("research.build_features", bars=BAR_SIZES)
+def _build_features(bars):
+    from src.research import build_features
+    px = synthetic_prices(bars)
+    return lambda: build_features(px, 20, 50)
+
+
+# ------------------ bulk ingestion (local fake HTTP server) ------------------
+@benchmark("ingest.bulk_download", symbols=[10, 100, 500])
+def _bulk_download(symbols):
+    import tempfile
+
+    from benchmarks.fake_price_server import FakePriceServer
+    from src.ingest import BulkDownloader, HTTPSource
+    from src.store import PriceStore
+    syms = [f"SYM{i:04d}" for i in range(symbols)]
+    srv = FakePriceServer(latency=0.005).warm(syms).start()  # daemon thread; lives for the benchmark process
+
+    def run():
+        with tempfile.TemporaryDirectory(prefix="ingest-bench-") as d:  # fresh store: full downloads every repeat
+            dl = BulkDownloader(PriceStore(d), HTTPSource(srv.url), batch_size=20, workers=4, rate=1_000, burst=8)
+            return dl.run(syms)[1]
+    return run
+
+
+# ------------------ result export ------------------
+@benchmark("export.stream_export", bars=BAR_SIZES[:4], fmt=["csv", "parquet", "arrow"])
+def _stream_export(bars, fmt):
+    from src.backtest import run_backtest
+    from src.export import stream_export
+    from src.signals import ma_signals
+    px = synthetic_prices(bars)
+    sig = ma_signals(px, 20, 50)
+    res = run_backtest(px, sig).assign(signal=sig)
+    return lambda: sum(len(piece) for piece in stream_export(res, fmt))  # consume without keeping the file
+
+
+# ------------------ trade ledgers ------------------
+@benchmark("trades.trade_list", bars=BAR_SIZES[:4])
+def _trade_list(bars):
+    from src.signals import ma_signals
+    from src.trades import trade_list
+    px = synthetic_prices(bars)
+    sig = ma_signals(px, 20, 50)
+    return lambda: trade_list(px, sig)
+
+
+@benchmark("trades.trade_list_sweep", bars=BAR_SIZES[:3], pairs=[100, 1_000])
+def _trade_list_sweep(bars, pairs):
+    from src.signals import pair_signals
+    from src.trades import trade_list
+    px = synthetic_prices(bars)
+    fasts, slows = pair_grid(pairs)
+    sig = pair_signals(px, fasts, slows)
+    return lambda: trade_list(px, sig)
+
+
+# ------------------ intraday bars (memory-mapped minute store) ------------------
+def _synthetic_minutes(minutes):
+    """Regular-session minute bars (390 a day on business days) from a synthetic random walk."""
+    c = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0.0, 0.0005, minutes)))  # minute-sized moves
+    days = np.busday_offset("2000-01-03", np.arange(-(-minutes // 390)), roll="forward")
+    day_ns = days.astype("datetime64[ns]").astype(np.int64)
+    ts = (day_ns[:, None] + (np.arange(570, 960) * 60 * 10**9)[None, :]).ravel()[:minutes]
+    return {"ts": ts, "open": c, "high": c * 1.0005, "low": c * 0.9995, "close": c, "volume": np.ones(minutes)}
+
+
+@benchmark("intraday.resample", minutes=[1_000_000, 10_000_000], rule=["5min", "1h", "1D"])
+def _resample(minutes, rule):
+    from src.intraday import resample_ohlcv
+    cols = _synthetic_minutes(minutes)
+    return lambda: resample_ohlcv(cols, rule)
+
+
+@benchmark("intraday.stream_backtest", minutes=[1_000_000, 10_000_000], rule=[None, "5min"])
+def _stream_backtest(minutes, rule):
+    import tempfile
+
+    from src.intraday import MinuteStore, stream_backtest
+    store = MinuteStore(tempfile.mkdtemp(prefix="intraday-bench-"))  # left for the OS to clean up
+    store.append("SYN", _synthetic_minutes(minutes))
+    if rule:
+        store.aggregate("SYN", rule)  # built once; the benchmark times the cached read + backtest
+    return lambda: stream_backtest(store, "SYN", 20, 50, rule=rule)
+
+
+# ------------------ Streamlit render path (figure build + Plotly JSON) ------------------
+@benchmark("render.overview_figures", bars=BAR_SIZES[:4], max_points=[0, 2000])
+def _render(bars, max_points):
+    from src.backtest import run_backtest
+    from src.signals import ma_signals
+    from utils.charts import equity_figure, plot_candles, price_ma_figure
+    px = synthetic_prices(bars)
+    ohlc = synthetic_ohlc(px)
+    res = run_backtest(px, ma_signals(px, 20, 50))
+    ma_f, ma_s = px.rolling(20).mean(), px.rolling(50).mean()
+
+    def run():
+        mp = max_points or None  # 0 = full resolution
+        figs = [price_ma_figure(px, ma_f, ma_s, "SYN", 20, 50, max_points=mp),
+                equity_figure(res, max_points=mp), plot_candles(ohlc, "SYN", max_points=mp)]
+        return [f.to_json() for f in figs]  # what st.plotly_chart ships to the browser
+    return run
+
+
+# ------------------ Streamlit cold start (fresh interpreter per call) ------------------
+@benchmark("startup.first_render")
+def _first_render():
+    import streamlit  # noqa: F401  (skip cleanly when the app's dependencies aren't installed)
+    from benchmarks.startup import first_render
+    return first_render
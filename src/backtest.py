@@ -2,6 +2,10 @@
 import numpy as np
 import pandas as pd
 
+from src.costs import CostModel, apply_costs
+from src.metrics import bars_per_year
+from src.signals import sma_matrix
+
 def _to_series(x, fallback_index=None, name=None):
     """Coerce x to a 1-D pandas Series and keep/restore a sensible index."""
     # If already a Series, just ensure 1-D
@@ -29,12 +33,21 @@ def _to_series(x, fallback_index=None, name=None):
     return pd.Series(arr, name=name)
 
 
-def run_backtest(prices, signal):
+BACKTEST_COLUMNS = ("price", "ret_buyhold", "ret_strategy", "eq_buyhold", "eq_strategy")
+COST_COLUMNS = ("position", "turnover", "cost")
+
+
+def run_backtest(prices, signal, costs: CostModel | None = None, periods_per_year=None):
     """
     prices: price series (pd.Series preferred)
     signal: 0/1 or -1/1 positions aligned to prices.index (next-day execution applied inside)
+    costs: optional src.costs.CostModel (sizing, commission, spread, fixed fees);
+           None keeps the frictionless, fully invested model
+    periods_per_year: annualisation for volatility-target sizing; default
+                      src.metrics.bars_per_year(prices.index), so intraday bars size correctly
     Returns a DataFrame with columns:
       price, ret_buyhold, ret_strategy, eq_buyhold, eq_strategy
+      (+ position, turnover, cost when costs is given)
     """
     # --- Coerce to 1-D Series and align ---
     px_idx = getattr(prices, "index", None)
@@ -49,22 +62,403 @@ def run_backtest(prices, signal):
         sig = sig.reindex(px.index[-len(sig):]).reindex(px.index)
     sig = sig.fillna(0).astype(float)
 
+    # --- Returns & equity curves on plain arrays ---
+    columns = BACKTEST_COLUMNS + (COST_COLUMNS if costs is not None else ())
+    if costs is not None and periods_per_year is None:
+        periods_per_year = bars_per_year(px.index)
+    cols = run_backtest_np(px.to_numpy(), sig.to_numpy(), columns=columns, costs=costs,
+                           periods_per_year=periods_per_year or 252)
+    return pd.DataFrame(cols, index=px.index)
+
+
+def run_backtest_np(prices, signal, columns=BACKTEST_COLUMNS, out=None, costs: CostModel | None = None,
+                    periods_per_year=252):
+    """
+    Array-in/array-out core of run_backtest for tight loops: no index alignment,
+    no NaN handling, no DataFrame.
+    prices: 1-D float64 array without NaNs
+    signal: 1-D float array of positions, same length and already aligned to prices
+    columns: subset of BACKTEST_COLUMNS (+ COST_COLUMNS when costs is given) to return
+    out: optional dict of reusable float64 buffers, filled in on first use; pass the
+         same dict on every call to avoid allocations (returned arrays are views of it)
+    costs: optional CostModel; strategy columns are then computed by src.costs.apply_costs
+           (which allocates its own arrays)
+    periods_per_year: annualisation for the costs' volatility-target sizing
+    Returns {column: array} in the order of `columns`.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    s = np.asarray(signal, dtype=np.float64)
+    n = len(p)
+    if len(s) != n:
+        raise ValueError(f"prices and signal lengths differ: {n} vs {len(s)}")
+    unknown = set(columns) - set(BACKTEST_COLUMNS) - (set(COST_COLUMNS) if costs is not None else set())
+    if unknown:
+        raise ValueError(f"Unknown backtest columns: {sorted(unknown)}")
+    out = {} if out is None else out
+
+    def buf(name):
+        # unrequested intermediates live under a "_"-prefixed key so they're reused too
+        key = name if name in columns else "_" + name
+        b = out.get(key)
+        if b is None or len(b) != n:
+            b = out[key] = np.empty(n)
+        return b
+
+    res = {"price": p}
+
     # --- Returns (next-day execution) ---
-    ret_buyhold = px.pct_change().fillna(0)
-    ret_strategy = ret_buyhold * sig.shift(1).fillna(0)
-
-    # --- Build DataFrame with explicit index to avoid scalar issues ---
-    df = pd.DataFrame(
-        {
-            "price": px.values,
-            "ret_buyhold": ret_buyhold.values,
-            "ret_strategy": ret_strategy.values,
-        },
-        index=px.index,
-    )
+    ret_bh = res["ret_buyhold"] = buf("ret_buyhold")
+    if n:
+        ret_bh[0] = 0.0
+        np.divide(p[1:], p[:-1], out=ret_bh[1:])
+        ret_bh[1:] -= 1.0
+
+    if costs is not None:
+        res.update(apply_costs(ret_bh, s, costs, periods_per_year))
+    elif "ret_strategy" in columns or "eq_strategy" in columns:
+        ret_st = res["ret_strategy"] = buf("ret_strategy")
+        if n:
+            ret_st[0] = 0.0
+            np.multiply(ret_bh[1:], s[:-1], out=ret_st[1:])
 
     # --- Equity curves ---
-    df["eq_buyhold"]  = (1.0 + df["ret_buyhold"]).cumprod()
-    df["eq_strategy"] = (1.0 + df["ret_strategy"]).cumprod()
+    for eq_col, ret_col in (("eq_buyhold", "ret_buyhold"), ("eq_strategy", "ret_strategy")):
+        if eq_col in columns and eq_col not in res:
+            eq = res[eq_col] = buf(eq_col)
+            np.add(res[ret_col], 1.0, out=eq)
+            np.multiply.accumulate(eq, out=eq)
+
+    return {c: res[c] for c in columns}
+
+
+def run_backtest_panel(panel, signal, costs: CostModel | None = None, field: str | None = None,
+                       columns=BACKTEST_COLUMNS, periods_per_year=None) -> dict:
+    """
+    run_backtest for every symbol of a src.panel.PricePanel, as (dates, symbols) arrays.
+    signal: (dates, symbols) positions (e.g. src.signals.panel_ma_signals); the last
+            position is held over dates a symbol has no bar
+    costs: optional CostModel with scalar parameters, applied per symbol over its own bars
+           (blocks of symbols are costed together, see _costs_by_symbol)
+    periods_per_year: annualisation for the costs' volatility-target sizing;
+                      default bars_per_year(panel.dates)
+    On dates without a bar returns are 0 and equity is carried, so each symbol's
+    valid rows match run_backtest on that symbol alone. "price" is the panel's
+    float32 view (NaN on missing dates); pass valid=panel.mask to
+    src.metrics.compute_all_metrics to score the columns.
+    Returns {column: array} in the order of `columns`.
+    """
+    unknown = set(columns) - set(BACKTEST_COLUMNS) - (set(COST_COLUMNS) if costs is not None else set())
+    if unknown:
+        raise ValueError(f"Unknown backtest columns: {sorted(unknown)}")
+    P, M = panel.field(field), panel.mask
+    n, k = M.shape
+    S = np.asarray(signal)
+    if S.shape != (n, k):
+        raise ValueError(f"signal shape {S.shape} doesn't match the panel {(n, k)}")
+
+    # position of each symbol's latest bar at or before every date (carries prices/positions over gaps)
+    gaps = not M.all()
+    last = np.maximum.accumulate(np.where(M, np.arange(n)[:, None], 0), axis=0) if gaps else None
+    px = (np.take_along_axis(P, last, axis=0) if gaps else P).astype(np.float64)
+    S = (np.take_along_axis(S, last, axis=0) if gaps else S).astype(np.float64)
+
+    res = {"price": P}
+    ret_bh = res["ret_buyhold"] = np.zeros((n, k))
+    if n:
+        with np.errstate(invalid="ignore"):
+            np.divide(px[1:], px[:-1], out=ret_bh[1:])
+        ret_bh[1:] -= 1.0
+        ret_bh[np.isnan(ret_bh) | ~M if gaps else np.isnan(ret_bh)] = 0.0  # no bar, or the symbol's first bar
+
+    if costs is not None:
+        if periods_per_year is None:
+            periods_per_year = bars_per_year(panel.dates)
+        names = [c for c in ("position", "turnover", "cost", "ret_strategy", "eq_strategy") if c in columns]
+        extra = _costs_by_symbol(ret_bh, S, M if gaps else None, costs, periods_per_year, names)
+        if gaps:
+            if "eq_strategy" in extra:
+                eq = np.take_along_axis(extra["eq_strategy"], last, axis=0)
+                eq[np.isnan(eq)] = 1.0  # before the symbol's first bar
+                extra["eq_strategy"] = eq
+            if "position" in extra:
+                extra["position"] = np.take_along_axis(extra["position"], last, axis=0)
+        res.update(extra)
+    elif "ret_strategy" in columns or "eq_strategy" in columns:
+        ret_st = res["ret_strategy"] = np.zeros((n, k))
+        if n:
+            np.multiply(ret_bh[1:], S[:-1], out=ret_st[1:])
+
+    for eq_col, ret_col in (("eq_buyhold", "ret_buyhold"), ("eq_strategy", "ret_strategy")):
+        if eq_col in columns and eq_col not in res:
+            res[eq_col] = np.cumprod(1.0 + res[ret_col], axis=0)
+
+    return {c: res[c] for c in columns}
+
+
+def _costs_by_symbol(ret, signal, mask, costs: CostModel, periods_per_year, names, cells=1 << 16) -> dict:
+    """
+    src.costs.apply_costs for every column of a (dates, symbols) block, each over its own bars.
+    mask: (dates, symbols) bool of the bars each symbol has, or None when all are present
+    Blocks of about `cells` values go through apply_costs as one matrix. Inside a block each
+    symbol's bars are packed to the top of its column; the padding only trails each column
+    and every step (sizing, turnover, compounding) is causal, so it never reaches real bars.
+    Returns {name: (dates, symbols) array}; dates without a bar are 0 (eq_strategy: NaN).
+    """
+    n, k = ret.shape
+    out = {c: np.full((n, k), np.nan if c == "eq_strategy" else 0.0) for c in names}
+    step = max(1, cells // max(n, 1))
+    for j0 in range(0, k, step):
+        j1 = min(j0 + step, k)
+        if mask is None:
+            res = apply_costs(ret[:, j0:j1], signal[:, j0:j1], costs, periods_per_year)
+            for c in names:
+                out[c][:, j0:j1] = res[c]
+            continue
+        w = j1 - j0
+        m = mask[:, j0:j1]
+        at = np.flatnonzero(m)  # (date * w + col) positions of the real bars in the block
+        src = at // w * k + (j0 + at % w)  # ... and in the full arrays
+        dst = (np.cumsum(m, axis=0) - 1).ravel().take(at) * w + at % w
+        rows = int(m.sum(axis=0).max())  # the longest symbol's bar count
+        pr, ps = np.zeros((rows, w)), np.zeros((rows, w))
+        pr.put(dst, ret.take(src))
+        ps.put(dst, signal.take(src))
+        res = apply_costs(pr, ps, costs, periods_per_year)
+        for c in names:
+            out[c].put(src, res[c].take(dst))
+    return out
+
+
+class IncrementalBacktester:
+    """
+    Streaming counterpart of ma_signals -> run_backtest for one price series.
+    Feed bars with update(price) or update_many(prices); each bar costs O(1)
+    (rolling MA sums over a ring buffer), so live updates never reprocess history.
+    Feeding a whole history gives the same rows as run_backtest(px, ma_signals(px, fast, slow)).
+    NaN prices are skipped, like the dropna() in run_backtest.
+    """
+
+    COLUMNS = ["price", "ret_buyhold", "ret_strategy", "eq_buyhold", "eq_strategy", "signal"]
+
+    def __init__(self, fast: int, slow: int):
+        self.fast, self.slow = int(fast), int(slow)
+        if self.fast < 1 or self.slow < 1:
+            raise ValueError("MA window lengths must be positive integers.")
+        self._window = max(self.fast, self.slow)
+        self._buf = np.zeros(self._window)  # last `window` prices, indexed by bar % window
+        self._sum_fast = 0.0
+        self._sum_slow = 0.0
+        self.bars = 0
+        self.price = np.nan
+        self.signal = 0          # position decided on the latest bar, held from the next one
+        self.eq_buyhold = 1.0
+        self.eq_strategy = 1.0
+        self.peak_strategy = 1.0
+        self.max_dd_strategy = 0.0
+
+    @property
+    def ma_fast(self) -> float:
+        return self._sum_fast / self.fast if self.bars >= self.fast else np.nan
+
+    @property
+    def ma_slow(self) -> float:
+        return self._sum_slow / self.slow if self.bars >= self.slow else np.nan
+
+    def update(self, price: float) -> dict | None:
+        """Ingest one bar; returns its row (same keys as COLUMNS), or None for a NaN price."""
+        p = float(price)
+        if np.isnan(p):
+            return None
+        n, w = self.bars, self._window
+
+        # --- Rolling sums (read the values leaving each window before overwriting) ---
+        self._sum_fast += p
+        self._sum_slow += p
+        if n >= self.fast:
+            self._sum_fast -= self._buf[(n - self.fast) % w]
+        if n >= self.slow:
+            self._sum_slow -= self._buf[(n - self.slow) % w]
+        self._buf[n % w] = p
+        self.bars = n + 1
+        if self.bars % w == 0:
+            # re-sum once per buffer cycle so float drift can't accumulate (amortised O(1))
+            self._resync()
+
+        # --- Returns (next-day execution: today's return uses yesterday's signal) ---
+        ret_bh = p / self.price - 1 if n else 0.0
+        ret_st = ret_bh * self.signal
+        self.eq_buyhold *= 1.0 + ret_bh
+        self.eq_strategy *= 1.0 + ret_st
+        self.peak_strategy = max(self.peak_strategy, self.eq_strategy)
+        self.max_dd_strategy = min(self.max_dd_strategy, self.eq_strategy / self.peak_strategy - 1)
+
+        f, s = self.ma_fast, self.ma_slow
+        self.signal = int(f > s) if not (np.isnan(f) or np.isnan(s)) else 0
+        self.price = p
+        return {
+            "price": p,
+            "ret_buyhold": ret_bh,
+            "ret_strategy": ret_st,
+            "eq_buyhold": self.eq_buyhold,
+            "eq_strategy": self.eq_strategy,
+            "signal": self.signal,
+        }
+
+    def update_many(self, prices) -> pd.DataFrame:
+        """Ingest a batch of bars in order; returns their rows as a DataFrame (index kept if prices has one)."""
+        idx = getattr(prices, "index", None)
+        values = np.asarray(prices, dtype=float).ravel()
+        rows, keep = [], []
+        for i, p in enumerate(values):
+            row = self.update(p)
+            if row is not None:
+                rows.append(row)
+                keep.append(i)
+        df = pd.DataFrame(rows, columns=self.COLUMNS)
+        if idx is not None:
+            df.index = idx[keep]
+        return df
+
+    def _resync(self):
+        w = self._window
+        last = self._buf[np.arange(self.bars - w, self.bars) % w]  # oldest -> newest
+        self._sum_fast = float(last[-self.fast:].sum())
+        self._sum_slow = float(last[-self.slow:].sum())
+
+
+def _score_pairs(ma_fast, ma_slows, ret, periods_per_year=252, block=512):
+    """
+    Score one fast MA against many slow MAs (rows of ma_slows) in column blocks.
+    Positions are (ma_fast > ma_slow) held from the next bar on; memory stays
+    bounded by len(ma_slows) * block regardless of history length.
+    Returns (cagr, sharpe, max_dd) arrays, one entry per slow row.
+    """
+    k, n = ma_slows.shape
+    if n < 2:
+        return np.full(k, np.nan), np.full(k, np.nan), np.full(k, 0.0 if n else np.nan)
+
+    ret2 = ret * ret
+    logret = np.log1p(ret)
+    s1 = np.zeros(k)       # sum of strategy returns
+    s2 = np.zeros(k)       # sum of squared strategy returns
+    logeq = np.zeros(k)    # running log equity
+    peak = np.zeros(k)     # running peak of log equity
+    mdd = np.zeros(k)      # worst log drawdown so far
+
+    for c0 in range(1, n, block):
+        c1 = min(c0 + block, n)
+        with np.errstate(invalid="ignore"):
+            pos = (ma_fast[c0 - 1:c1 - 1] > ma_slows[:, c0 - 1:c1 - 1]).astype(float)  # NaN -> flat
+        s1 += pos @ ret[c0:c1]
+        s2 += pos @ ret2[c0:c1]
+
+        x = pos * logret[c0:c1]
+        np.cumsum(x, axis=1, out=x)
+        x += logeq[:, None]
+        pk = np.maximum.accumulate(x, axis=1)
+        np.maximum(pk, peak[:, None], out=pk)
+        np.minimum(mdd, (x - pk).min(axis=1), out=mdd)
+        logeq = x[:, -1].copy()
+        peak = pk[:, -1].copy()
+
+    cagr = np.exp(logeq * (periods_per_year / n)) - 1
+    var = (s2 - s1 * s1 / n) / (n - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(var > 0, (s1 / n) / np.sqrt(var) * np.sqrt(periods_per_year), np.nan)
+    return cagr, sharpe, np.expm1(mdd)
+
+
+def _score_pairs_costed(ma_fast, ma_slows, ret, costs: CostModel, periods_per_year=252, cells=1 << 20):
+    """
+    _score_pairs with an execution model: positions for a batch of slow rows go through
+    src.costs.apply_costs as one (bars, rows) matrix. Costs depend on the whole path
+    (turnover, fee recursion), so batches split rows instead of time; each batch holds
+    about `cells` bars x rows values.
+    Returns (cagr, sharpe, max_dd) arrays, one entry per slow row.
+    """
+    k, n = ma_slows.shape
+    if n < 2:
+        return np.full(k, np.nan), np.full(k, np.nan), np.full(k, 0.0 if n else np.nan)
+    cagr, sharpe, mdd = np.empty(k), np.empty(k), np.empty(k)
+    step = max(1, cells // n)
+    for r0 in range(0, k, step):
+        r1 = min(r0 + step, k)
+        with np.errstate(invalid="ignore"):
+            sig = (ma_fast[:, None] > ma_slows[r0:r1].T).astype(float)  # (bars, rows), NaN -> flat
+        res = apply_costs(ret, sig, costs, periods_per_year)
+        eq, r = res["eq_strategy"], res["ret_strategy"]
+        with np.errstate(invalid="ignore"):
+            cagr[r0:r1] = eq[-1] ** (periods_per_year / n) - 1
+        sd = r.std(axis=0, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe[r0:r1] = np.where(sd > 0, r.mean(axis=0) / sd * np.sqrt(periods_per_year), np.nan)
+        mdd[r0:r1] = (eq / np.maximum.accumulate(eq, axis=0) - 1).min(axis=0)
+    return cagr, sharpe, mdd
+
+
+GRID_COLUMNS = ["fast", "slow", "cagr", "sharpe", "max_dd"]
+
+
+def _grid_scores(fasts, slows, ma_fast, ma_slow, ret, periods_per_year=252, costs: CostModel | None = None):
+    """
+    Score every fast < slow pair from precomputed MA rows (ma_fast[i] <-> fasts[i],
+    ma_slow[j] <-> slows[j], slows sorted ascending). Inputs may be column slices of
+    longer histories. costs: optional CostModel applied to every pair.
+    Returns (fast, slow, cagr, sharpe, max_dd) arrays.
+    """
+    parts = []
+    for i, f in enumerate(fasts):
+        j0 = np.searchsorted(slows, f, side="right")  # slows > f form a tail of the sorted rows
+        if j0 == len(slows):
+            continue
+        if costs is None:
+            c, sh, mdd = _score_pairs(ma_fast[i], ma_slow[j0:], ret, periods_per_year)
+        else:
+            c, sh, mdd = _score_pairs_costed(ma_fast[i], ma_slow[j0:], ret, costs, periods_per_year)
+        parts.append((np.full(len(slows) - j0, f), slows[j0:], c, sh, mdd))
+    if not parts:
+        return tuple(np.array([], dtype=t) for t in (int, int, float, float, float))
+    return tuple(np.concatenate(v) for v in zip(*parts))
+
+
+def run_grid(prices, fasts, slows, periods_per_year=None, costs: CostModel | None = None, progress=None):
+    """
+    Sweep every (fast, slow) MA crossover pair without building per-pair DataFrames.
+    prices: price series (pd.Series preferred)
+    fasts, slows: iterables of MA window lengths; pairs with fast >= slow are skipped
+    periods_per_year: default bars_per_year(prices.index) (252 for daily bars)
+    costs: optional CostModel applied to every pair (same model as run_backtest(costs=...))
+    progress: optional callback(done, total, rows) after each fast window, with only the rows
+              it just scored (accumulate them, e.g. src.sweep.SweepCube.fill; raising from
+              the callback stops the sweep)
+    Each moving average is computed once (see src.signals.sma_matrix); all slow
+    windows for a given fast window are then scored together as one 2-D matrix.
+    Returns a DataFrame with one row per pair and columns:
+      fast, slow, cagr, sharpe, max_dd
+    Results match ma_signals -> run_backtest(costs=costs) -> src.metrics for the same pair.
+    """
+    px = _to_series(prices, fallback_index=getattr(prices, "index", None), name="price").astype(float).dropna()
+    p = px.to_numpy()
+    if periods_per_year is None:
+        periods_per_year = bars_per_year(px.index)
+
+    fasts = np.unique(np.asarray(fasts, dtype=int).ravel())
+    slows = np.unique(np.asarray(slows, dtype=int).ravel())
+    ma_fast, ma_slow, ret = sma_matrix(p, fasts), sma_matrix(p, slows), _simple_returns(p)
+    if progress is None or not len(fasts):
+        scores = _grid_scores(fasts, slows, ma_fast, ma_slow, ret, periods_per_year, costs)
+        return pd.DataFrame(dict(zip(GRID_COLUMNS, scores)))
+
+    parts = []
+    for i in range(len(fasts)):
+        parts.append(_grid_scores(fasts[i:i + 1], slows, ma_fast[i:i + 1], ma_slow, ret, periods_per_year, costs))
+        progress(i + 1, len(fasts), pd.DataFrame(dict(zip(GRID_COLUMNS, parts[-1]))))
+    return pd.DataFrame(dict(zip(GRID_COLUMNS, map(np.concatenate, zip(*parts)))))
+
 
-    return df
+def _simple_returns(p: np.ndarray) -> np.ndarray:
+    """Bar-over-bar returns with 0 on the first bar (same as pct_change().fillna(0))."""
+    ret = np.zeros(len(p))
+    if len(p) > 1:
+        ret[1:] = p[1:] / p[:-1] - 1
+    return ret
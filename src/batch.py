@@ -0,0 +1,223 @@
+# src/batch.py
+"""
+Headless multi-ticker backtests for nightly universe runs.
+
+    python -m src.batch universe.txt --fast 20 --slow 50 --workers 8 --out results.parquet
+
+Prices are loaded once in the parent into a float32 src.panel.PricePanel and
+copied into a single shared-memory block; workers attach to it by name and run
+the panel kernels (signals, backtest, metrics) over whole chunks of symbol
+columns, so no DataFrames are pickled across processes. Results stream into
+one Parquet file (or CSV when the output path ends in .csv) as chunks complete.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import run_backtest_panel
+from src.data import close_prices, download_prices
+from src.metrics import bars_per_year, compute_all_metrics
+from src.panel import PricePanel
+from src.signals import panel_ma_signals
+from src.store import PriceStore
+
+RESULT_COLUMNS = {
+    "symbol": "string", "bars": "Int64", "start": "string", "end": "string",
+    "fast": "Int64", "slow": "Int64",
+    "cagr_strategy": "float64", "cagr_buyhold": "float64",
+    "sharpe_strategy": "float64", "sharpe_buyhold": "float64",
+    "max_dd_strategy": "float64", "max_dd_buyhold": "float64",
+    "error": "string",
+}
+
+# per-worker state, set once by _init_worker
+_SHM = None
+_PANEL = None
+
+
+def read_universe(path: str) -> list[str]:
+    """One symbol per line; blank lines and '#' comments are ignored. Duplicates are dropped."""
+    seen, out = set(), []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            sym = line.split("#", 1)[0].strip().upper()
+            if sym and sym not in seen:
+                seen.add(sym)
+                out.append(sym)
+    return out
+
+
+def load_closes(symbols, start=None, end=None, loader=None):
+    """
+    Load a close series per symbol with `loader(symbol, start, end) -> (DataFrame, err)`
+    (defaults to src.data.download_prices). Returns (closes dict, errors dict).
+    """
+    loader = loader or download_prices
+    closes, errors = {}, {}
+    for sym in symbols:
+        df, err = loader(sym, start, end)
+        if err or df.empty:
+            errors[sym] = err or "no data"
+            continue
+        closes[sym] = close_prices(df)
+    return closes, errors
+
+
+def _init_worker(spec: dict):
+    global _SHM, _PANEL
+    _PANEL, _SHM = PricePanel.attach(spec)  # the parent owns (and unlinks) the block
+
+
+def _score(panel: PricePanel, fast: int, slow: int) -> pd.DataFrame:
+    """Strategy and buy & hold metrics for every symbol of `panel`, one row per symbol."""
+    res = run_backtest_panel(panel, panel_ma_signals(panel, fast, slow),
+                             columns=("ret_buyhold", "ret_strategy", "eq_buyhold", "eq_strategy"))
+    k = len(panel)
+    m = compute_all_metrics(np.hstack([res["ret_strategy"], res["ret_buyhold"]]),
+                            np.hstack([res["eq_strategy"], res["eq_buyhold"]]),
+                            periods_per_year=bars_per_year(panel.dates), valid=np.hstack([panel.mask, panel.mask]))
+    out = {}
+    for c in ("cagr", "sharpe", "max_dd"):
+        out[f"{c}_strategy"] = m[c].to_numpy()[:k]
+        out[f"{c}_buyhold"] = m[c].to_numpy()[k:]
+    return pd.DataFrame(out)
+
+
+def _run_chunk(a: int, b: int, fast: int, slow: int):
+    """Backtest symbol columns [a, b) of the shared panel. Runs in a worker."""
+    t0 = time.perf_counter()
+    sub = _PANEL.select(_PANEL.symbols[a:b])  # adjacent columns: views, no copy
+    bars = int(sub.mask.sum())
+    try:
+        rows = [{"pos": a + i, "error": None, **r} for i, r in enumerate(_score(sub, fast, slow).to_dict("records"))]
+    except Exception as e:
+        rows = [{"pos": i, "error": f"{type(e).__name__}: {e}"} for i in range(a, b)]
+    return os.getpid(), rows, bars, time.perf_counter() - t0
+
+
+class _ResultWriter:
+    """Append row batches to a single Parquet (or CSV) file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        self._writer = None
+        self._header = True
+
+    def write(self, rows: list[dict]):
+        if not rows:
+            return
+        df = pd.DataFrame(rows).reindex(columns=list(RESULT_COLUMNS)).astype(RESULT_COLUMNS)
+        if self.csv:
+            df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run_batch(prices, fast: int, slow: int, out: str,
+              workers: int | None = None, chunk_size: int = 256,
+              errors: dict | None = None) -> pd.DataFrame:
+    """
+    Backtest every symbol of `prices` (a PricePanel, or {symbol: close Series}) across a process pool.
+    chunk_size: symbol columns per task (each task runs the vectorised panel kernels)
+    Rows stream into `out`; symbols listed in `errors` are written with their message.
+    Returns the per-worker throughput report (one row per worker process).
+    """
+    panel = prices if isinstance(prices, PricePanel) else PricePanel.from_frames(prices)
+    symbols = list(panel.symbols)
+    writer = _ResultWriter(out)
+    stats = {}
+    try:
+        writer.write([{"symbol": s, "fast": fast, "slow": slow, "error": e} for s, e in (errors or {}).items()])
+        if not symbols:
+            return pd.DataFrame(columns=["pid", "chunks", "symbols", "bars", "busy_s", "symbols_per_s", "bars_per_s"])
+
+        shm, spec = panel.share()
+        try:
+            counts = panel.mask.sum(axis=0)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,)) as ex:
+                futures = [ex.submit(_run_chunk, a, min(a + chunk_size, len(symbols)), fast, slow)
+                           for a in range(0, len(symbols), chunk_size)]
+                for fut in as_completed(futures):
+                    pid, rows, bars, secs = fut.result()
+                    for r in rows:
+                        i = r.pop("pos")
+                        a, b = panel.span(symbols[i])
+                        r.update(symbol=symbols[i], bars=int(counts[i]), fast=fast, slow=slow,
+                                 start=str(panel.index[a])[:10] if b else None,
+                                 end=str(panel.index[b - 1])[:10] if b else None)
+                    writer.write(rows)
+                    st = stats.setdefault(pid, [0, 0, 0, 0.0])
+                    st[0] += 1
+                    st[1] += len(rows)
+                    st[2] += bars
+                    st[3] += secs
+        finally:
+            shm.close()
+            shm.unlink()
+    finally:
+        writer.close()
+
+    report = pd.DataFrame(
+        [(pid, *v) for pid, v in stats.items()],
+        columns=["pid", "chunks", "symbols", "bars", "busy_s"],
+    )
+    report["symbols_per_s"] = report["symbols"] / report["busy_s"]
+    report["bars_per_s"] = report["bars"] / report["busy_s"]
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.batch", description="Batch MA-crossover backtests over a universe file.")
+    ap.add_argument("universe", help="text file with one ticker per line")
+    ap.add_argument("--fast", type=int, default=20)
+    ap.add_argument("--slow", type=int, default=50)
+    ap.add_argument("--start", default=None, help="YYYY-MM-DD (default: max history)")
+    ap.add_argument("--end", default=None, help="YYYY-MM-DD (default: today)")
+    ap.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="symbols per task")
+    ap.add_argument("--out", default="batch_results.parquet", help=".parquet or .csv")
+    ap.add_argument("--store", default=None, help="load prices through a local PriceStore at this directory")
+    args = ap.parse_args(argv)
+
+    if args.fast >= args.slow:
+        ap.error("--fast must be strictly smaller than --slow")
+
+    symbols = read_universe(args.universe)
+    t0 = time.perf_counter()
+    loader = PriceStore(args.store).get if args.store else None
+    # only the close is needed: "Adj Close" where the source has it, else "Close" (as close_prices)
+    panel, errors = PricePanel.load(symbols, args.start, args.end, loader=loader, fields=["Adj Close"])
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    report = run_batch(panel, args.fast, args.slow, args.out,
+                       workers=args.workers, chunk_size=args.chunk_size, errors=errors)
+    wall = time.perf_counter() - t0
+
+    print(f"loaded {len(panel)}/{len(symbols)} symbols in {t_load:.1f}s ({len(errors)} failed; "
+          f"{panel.nbytes / 1e6:.1f} MB panel)", file=sys.stderr)
+    print(f"backtested {len(panel)} symbols in {wall:.2f}s "
+          f"({len(panel) / wall if wall else float('nan'):.1f} symbols/s) -> {args.out}", file=sys.stderr)
+    if not report.empty:
+        print(report.to_string(index=False, float_format=lambda v: f"{v:,.1f}"), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
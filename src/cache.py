@@ -0,0 +1,201 @@
+# src/cache.py
+"""
+Result cache for backtests, metrics and model outputs.
+
+Keys combine a fingerprint of the input data with the parameters, so a cached
+result can only be served for exactly the bars it was computed from: when new
+bars are appended the fingerprint changes and stale entries are simply never
+asked for again (the LRU pushes them out).
+
+    cache = ResultCache(max_bytes=256 * 2**20, disk_dir=".trendedge/cache")
+    key = cache_key("backtest", fingerprint(px), fast=20, slow=50)
+    res = cache.get_or_compute(key, lambda: run_backtest(px, ma_signals(px, 20, 50)))
+
+The memory tier holds live objects (callers must treat them as read-only) and
+evicts least-recently-used entries once their estimated size exceeds max_bytes.
+The optional disk tier pickles entries to `disk_dir`, survives restarts and is
+trimmed the same way by last use.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get("TRENDEDGE_CACHE_DIR")  # unset = memory tier only
+
+
+def fingerprint(*objs) -> str:
+    """
+    Content hash of arrays / Series / DataFrames (values, index, column names, dtypes).
+    Any change to the data, including appended bars, gives a different fingerprint.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        if isinstance(obj, (pd.Series, pd.DataFrame)):
+            h.update(repr(obj.shape).encode())
+            h.update(pd.util.hash_pandas_object(obj.index, index=False).to_numpy().tobytes())
+            if isinstance(obj, pd.DataFrame):
+                h.update(repr(list(obj.columns)).encode())
+            values = obj.to_numpy()
+        else:
+            values = np.asarray(obj)
+        h.update(f"{values.dtype}{values.shape}".encode())
+        h.update(np.ascontiguousarray(values).tobytes())
+    return h.hexdigest()
+
+
+def cache_key(namespace: str, data_fingerprint: str, **params) -> str:
+    """Stable key for (namespace, data, params); params are hashed through their repr."""
+    blob = repr((namespace, data_fingerprint, sorted(params.items())))
+    return f"{namespace}-{hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()}"
+
+
+def estimate_nbytes(obj, _seen=None) -> int:
+    """
+    Rough in-memory size of a cached value: pandas/NumPy aware, recursive over containers,
+    an object's own `nbytes` when it has one (e.g. SweepCube, PricePanel), otherwise its
+    attributes (e.g. a fitted sklearn model's coefficient arrays).
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=False))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v, _seen) for v in obj)
+    attrs = getattr(obj, "__dict__", None)
+    if isinstance(attrs, dict):
+        return sys.getsizeof(obj) + estimate_nbytes(attrs, _seen)
+    return sys.getsizeof(obj)
+
+
+class ResultCache:
+    """
+    max_bytes: memory-tier budget (estimated); least recently used entries are evicted beyond it
+    disk_dir: optional directory for the pickled disk tier (None = memory only)
+    max_disk_bytes: disk-tier budget; least recently used files are removed beyond it
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, disk_dir=DEFAULT_CACHE_DIR, max_disk_bytes: int = 2 * 2**30):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._mem = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._mem)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.pkl"
+
+    # ---- memory tier ----
+    def _remember(self, key: str, value):
+        size = estimate_nbytes(value)
+        if size > self.max_bytes:
+            return  # would evict everything else; serve it from disk (if any) instead
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._mem[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, sz) = self._mem.popitem(last=False)
+            self._bytes -= sz
+            self.stats["evictions"] += 1
+
+    # ---- public API ----
+    def get(self, key: str, default=None):
+        """
+        Cached value for key (memory first, then disk), or default.
+        A disk entry that can't be loaded (truncated, corrupt, pickled by an incompatible
+        version) is deleted and counts as a miss, so get_or_compute recomputes it.
+        """
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit[0]
+            if self.disk_dir is not None:
+                path = self._path(key)
+                try:
+                    with open(path, "rb") as fh:
+                        value = pickle.load(fh)
+                    os.utime(path)  # mark as recently used for disk trimming
+                except FileNotFoundError:
+                    pass
+                except Exception:  # unpickling can raise almost anything (ValueError, ImportError, ...)
+                    path.unlink(missing_ok=True)
+                else:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, value)
+                    return value
+            self.stats["misses"] += 1
+            return default
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._remember(key, value)
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._trim_disk()
+
+    def get_or_compute(self, key: str, compute):
+        """Return the cached value for key, or call compute(), store and return its result."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk: bool = True):
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+        if disk and self.disk_dir is not None and self.disk_dir.exists():
+            for p in self.disk_dir.glob("*.pkl"):
+                p.unlink(missing_ok=True)
+
+    def _trim_disk(self):
+        files = []
+        for p in self.disk_dir.glob("*.pkl"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))  # get() touches files it serves
+        total = sum(f[1] for f in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,129 @@
+# src/costs.py
+"""
+Execution model for backtests: position sizing, turnover, proportional costs
+(commission + half spread) and fixed per-trade fees.
+
+Everything is array math over a (bars,) or (bars, strategies) block, and every
+CostModel parameter may be a scalar or an array with one value per strategy
+column, so a whole parameter grid is costed in one broadcasted pass.
+"""
+import numpy as np
+
+SIZING = ("fixed", "vol_target")
+
+
+class CostModel:
+    """
+    bps: commission per unit of turnover, in basis points of traded notional
+    spread_bps: quoted bid/ask spread in bps; half of it is paid per unit of turnover
+    fixed_fee: flat fee per trade (any bar where the position changes), in currency
+    capital: starting capital, used to turn fixed_fee into a fraction of equity
+    sizing: "fixed" (position = signal * fraction) or "vol_target"
+            (position = signal * min(target_vol / realised vol, max_leverage))
+    fraction: position size for "fixed" sizing (1.0 = fully invested)
+    target_vol, vol_lookback, max_leverage: annualised vol target, lookback in bars, leverage cap
+    """
+
+    def __init__(self, bps=0.0, spread_bps=0.0, fixed_fee=0.0, capital=10_000.0,
+                 sizing="fixed", fraction=1.0, target_vol=0.15, vol_lookback=20, max_leverage=1.0):
+        if sizing not in SIZING:
+            raise ValueError(f"sizing must be one of {SIZING}")
+        self.bps = bps
+        self.spread_bps = spread_bps
+        self.fixed_fee = fixed_fee
+        self.capital = capital
+        self.sizing = sizing
+        self.fraction = fraction
+        self.target_vol = target_vol
+        self.vol_lookback = int(vol_lookback)
+        self.max_leverage = max_leverage
+
+    def __repr__(self):
+        return (f"CostModel(bps={self.bps}, spread_bps={self.spread_bps}, fixed_fee={self.fixed_fee}, "
+                f"capital={self.capital}, sizing={self.sizing!r}, fraction={self.fraction}, "
+                f"target_vol={self.target_vol}, vol_lookback={self.vol_lookback}, max_leverage={self.max_leverage})")
+
+    @property
+    def has_fixed_fee(self) -> bool:
+        return bool(np.any(np.asarray(self.fixed_fee) != 0))
+
+
+def realised_vol(ret, lookback: int, periods_per_year=252, rows=None) -> np.ndarray:
+    """
+    Annualised rolling std (ddof=1) of ret over `lookback` bars ending at each bar; NaN until full.
+    ret: (bars,) or (bars, k); columns are independent
+    rows: optional bar positions to evaluate (output then has len(rows) rows)
+    """
+    r = np.asarray(ret, dtype=np.float64)
+    n = len(r)
+    ends = np.arange(lookback - 1, n) if rows is None else np.asarray(rows, dtype=np.int64)
+    out = np.full((n if rows is None else len(ends),) + r.shape[1:], np.nan)
+    if lookback < 2 or n < lookback:
+        return out
+    zero = np.zeros((1,) + r.shape[1:])
+    c1 = np.concatenate((zero, np.cumsum(r, axis=0)))
+    c2 = np.concatenate((zero, np.cumsum(r * r, axis=0)))
+    if rows is None:
+        s1 = c1[lookback:] - c1[:-lookback]
+        s2 = c2[lookback:] - c2[:-lookback]
+        at = slice(lookback - 1, None)
+    else:
+        at = ends >= lookback - 1
+        e = ends[at] + 1
+        s1 = c1[e] - c1[e - lookback]
+        s2 = c2[e] - c2[e - lookback]
+    var = np.maximum(s2 - s1 * s1 / lookback, 0.0) / (lookback - 1)
+    out[at] = np.sqrt(var * periods_per_year)
+    return out
+
+
+def target_positions(signal, ret, model: CostModel, periods_per_year=252) -> np.ndarray:
+    """Desired position at the close of each bar (signal scaled by the sizing rule)."""
+    sig = np.asarray(signal, dtype=np.float64)
+    if model.sizing == "fixed":
+        return sig * np.asarray(model.fraction, dtype=np.float64)
+    vol = realised_vol(ret, model.vol_lookback, periods_per_year)
+    if vol.ndim != sig.ndim:
+        vol = vol.reshape(-1, *([1] * (sig.ndim - 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.minimum(np.asarray(model.target_vol) / vol,
+                           np.asarray(model.max_leverage))
+    # no size before the first full vol estimate (or on zero-vol stretches)
+    return sig * np.nan_to_num(scale, nan=0.0, posinf=0.0)
+
+
+def apply_costs(ret_buyhold, signal, model: CostModel, periods_per_year=252) -> dict:
+    """
+    Next-day execution with costs.
+    ret_buyhold: (bars,) asset returns (0 on the first bar), or (bars, k) with one asset per signal column
+    signal: (bars,) or (bars, k) positions decided at each close
+    Returns {position, turnover, cost, ret_strategy, eq_strategy}, each shaped like signal:
+      position: position held over each bar (target from the previous close)
+      turnover: |change in position| at the start of each bar
+      cost: proportional cost charged on that bar (as a return)
+      eq_strategy / ret_strategy: equity after all costs, fixed fees included
+    """
+    r = np.asarray(ret_buyhold, dtype=np.float64)
+    target = target_positions(signal, r, model, periods_per_year)
+    rb = r if r.ndim == target.ndim else r.reshape(-1, *([1] * (target.ndim - 1)))
+
+    pos = np.zeros_like(target)
+    pos[1:] = target[:-1]
+    turnover = np.abs(np.diff(pos, axis=0, prepend=0.0))
+    cost = turnover * ((np.asarray(model.bps) + np.asarray(model.spread_bps) / 2) / 1e4)
+    net = pos * rb - cost
+
+    growth = np.cumprod(1.0 + net, axis=0)
+    if model.has_fixed_fee:
+        # eq_t = eq_{t-1} * (1 + net_t) - fee_t  (fees in units of starting equity), solved in closed form:
+        # eq_t = G_t * (1 - sum_{s<=t} fee_s / G_s) with G the fee-free growth path
+        fee = (turnover > 0) * (np.asarray(model.fixed_fee) / np.asarray(model.capital))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            eq = growth * (1.0 - np.cumsum(np.where(fee > 0, fee / growth, 0.0), axis=0))
+    else:
+        eq = growth
+    ret = np.empty_like(eq)
+    ret[:1] = eq[:1] - 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret[1:] = eq[1:] / eq[:-1] - 1.0
+    return {"position": pos, "turnover": turnover, "cost": cost, "ret_strategy": ret, "eq_strategy": eq}
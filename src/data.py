@@ -0,0 +1,90 @@
+# src/data.py
+import pandas as pd
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def download_prices(ticker: str, start=None, end=None) -> tuple[pd.DataFrame, str | None]:
+    """
+    Return a DataFrame with whatever Yahoo gives among:
+    Open, High, Low, Close, Adj Close, Volume.
+    Robust to missing 'Adj Close' or 'Close'. Never raises; errors come back as a message.
+    """
+    try:
+        import yfinance as yf  # imported here so headless callers only pay for it when downloading
+
+        kw = dict(auto_adjust=False, progress=False, threads=False)
+        if start or end:
+            df = yf.download(ticker, start=start or None, end=end or None, **kw)
+        else:
+            df = yf.download(ticker, period="max", **kw)
+
+        if df is None or df.empty:
+            return pd.DataFrame(), "Empty dataframe from Yahoo (check ticker/dates/internet)."
+
+        return clean_prices(select_symbol(df, ticker))
+    except Exception as e:
+        return pd.DataFrame(), f"{type(e).__name__}: {e}"
+
+
+def download_many(symbols: list[str], start=None, end=None) -> dict[str, tuple[pd.DataFrame, str | None]]:
+    """
+    One Yahoo request for several symbols; returns {symbol: (df, err)} like download_prices.
+    Unlike download_prices this raises if the request itself fails, so callers can retry it.
+    """
+    import yfinance as yf
+
+    kw = dict(auto_adjust=False, progress=False, threads=False, group_by="column")
+    if start or end:
+        df = yf.download(list(symbols), start=start or None, end=end or None, **kw)
+    else:
+        df = yf.download(list(symbols), period="max", **kw)
+    if df is None or df.empty:
+        return {s: (pd.DataFrame(), "Empty dataframe from Yahoo (check ticker/dates/internet).") for s in symbols}
+
+    out = {}
+    for sym in symbols:
+        if isinstance(df.columns, pd.MultiIndex) and sym not in df.columns.get_level_values(-1):
+            out[sym] = (pd.DataFrame(), "Symbol missing from Yahoo response.")
+            continue
+        out[sym] = clean_prices(select_symbol(df, sym))
+    return out
+
+
+def clean_prices(df: pd.DataFrame) -> tuple[pd.DataFrame, str | None]:
+    """Keep the known price columns and drop bars without a close. Returns (df, err)."""
+    # keep only known columns that actually exist
+    cols = [c for c in PRICE_COLUMNS if c in df.columns]
+    if not cols:
+        return pd.DataFrame(), "No usable OHLC/Adj Close columns returned."
+    df = df[cols]  # copy-on-write: no data is copied unless someone writes to it
+
+    # choose a 'close-like' series safely
+    close_series = df.get("Adj Close", df.get("Close"))
+    if close_series is None:
+        return pd.DataFrame(), "No Close or Adj Close column returned."
+
+    # drop rows where our chosen close is NaN (use its index to filter)
+    df = df.loc[close_series.dropna().index]
+    if df.empty:
+        return pd.DataFrame(), "Empty dataframe from Yahoo (check ticker/dates/internet)."
+    return df, None
+
+
+def select_symbol(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """If Yahoo returned MultiIndex columns (e.g., multiple tickers), pick the given ticker."""
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+    # try last level as ticker first (yfinance usual: level0=field, level1=symbol)
+    if ticker in df.columns.get_level_values(-1):
+        return df.xs(ticker, axis=1, level=-1)
+    if ticker in df.columns.get_level_values(0):
+        return df.xs(ticker, axis=1, level=0)
+    # fallback to first available symbol
+    first_sym = df.columns.get_level_values(-1)[0]
+    return df.xs(first_sym, axis=1, level=-1)
+
+
+def close_prices(df: pd.DataFrame) -> pd.Series:
+    """Price series for MA/backtest (prefers Adj Close if present)."""
+    return df.get("Adj Close", df.get("Close")).dropna()
@@ -0,0 +1,294 @@
+# src/export.py
+"""
+Chunked, streamed export of result sets to CSV, Parquet or Arrow IPC.
+
+    from src.export import stream_export, write_export
+    for part in stream_export(res, "parquet"):        # bytes, one piece per chunk
+        sink.write(part)
+    write_export("batch_results.parquet", "batch.csv.gz")  # file -> file, never fully in memory
+
+    python -m src.export batch_results.parquet batch.arrow --compression zstd
+
+Sources are a DataFrame (a single run's results or a run_grid table), a path
+to a Parquet/CSV/Arrow file (e.g. src.batch output, read back batch by batch),
+or any iterable / zero-argument callable yielding DataFrames. Rows are
+serialised `chunk_rows` at a time and each piece is handed on as soon as it is
+encoded, so peak memory is about one chunk plus the encoder's buffers rather
+than the whole serialised file. CSV output matches DataFrame.to_csv byte for
+byte (uncompressed). Nothing runs until the generator is consumed, which is
+what the app's deferred download buttons rely on.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# format -> (file suffix, mime type, allowed compressions, default compression)
+FORMATS = {
+    "csv": (".csv", "text/csv", (None, "gzip", "zstd", "bz2"), None),
+    "parquet": (".parquet", "application/vnd.apache.parquet", (None, "snappy", "gzip", "zstd", "brotli", "lz4"), "zstd"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file", (None, "zstd", "lz4"), "zstd"),
+}
+# extra suffix for compressed CSV (Parquet / Arrow compress inside the file)
+CSV_SUFFIX = {"gzip": ".gz", "zstd": ".zst", "bz2": ".bz2"}
+
+_DEFAULT = object()
+
+
+def _check(fmt: str, compression):
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    if compression is _DEFAULT:
+        compression = FORMATS[fmt][3]
+    if compression not in FORMATS[fmt][2]:
+        raise ValueError(f"{fmt} supports compression {FORMATS[fmt][2]}, got {compression!r}")
+    return compression
+
+
+def export_name(stem: str, fmt: str = "csv", compression=_DEFAULT) -> tuple[str, str]:
+    """(file name, mime type) for an export of `stem` in `fmt`."""
+    compression = _check(fmt, compression)
+    suffix, mime = FORMATS[fmt][:2]
+    if fmt == "csv" and compression:
+        return stem + suffix + CSV_SUFFIX[compression], "application/octet-stream"
+    return stem + suffix, mime
+
+
+def infer_format(path: str) -> tuple[str, str | None]:
+    """(format, compression) from a file name: .csv[.gz|.zst|.bz2], .parquet/.pq, .arrow/.feather/.ipc."""
+    p = str(path).lower()
+    for comp, ext in CSV_SUFFIX.items():
+        if p.endswith(".csv" + ext):
+            return "csv", comp
+    if p.endswith(".csv"):
+        return "csv", None
+    if p.endswith((".parquet", ".pq")):
+        return "parquet", FORMATS["parquet"][3]
+    if p.endswith((".arrow", ".feather", ".ipc")):
+        return "arrow", FORMATS["arrow"][3]
+    raise ValueError(f"Can't tell the export format of {path!r}; use .csv[.gz], .parquet or .arrow")
+
+
+def iter_frames(data, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """
+    DataFrame chunks of at most `chunk_rows` rows from `data`: a DataFrame (sliced, no copies),
+    a file path (.parquet / .arrow read batch by batch, .csv in chunks), or an iterable /
+    zero-argument callable of DataFrames (passed through; re-sliced if larger than a chunk).
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be >= 1")
+    if callable(data) and not isinstance(data, pd.DataFrame):
+        data = data()
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        for a in range(0, max(len(data), 1), chunk_rows):
+            yield data.iloc[a:a + chunk_rows]
+        return
+    if isinstance(data, (str, os.PathLike)):
+        yield from _iter_file(os.fspath(data), chunk_rows)
+        return
+    for df in data:
+        yield from iter_frames(df, chunk_rows)
+
+
+def _iter_file(path: str, chunk_rows: int):
+    fmt, _ = infer_format(path)
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    empty = True
+    for batch in batches:
+        for a in range(0, batch.num_rows, chunk_rows):
+            empty = False
+            yield batch.slice(a, chunk_rows).to_pandas()
+    if empty:
+        yield pd.DataFrame()
+
+
+class _Pieces:
+    """Write-only file object that collects bytes until they are drained (the streaming sink)."""
+
+    def __init__(self):
+        self.parts = []
+        self.pos = 0
+        self.closed = False
+
+    def write(self, b) -> int:
+        b = bytes(b)
+        self.parts.append(b)
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts.clear()
+        return out
+
+
+def stream_export(data, fmt: str = "csv", compression=_DEFAULT, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  index: bool = True):
+    """
+    Yield the export of `data` (see iter_frames) as byte pieces, one or more per chunk.
+    fmt: "csv", "parquet" or "arrow" (Arrow IPC file)
+    compression: see FORMATS; default none for CSV, zstd for Parquet and Arrow
+    index: write the DataFrame index (ignored for file sources, which have none)
+    Concatenating the pieces gives a complete file.
+    """
+    compression = _check(fmt, compression)
+    frames = iter_frames(data, chunk_rows)
+    if isinstance(data, (str, os.PathLike)):
+        index = False
+    sink = _Pieces()
+    if fmt == "csv":
+        yield from _stream_csv(frames, sink, compression, index)
+    else:
+        yield from _stream_arrow(frames, sink, fmt, compression, index)
+
+
+def _stream_csv(frames, sink, compression, index):
+    out = sink
+    if compression:
+        import pyarrow as pa
+
+        out = pa.CompressedOutputStream(sink, compression)
+    header = True
+    for df in frames:
+        out.write(df.to_csv(index=index, header=header).encode("utf-8"))
+        header = False
+        if piece := sink.drain():
+            yield piece
+    if out is not sink:
+        out.close()
+    if piece := sink.drain():
+        yield piece
+
+
+def _stream_arrow(frames, sink, fmt, compression, index):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for df in frames:
+            table = pa.Table.from_pandas(df, preserve_index=index)
+            if writer is None:
+                schema = table.schema
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(sink, schema, compression=compression or "none")
+                else:
+                    writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+            elif table.schema != schema:
+                table = table.cast(schema)  # e.g. an all-null column that pandas typed differently
+            writer.write_table(table)
+            if piece := sink.drain():
+                yield piece
+    finally:
+        if writer is not None:
+            writer.close()
+    if piece := sink.drain():
+        yield piece
+
+
+def write_export(data, path: str, fmt: str | None = None, compression=_DEFAULT,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, index: bool = True) -> int:
+    """
+    Stream `data` into `path` (format and compression inferred from its name unless given).
+    Writes to a temp file next to `path` and renames it, so a failed export leaves no partial file.
+    Returns the number of bytes written.
+    """
+    if fmt is None:
+        fmt, inferred = infer_format(path)
+        if compression is _DEFAULT:
+            compression = inferred
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for piece in stream_export(data, fmt, compression, chunk_rows, index):
+                fh.write(piece)
+                size += len(piece)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return size
+
+
+def export_file(data, fmt: str = "csv", compression=_DEFAULT, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                index: bool = True, spool_bytes: int = 32 * 2**20):
+    """
+    The export as a rewound binary file object, for a deferred download
+    (st.download_button(data=callable) only accepts bytes, io.BytesIO or an io.BufferedReader):
+    an io.BytesIO up to `spool_bytes`, beyond that a temp file reopened read-only (already
+    unlinked, so it disappears once the reader is closed or collected).
+    """
+    fh, path = io.BytesIO(), None
+    try:
+        for piece in stream_export(data, fmt, compression, chunk_rows, index):
+            if path is None and fh.tell() + len(piece) > spool_bytes:
+                fd, path = tempfile.mkstemp(suffix=".export")
+                spooled, fh = fh, os.fdopen(fd, "wb")
+                fh.write(spooled.getbuffer())
+            fh.write(piece)
+        if path is None:
+            fh.seek(0)
+            return fh
+        fh.close()
+        reader = open(path, "rb")
+    except BaseException:
+        fh.close()
+        if path is not None:
+            os.unlink(path)
+        raise
+    with contextlib.suppress(OSError):  # Windows can't unlink an open file; the temp dir gets it later
+        os.unlink(path)
+    return reader
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.export",
+                                 description="Convert a result file (e.g. src.batch output) between CSV, Parquet and Arrow.")
+    ap.add_argument("src", help=".parquet, .arrow or .csv input")
+    ap.add_argument("dst", help="output; format from the suffix (.csv, .csv.gz, .csv.zst, .parquet, .arrow)")
+    ap.add_argument("--compression", default=None,
+                    help="override the codec (csv: gzip/zstd/bz2; parquet: snappy/gzip/zstd/brotli/lz4; arrow: zstd/lz4; 'none')")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = ap.parse_args(argv)
+
+    fmt, compression = infer_format(args.dst)
+    if args.compression is not None:
+        compression = None if args.compression.lower() == "none" else args.compression.lower()
+    size = write_export(args.src, args.dst, fmt, compression, args.chunk_rows)
+    print(f"wrote {size / 1e6:.1f} MB -> {args.dst}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# src/indicators.py
+"""
+Indicator engine: declare the indicators you need, get NumPy arrays back.
+
+    eng = IndicatorEngine(close=px, high=df["High"], low=df["Low"])
+    out = eng.compute([("sma", 20), ("sma", 50), ("bbands", 20, 2.0), ("macd", 12, 26, 9)])
+    out["sma_20"], out["bbands_20_2.0_upper"], out["macd_12_26_9_hist"]
+
+Every indicator is a node in a dependency graph (e.g. bbands(20) -> sma(20) ->
+cumsum(close); macd -> ema(12), ema(26)). Nodes are evaluated on demand and
+memoised per engine, so shared sub-computations run once per price series no
+matter how many indicators (or calls) need them.
+
+Supported specs (name, *params):
+  ("sma", n)  ("ema", n)  ("wma", n)  ("rsi", n=14)  ("atr", n=14)
+  ("bbands", n=20, k=2.0) -> upper / middle / lower
+  ("donchian", n=20)      -> upper / middle / lower
+  ("macd", fast=12, slow=26, signal=9) -> line / signal / hist
+Bars before a full lookback are NaN. EMA-type smoothing (EMA, MACD, Wilder's
+RSI/ATR) is seeded from the first bar and masked until the lookback is filled.
+ATR and Donchian fall back to close-only inputs when high/low are not given.
+"""
+import numpy as np
+import pandas as pd
+
+# outputs per multi-output indicator, in order
+MULTI_OUTPUTS = {
+    "bbands": ("upper", "middle", "lower"),
+    "donchian": ("upper", "middle", "lower"),
+    "macd": ("line", "signal", "hist"),
+}
+DEFAULTS = {
+    "sma": (), "ema": (), "wma": (),
+    "rsi": (14,), "atr": (14,), "bbands": (20, 2.0), "donchian": (20,), "macd": (12, 26, 9),
+}
+
+
+def _window(n) -> int:
+    n = int(n)
+    if n < 1:
+        raise ValueError(f"Indicator window must be a positive integer, got {n}")
+    return n
+
+
+def _mask_warmup(a: np.ndarray, n: int) -> np.ndarray:
+    a[:min(n - 1, len(a))] = np.nan
+    return a
+
+
+def _ewm(a: np.ndarray, **kw) -> np.ndarray:
+    return pd.Series(a, copy=False).ewm(adjust=False, **kw).mean().to_numpy(copy=True)
+
+
+class IndicatorEngine:
+    """
+    close: price series or array (SMA/Bollinger/WMA treat NaN bars like pandas rolling;
+           the EMA-type indicators expect NaN-free input, so drop them first)
+    high, low: optional arrays of the same length (used by ATR and Donchian)
+    dtype: output dtype (np.float64 or np.float32); nodes are computed in float64
+    """
+
+    def __init__(self, close, high=None, low=None, dtype=np.float64):
+        self.index = getattr(close, "index", None)
+        self._inputs = {"close": np.asarray(close, dtype=np.float64).ravel()}
+        for name, arr in (("high", high), ("low", low)):
+            if arr is not None:
+                arr = np.asarray(arr, dtype=np.float64).ravel()
+                if len(arr) != len(self._inputs["close"]):
+                    raise ValueError(f"{name} has {len(arr)} bars, close has {len(self._inputs['close'])}")
+                self._inputs[name] = arr
+        self.dtype = np.dtype(dtype)
+        self._memo = {}
+        self.evaluated = []  # node keys in evaluation order (each appears once)
+
+    def __len__(self):
+        return len(self._inputs["close"])
+
+    # ---- graph evaluation ----
+    def node(self, key: tuple) -> np.ndarray:
+        """Value of a graph node (float64, memoised). Keys look like ("sma", "close", 20)."""
+        hit = self._memo.get(key)
+        if hit is None:
+            kind, *args = key
+            hit = self._memo[key] = getattr(self, f"_node_{kind}")(*args)
+            hit.setflags(write=False)  # shared by every consumer of the node
+            self.evaluated.append(key)
+        return hit
+
+    def _node_input(self, name):
+        if name not in self._inputs:
+            return self._inputs["close"]  # high/low fall back to close
+        return self._inputs[name]
+
+    def _base(self, src) -> float:
+        # cumulative sums are centred on the first value so long histories don't lose
+        # precision (same as signals.sma_matrix); NaN bars contribute 0 and are masked later
+        p = self.node(("input", src))
+        finite = p[np.isfinite(p)]
+        return float(finite[0]) if len(finite) else 0.0
+
+    def _node_cumsum(self, src):
+        p = self.node(("input", src))
+        return np.concatenate(([0.0], np.cumsum(np.nan_to_num(p - self._base(src)))))
+
+    def _node_cumsum2(self, src):
+        p = self.node(("input", src))
+        return np.concatenate(([0.0], np.cumsum(np.nan_to_num(p - self._base(src)) ** 2)))
+
+    def _node_nan_count(self, src):
+        return np.concatenate(([0], np.cumsum(np.isnan(self.node(("input", src))))))
+
+    def _mask_nan_windows(self, out, src, n):
+        """NaN wherever the window ending at a bar contains a NaN input (like pandas rolling)."""
+        nc = self.node(("nan_count", src))
+        if nc[-1]:
+            out[n - 1:][(nc[n:] - nc[:-n]) > 0] = np.nan
+        return out
+
+    def _node_sma(self, src, n):
+        p, cs = self.node(("input", src)), self.node(("cumsum", src))
+        out = np.full(len(p), np.nan)
+        if n <= len(p):
+            out[n - 1:] = (cs[n:] - cs[:-n]) / n + self._base(src)
+            self._mask_nan_windows(out, src, n)
+        return out
+
+    def _node_std(self, src, n):
+        """Rolling population std (ddof=0, the Bollinger convention) from the shared cumulative sums."""
+        p, cs, cs2 = self.node(("input", src)), self.node(("cumsum", src)), self.node(("cumsum2", src))
+        out = np.full(len(p), np.nan)
+        if n <= len(p):
+            s1, s2 = cs[n:] - cs[:-n], cs2[n:] - cs2[:-n]
+            out[n - 1:] = np.sqrt(np.maximum(s2 / n - (s1 / n) ** 2, 0.0))
+            self._mask_nan_windows(out, src, n)
+        return out
+
+    def _node_ema(self, src, n):
+        return _mask_warmup(_ewm(self.node(("input", src)), span=n), n)
+
+    def _node_wma(self, src, n):
+        p = self.node(("input", src))
+        out = np.full(len(p), np.nan)
+        if n <= len(p):
+            w = np.arange(1, n + 1, dtype=np.float64)
+            out[n - 1:] = np.lib.stride_tricks.sliding_window_view(p, n) @ (w / w.sum())
+        return out
+
+    def _node_diff(self, src):
+        p = self.node(("input", src))
+        return np.diff(p, prepend=np.nan)
+
+    def _node_rsi(self, src, n):
+        d = self.node(("diff", src))[1:]
+        out = np.full(len(d) + 1, np.nan)
+        if n < len(out):
+            gain = _ewm(np.maximum(d, 0.0), alpha=1.0 / n)
+            loss = _ewm(np.maximum(-d, 0.0), alpha=1.0 / n)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), np.where(gain > 0, 100.0, 50.0))
+            out[n:] = rsi[n - 1:]
+        return out
+
+    def _node_true_range(self):
+        h, l, c = self.node(("input", "high")), self.node(("input", "low")), self.node(("input", "close"))
+        prev = np.concatenate(([c[0]], c[:-1])) if len(c) else c
+        return np.maximum(h, prev) - np.minimum(l, prev)
+
+    def _node_atr(self, n):
+        return _mask_warmup(_ewm(self.node(("true_range",)), alpha=1.0 / n), n)
+
+    def _node_rolling_max(self, src, n):
+        return pd.Series(self.node(("input", src)), copy=False).rolling(n).max().to_numpy()
+
+    def _node_rolling_min(self, src, n):
+        return pd.Series(self.node(("input", src)), copy=False).rolling(n).min().to_numpy()
+
+    def _node_macd_line(self, fast, slow):
+        return self.node(("ema", "close", fast)) - self.node(("ema", "close", slow))
+
+    def _node_macd_signal(self, fast, slow, signal):
+        line = self.node(("macd_line", fast, slow))
+        out = np.full(len(line), np.nan)
+        start = slow - 1  # first valid MACD value
+        if start < len(line):
+            out[start:] = _mask_warmup(_ewm(line[start:], span=signal), signal)
+        return out
+
+    # ---- indicator specs -> nodes ----
+    def _resolve(self, spec) -> tuple[str, dict]:
+        """(label, {output suffix: node key}) for one indicator spec."""
+        if isinstance(spec, str):
+            spec = (spec,)
+        name, *params = spec
+        name = name.lower()
+        if name not in DEFAULTS:
+            raise ValueError(f"Unknown indicator {name!r}; expected one of {sorted(DEFAULTS)}")
+        params = list(params) + list(DEFAULTS[name][len(params):])
+        if not params:
+            raise ValueError(f"{name} needs a window length, e.g. ({name!r}, 20)")
+        label = "_".join([name, *map(str, params)])
+
+        if name in ("sma", "ema", "wma", "rsi"):
+            return label, {"": (name, "close", _window(params[0]))}
+        if name == "atr":
+            return label, {"": ("atr", _window(params[0]))}
+        if name == "bbands":
+            return label, {"upper": ("band", _window(params[0]), float(params[1])),
+                           "middle": ("sma", "close", _window(params[0])),
+                           "lower": ("band", _window(params[0]), -float(params[1]))}
+        if name == "donchian":
+            n = _window(params[0])
+            return label, {"upper": ("rolling_max", "high", n), "middle": ("channel_mid", n),
+                           "lower": ("rolling_min", "low", n)}
+        fast, slow, signal = (_window(p) for p in params)
+        if fast >= slow:
+            raise ValueError("MACD fast span must be smaller than the slow span")
+        return label, {"line": ("macd_line", fast, slow), "signal": ("macd_signal", fast, slow, signal),
+                       "hist": ("macd_hist", fast, slow, signal)}
+
+    def _node_band(self, n, k):
+        return self.node(("sma", "close", n)) + k * self.node(("std", "close", n))
+
+    def _node_channel_mid(self, n):
+        return (self.node(("rolling_max", "high", n)) + self.node(("rolling_min", "low", n))) / 2
+
+    def _node_macd_hist(self, fast, slow, signal):
+        return self.node(("macd_line", fast, slow)) - self.node(("macd_signal", fast, slow, signal))
+
+    # ---- public API ----
+    def get(self, spec):
+        """One indicator: an array, or a dict of arrays for multi-output indicators (see MULTI_OUTPUTS)."""
+        _, nodes = self._resolve(spec)
+        out = {k: self.node(key).astype(self.dtype, copy=False) for k, key in nodes.items()}
+        return out[""] if "" in out else out
+
+    def compute(self, specs) -> dict:
+        """Evaluate many indicator specs; returns {label: array} with multi-output labels suffixed (_upper, ...)."""
+        out = {}
+        for spec in specs:
+            label, nodes = self._resolve(spec)
+            for suffix, key in nodes.items():
+                out[f"{label}_{suffix}" if suffix else label] = self.node(key).astype(self.dtype, copy=False)
+        return out
+
+    def frame(self, specs) -> pd.DataFrame:
+        """compute() as a DataFrame on the input's index (if it had one)."""
+        return pd.DataFrame(self.compute(specs), index=self.index)
+
+    def series(self, spec, name=None) -> pd.Series:
+        """Single-output indicator as a Series on the input's index (handy for charts)."""
+        arr = self.get(spec)
+        if isinstance(arr, dict):
+            raise ValueError(f"{spec!r} has several outputs; use get() or frame()")
+        return pd.Series(arr, index=self.index, name=name)
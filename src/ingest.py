@@ -0,0 +1,394 @@
+# src/ingest.py
+"""
+Bulk price ingestion for universe refreshes.
+
+    python -m src.ingest universe.txt --store .trendedge/prices --batch-size 20 --workers 4 --rate 2
+
+Symbols are grouped into batches (one request each) and fetched by a bounded
+thread pool. Every request first takes a token from its host's rate limiter;
+retryable failures (TransientError: HTTP 5xx, timeouts) back off exponentially
+with jitter, and a rate-limit response (429 + Retry-After) pauses and slows the
+whole host rather than just the batch that hit it.
+Each finished batch is written straight into the PriceStore and recorded in
+an optional progress file, so an interrupted run resumes where it stopped.
+Symbols already in the store request bars from their last stored one on; if
+that bar has changed upstream (re-adjusted history) the symbol is downloaded
+again in full. An explicit start merges the fetched range into the stored
+history (backfilling earlier bars), and a non-incremental run replaces it.
+
+A source is any callable `source(symbols, start, end) -> {symbol: (df, err)}`
+with a `host` attribute naming its rate-limit bucket: YahooSource, HTTPSource
+(CSV over HTTP; see benchmarks/fake_price_server.py for a local stand-in) or
+PerSymbolSource wrapping a single-symbol loader such as store.CSVSource.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from src.data import clean_prices, download_many
+from src.store import PriceStore, same_bar
+
+STATUS_COLUMNS = ["symbol", "status", "bars", "attempts", "error"]
+
+
+class TransientError(Exception):
+    """A failure worth retrying (rate limited, timeout, server error)."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket: `rate` requests per second on average, bursts of up to `burst`. Thread-safe.
+    throttle() backs the whole host off after a rate-limit response (pause, then half the
+    rate); each success via recover() adds back a tenth of the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._clock, self._sleep = clock, sleep
+        self._tokens = float(self.burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns the seconds waited."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._last) * self.rate)
+            self._last = max(now, self._last)
+            self._tokens -= 1.0
+            wait = (self._last - now) + (-self._tokens / self.rate if self._tokens < 0 else 0.0)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def throttle(self, pause: float = 0.0):
+        """Server said slow down: nobody goes for `pause` seconds, then at half the current rate."""
+        with self._lock:
+            now = self._clock()
+            if self._last <= now:  # concurrent 429s from one pause window only halve the rate once
+                self.rate = max(self.rate / 2, self.max_rate / 64)
+            self._tokens = min(self._tokens, 0.0)
+            self._last = max(self._last, now + pause)
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+# ------------------ sources ------------------
+class YahooSource:
+    """Batched Yahoo Finance downloads (one yfinance request per batch)."""
+
+    host = "query1.finance.yahoo.com"
+
+    def __call__(self, symbols, start=None, end=None):
+        try:
+            return download_many(symbols, start, end)
+        except Exception as e:  # yfinance surfaces throttling/network issues as assorted exceptions
+            limited = "RateLimit" in type(e).__name__  # YFRateLimitError in recent yfinance
+            raise TransientError(f"{type(e).__name__}: {e}", 5.0 if limited else None) from e
+
+
+class HTTPSource:
+    """
+    GET `{url}?symbols=A,B&start=YYYY-MM-DD&end=YYYY-MM-DD` returning long-format CSV
+    with columns Date, Symbol and any of Open/High/Low/Close/Adj Close/Volume.
+    429 and 5xx responses, timeouts and connection errors are retryable.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        self.host = urllib.parse.urlparse(url).netloc
+
+    def __call__(self, symbols, start=None, end=None):
+        query = {"symbols": ",".join(symbols)}
+        if start:
+            query["start"] = str(start)
+        if end:
+            query["end"] = str(end)
+        try:
+            with urllib.request.urlopen(f"{self.url}?{urllib.parse.urlencode(query)}", timeout=self.timeout) as resp:
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                retry = e.headers.get("Retry-After") if e.headers else None
+                retry = float(retry) if retry else (0.0 if e.code == 429 else None)
+                raise TransientError(f"HTTP {e.code}", retry) from e
+            return {s: (pd.DataFrame(), f"HTTP {e.code}: {e.reason}") for s in symbols}
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise TransientError(f"{type(e).__name__}: {e}") from e
+
+        df = pd.read_csv(io.BytesIO(body), parse_dates=["Date"]) if body.strip() else pd.DataFrame()
+        groups = dict(tuple(df.groupby("Symbol"))) if not df.empty else {}
+        out = {}
+        for sym in symbols:
+            part = groups.get(sym)
+            if part is None:
+                out[sym] = (pd.DataFrame(), "No data returned.")
+            else:
+                out[sym] = clean_prices(part.drop(columns="Symbol").set_index("Date").sort_index())
+        return out
+
+
+class PerSymbolSource:
+    """Adapt a single-symbol loader `fn(symbol, start, end) -> (df, err)` to the batched interface."""
+
+    def __init__(self, fn, host: str = "local"):
+        self.fn = fn
+        self.host = host
+
+    def __call__(self, symbols, start=None, end=None):
+        return {s: self.fn(s, start, end) for s in symbols}
+
+
+# ------------------ downloader ------------------
+class BulkDownloader:
+    """
+    store: PriceStore receiving the bars
+    source: batched source (default YahooSource)
+    batch_size: symbols per request
+    workers: concurrent requests (thread pool size)
+    rate, burst: per-host request rate limit (requests/second, burst size)
+    max_retries, backoff, max_backoff: exponential backoff on TransientError (seconds)
+    progress_path: optional JSON file recording finished symbols, for resuming
+    """
+
+    def __init__(self, store: PriceStore, source=None, batch_size: int = 20, workers: int = 4,
+                 rate: float = 2.0, burst: int = 2, max_retries: int = 4, backoff: float = 1.0,
+                 max_backoff: float = 30.0, progress_path=None, sleep=time.sleep):
+        self.store = store
+        self.source = source or YahooSource()
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self.rate, self.burst = rate, burst
+        self.max_retries, self.backoff, self.max_backoff = max_retries, backoff, max_backoff
+        self.progress_path = Path(progress_path) if progress_path else None
+        self._sleep = sleep
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, host: str) -> RateLimiter:
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.rate, self.burst, sleep=self._sleep)
+            return self._limiters[host]
+
+    # ---- progress ----
+    def _load_progress(self, run_key: str) -> dict:
+        if self.progress_path is None:
+            return {}
+        try:
+            with open(self.progress_path, encoding="utf-8") as fh:
+                doc = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return doc.get("done", {}) if doc.get("run") == run_key else {}
+
+    def _save_progress(self, run_key: str, done: dict):
+        if self.progress_path is None:
+            return
+        self.progress_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.progress_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"run": run_key, "done": done}, fh)
+        os.replace(tmp, self.progress_path)
+
+    # ---- fetching ----
+    def _fetch(self, batch, start, end):
+        """One batch with rate limiting and retries. Returns ({symbol: (df, err)}, attempts, seconds_waited)."""
+        limiter = self._limiter(getattr(self.source, "host", "default"))
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += limiter.acquire()
+            try:
+                out = self.source(batch, start, end)
+                limiter.recover()
+                return out, attempt + 1, waited
+            except TransientError as e:
+                if attempt == self.max_retries:
+                    msg = f"gave up after {attempt + 1} attempts: {e}"
+                    return {s: (pd.DataFrame(), msg) for s in batch}, attempt + 1, waited
+                if e.retry_after is not None:
+                    limiter.throttle(e.retry_after)  # rate limited: the whole host backs off
+                    continue
+                # exponential backoff with jitter, so failed batches don't retry in lockstep
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+                self._sleep(delay)
+                waited += delay
+
+    def _store_batch(self, results: dict, start, mode: str = "new", end=None) -> list[dict]:
+        """
+        mode: "new" (request started at the stored last bar: append newer bars, or reload
+              the symbol if that bar changed upstream), "merge" (explicit range: merge it in,
+              fetched bars win) or "replace" (full history: overwrite)
+        """
+        rows, now = [], time.time()
+        for sym, (df, err) in results.items():
+            stored = self.store.meta(sym)
+            if err or df.empty:
+                if stored and start is not None:
+                    # incremental request with nothing new (or a transient gap): keep what we have
+                    self.store.touch(sym, now)
+                    rows.append({"symbol": sym, "status": "ok", "bars": 0, "error": None})
+                else:
+                    rows.append({"symbol": sym, "status": "failed", "bars": 0, "error": err or "No data returned."})
+                continue
+            last = pd.Timestamp(stored["last_bar"]) if stored and stored.get("last_bar") else None
+            sym_mode = mode
+            if sym_mode == "new" and last is not None and last in df.index \
+                    and not same_bar(self.store.read(sym).loc[[last]].iloc[-1], df.loc[[last]].iloc[-1]):
+                # stored bars are on an old basis (split / dividend re-adjustment): reload in full
+                full, _, _ = self._fetch([sym], None, end)
+                df, err = full.get(sym, (pd.DataFrame(), "No data returned."))
+                if err or df.empty:
+                    rows.append({"symbol": sym, "status": "failed", "bars": 0, "error": err or "No data returned."})
+                    continue
+                sym_mode = "replace"  # this symbol only; the rest of the batch stays incremental
+            if sym_mode == "new" and last is not None:
+                df = df[df.index > last]
+                if df.empty:
+                    self.store.touch(sym, now)
+                else:
+                    self.store.append(sym, df, checked_at=now)
+            elif sym_mode == "merge" and stored:
+                self.store.append(sym, df, checked_at=now)
+            else:
+                self.store.write(sym, df, checked_at=now)
+            rows.append({"symbol": sym, "status": "ok", "bars": len(df), "error": None})
+        return rows
+
+    def _fetch_and_store(self, batch, start, end, mode="new"):
+        # runs on the worker: each symbol owns its files, so batches can be written concurrently
+        results, attempts, _ = self._fetch(batch, start, end)
+        return self._store_batch(results, start, mode, end), attempts
+
+    def _plan(self, symbols, start, end, incremental: bool):
+        """Batches of symbols that share a request start date and store mode (see _store_batch)."""
+        by_start = {}
+        for sym in symbols:
+            s, mode = start, "merge" if start is not None else "replace"
+            meta = self.store.meta(sym) if incremental and start is None else None
+            if meta and meta.get("last_bar"):
+                # from the last stored bar inclusive, so _store_batch can check it still matches
+                s, mode = pd.Timestamp(meta["last_bar"]).date(), "new"
+            by_start.setdefault((s, mode), []).append(sym)
+        return [(s, mode, group[i:i + self.batch_size])
+                for (s, mode), group in by_start.items() for i in range(0, len(group), self.batch_size)]
+
+    def run(self, symbols, start=None, end=None, incremental: bool = True, progress=None):
+        """
+        Download `symbols` into the store.
+        incremental: for symbols already stored (and no explicit start), fetch only newer bars;
+                     otherwise the fetched range replaces (no start) or is merged into (start)
+                     the stored history
+        progress: optional callback(done_symbols, total_symbols) after each batch
+        Returns (status, summary): one status row per symbol (STATUS_COLUMNS) and a dict with
+        symbols, ok, failed, resumed, bars, requests, attempts, seconds, symbols_per_s, bars_per_s.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        run_key = hashlib.blake2b(repr((symbols, str(start), str(end))).encode(), digest_size=8).hexdigest()
+        done = self._load_progress(run_key)
+        resumed = [s for s in symbols if done.get(s, {}).get("status") == "ok"]
+        todo = [s for s in symbols if s not in set(resumed)]
+
+        t0 = time.perf_counter()
+        rows, requests, attempts = [], 0, 0
+        plan = self._plan(todo, start, end, incremental)
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            futures = [ex.submit(self._fetch_and_store, batch, s, end, mode) for s, mode, batch in plan]
+            for fut in as_completed(futures):
+                batch_rows, n_attempts = fut.result()
+                requests += 1
+                attempts += n_attempts
+                for r in batch_rows:
+                    r["attempts"] = n_attempts
+                    done[r["symbol"]] = {"status": r["status"], "bars": r["bars"]}
+                rows.extend(batch_rows)
+                self._save_progress(run_key, done)
+                if progress:
+                    progress(len(rows) + len(resumed), len(symbols))
+        secs = time.perf_counter() - t0
+
+        rows += [{"symbol": s, "status": "resumed", "bars": done[s].get("bars", 0), "attempts": 0, "error": None}
+                 for s in resumed]
+        status = pd.DataFrame(rows, columns=STATUS_COLUMNS)
+        ok = int((status["status"] == "ok").sum())
+        bars = int(status.loc[status["status"] == "ok", "bars"].sum())
+        summary = {
+            "symbols": len(symbols), "ok": ok, "failed": int((status["status"] == "failed").sum()),
+            "resumed": len(resumed), "bars": bars, "requests": requests, "attempts": attempts,
+            "seconds": secs,
+            "symbols_per_s": ok / secs if secs > 0 else float("nan"),
+            "bars_per_s": bars / secs if secs > 0 else float("nan"),
+        }
+        return status, summary
+
+
+def make_source(spec: str):
+    """'yahoo', an http(s) URL (HTTPSource) or a directory of <SYMBOL>.csv files."""
+    if spec == "yahoo":
+        return YahooSource()
+    if spec.startswith(("http://", "https://")):
+        return HTTPSource(spec)
+    from src.store import CSVSource
+    return PerSymbolSource(CSVSource(spec), host=f"file:{spec}")
+
+
+def main(argv=None):
+    from src.batch import read_universe
+
+    ap = argparse.ArgumentParser(prog="python -m src.ingest", description="Bulk-download a universe into the price store.")
+    ap.add_argument("universe", help="text file with one ticker per line")
+    ap.add_argument("--store", default=None, help="price store directory (default: TRENDEDGE_DATA_DIR or .trendedge/prices)")
+    ap.add_argument("--source", default="yahoo", help="'yahoo', an http(s) URL, or a directory of CSV files")
+    ap.add_argument("--start", default=None, help="YYYY-MM-DD (default: max history, or only new bars if stored)")
+    ap.add_argument("--end", default=None, help="YYYY-MM-DD (default: today)")
+    ap.add_argument("--batch-size", type=int, default=20, help="symbols per request")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent requests")
+    ap.add_argument("--rate", type=float, default=2.0, help="requests per second per host")
+    ap.add_argument("--retries", type=int, default=4, help="retries per batch on rate limits / server errors")
+    ap.add_argument("--progress", default=None, help="progress file; rerun with the same file to resume")
+    ap.add_argument("--full", action="store_true", help="re-download full history even for stored symbols")
+    args = ap.parse_args(argv)
+
+    store = PriceStore(args.store) if args.store else PriceStore()
+    dl = BulkDownloader(store, make_source(args.source), batch_size=args.batch_size, workers=args.workers,
+                        rate=args.rate, max_retries=args.retries, progress_path=args.progress)
+    symbols = read_universe(args.universe)
+
+    def report(n, total):
+        print(f"\r{n}/{total} symbols", end="", file=sys.stderr, flush=True)
+
+    status, s = dl.run(symbols, args.start, args.end, incremental=not args.full, progress=report)
+    print(file=sys.stderr)
+    print(f"{s['ok']} ok, {s['failed']} failed, {s['resumed']} resumed from progress file; "
+          f"{s['bars']:,} bars in {s['requests']} requests ({s['attempts']} attempts) over {s['seconds']:.1f}s "
+          f"-> {s['symbols_per_s']:.1f} symbols/s, {s['bars_per_s']:,.0f} bars/s", file=sys.stderr)
+    failed = status[status["status"] == "failed"]
+    if not failed.empty:
+        print(failed.to_string(index=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+# src/intraday.py
+"""
+Intraday bars: a memory-mapped minute store, OHLCV resampling and streaming backtests.
+
+    store = MinuteStore()
+    store.ingest("ES", "es_minutes_2015_2024.parquet", tz="America/New_York")
+    store.bars("ES", "5min", start="2023-01-01")       # DataFrame like PriceStore.read
+    stream_backtest(store, "ES", 20, 50, rule="1h")    # metrics without loading the bars
+
+    python -m src.intraday ES es_minutes_*.parquet --tz America/New_York --bars 5min 1h 1D
+
+Each symbol is a directory of flat column files (ts int64 nanoseconds, OHLC
+float32, volume float64) plus a JSON sidecar with the row count. Columns are
+opened with np.memmap, so reading a date range is a binary search on the
+timestamps and a slice, and only the pages actually touched are read; a
+100M-row history costs nothing until it is used. Ingestion streams Parquet
+(batch by batch), Arrow IPC, raw binary records (np.memmap with a structured
+dtype) or CSV (in chunks) into those files, appending only bars after the
+last stored one, so re-running an ingest over overlapping files is harmless.
+
+resample_ohlcv() buckets bars into fixed-size bars (5min, 1h, 1D, ...) with
+one vectorised pass: bucket starts via a diff of the bucket ids, then first /
+np.maximum.reduceat / np.minimum.reduceat / last / np.add.reduceat. Bars are
+labelled by their bucket start, like DataFrame.resample. Aggregates are built
+chunk by chunk and saved under the symbol's directory (agg/<bar size>), then
+extended incrementally when minutes are appended.
+
+stream_backtest() runs the MA strategy over the mapped columns a chunk at a
+time, carrying the few bars of history the moving averages and volatility
+sizing need, and scores it with src.metrics.MetricsAccumulator annualised by
+src.metrics.bars_per_year - memory is bounded by the chunk size, not the
+history.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.costs import CostModel, target_positions
+from src.metrics import MetricsAccumulator, bars_per_year
+from src.signals import sma_matrix
+
+DEFAULT_MINUTE_DIR = os.environ.get("TRENDEDGE_MINUTE_DIR", ".trendedge/minutes")
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+FIELD_DTYPES = {"ts": np.int64, "open": np.float32, "high": np.float32, "low": np.float32,
+                "close": np.float32, "volume": np.float64}
+# DataFrame column for each field (matches src.data.PRICE_COLUMNS)
+FIELD_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+_TS_NAMES = ("ts", "timestamp", "time", "datetime", "date")
+
+
+def bar_ns(rule) -> int:
+    """Bar size in nanoseconds from a pandas-style rule ("5min", "1h", "1D") or a Timedelta."""
+    try:
+        step = pd.Timedelta(rule if not isinstance(rule, str) or rule[:1].isdigit() else "1" + rule)
+    except (ValueError, TypeError):
+        raise ValueError(f"Bar size must be a fixed interval like '5min', '1h' or '1D', got {rule!r}") from None
+    if step <= pd.Timedelta(0):
+        raise ValueError(f"Bar size must be positive, got {rule!r}")
+    return int(step.value)
+
+
+def resample_ohlcv(cols: dict, rule) -> dict:
+    """
+    Aggregate bars into fixed-size bars labelled by their start (UTC-epoch aligned, like
+    DataFrame.resample; "1D" buckets are calendar days of the stored clock).
+    cols: {"ts": int64 ns (sorted), and any of "open", "high", "low", "close", "volume"}
+    rule: bar size (see bar_ns)
+    Returns a dict with the same keys, one row per non-empty bar.
+    """
+    step = bar_ns(rule)
+    ts = np.asarray(cols["ts"], dtype=np.int64)
+    bucket = ts // step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(ts) else np.zeros(0, dtype=np.int64)
+    last = np.r_[starts[1:], len(ts)] - 1
+    out = {"ts": bucket[starts] * step}
+    empty = len(starts) == 0
+    for f in BAR_FIELDS:
+        if f not in cols:
+            continue
+        x = np.asarray(cols[f])
+        if f == "open":
+            out[f] = x[starts]
+        elif f == "close":
+            out[f] = x[last]
+        elif f == "high":
+            out[f] = x[:0] if empty else np.maximum.reduceat(x, starts)
+        elif f == "low":
+            out[f] = x[:0] if empty else np.minimum.reduceat(x, starts)
+        else:
+            out[f] = x[:0].astype(np.float64) if empty else np.add.reduceat(x, starts, dtype=np.float64)
+    return out
+
+
+def _to_ns(values, tz=None) -> np.ndarray:
+    """int64 nanoseconds on a naive clock: aware timestamps converted to `tz` (default UTC)."""
+    idx = pd.DatetimeIndex(pd.to_datetime(values))
+    if idx.tz is not None:
+        idx = idx.tz_convert(tz or "UTC").tz_localize(None)
+    return idx.as_unit("ns").asi8
+
+
+def _frame_columns(df: pd.DataFrame, tz=None) -> dict:
+    """{"ts", fields...} arrays from a frame with a DatetimeIndex or a timestamp column (any case)."""
+    lower = {str(c).lower().replace(" ", "_"): c for c in df.columns}
+    ts_col = next((lower[n] for n in _TS_NAMES if n in lower), None)
+    ts = _to_ns(df[ts_col] if ts_col is not None else df.index, tz)
+    cols = {"ts": ts}
+    for f in BAR_FIELDS:
+        c = lower.get(f, lower.get("adj_close") if f == "close" else None)
+        if c is not None:
+            cols[f] = df[c].to_numpy(dtype=FIELD_DTYPES[f])
+    if "close" not in cols:
+        raise ValueError(f"No close column among {list(df.columns)}")
+    return cols
+
+
+class _Series:
+    """One set of column files + sidecar (a symbol's minutes, or one of its aggregates)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def meta(self) -> dict:
+        try:
+            with open(self.path / "meta.json", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"rows": 0}
+
+    def write_meta(self, meta: dict):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f"meta.json.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self.path / "meta.json")
+
+    def columns(self, fields=None, meta=None) -> dict:
+        """Read-only memmaps of the stored columns (only the first meta["rows"] rows count)."""
+        meta = self.meta() if meta is None else meta
+        rows = meta["rows"]
+        out = {}
+        for f in ("ts",) + tuple(meta.get("fields", ())):
+            if fields is not None and f != "ts" and f not in fields:
+                continue
+            dtype = FIELD_DTYPES[f]
+            out[f] = np.memmap(self.path / f"{f}.bin", dtype=dtype, mode="r", shape=(rows,)) if rows \
+                else np.zeros(0, dtype=dtype)
+        return out
+
+    def append(self, cols: dict, meta: dict | None = None, **extra) -> dict:
+        """Append rows (same fields as already stored); the sidecar is written last, so a crash loses only the new rows."""
+        meta = self.meta() if meta is None else meta
+        rows = meta["rows"]
+        fields = tuple(meta.get("fields") or [f for f in BAR_FIELDS if f in cols])
+        missing = [f for f in fields if f not in cols]
+        if missing:
+            raise ValueError(f"Missing columns {missing}; this series stores {list(fields)}")
+        self.path.mkdir(parents=True, exist_ok=True)
+        n = len(cols["ts"])
+        for f in ("ts",) + fields:
+            path = self.path / f"{f}.bin"
+            with open(path, "ab") as fh:
+                fh.truncate(rows * np.dtype(FIELD_DTYPES[f]).itemsize)  # drop leftovers of an interrupted write
+                np.ascontiguousarray(cols[f][:n], dtype=FIELD_DTYPES[f]).tofile(fh)
+        meta = dict(meta, rows=rows + n, fields=list(fields), **extra)
+        if n:
+            meta.setdefault("first", int(cols["ts"][0]))
+            meta["last"] = int(cols["ts"][-1])
+        self.write_meta(meta)
+        return meta
+
+    def truncate(self, rows: int, meta: dict | None = None) -> dict:
+        meta = dict(self.meta() if meta is None else meta)
+        if rows < meta["rows"]:
+            meta["rows"] = rows
+            if rows:
+                meta["last"] = int(np.memmap(self.path / "ts.bin", dtype=np.int64, mode="r", shape=(rows,))[-1])
+            else:
+                meta.pop("first", None)
+                meta.pop("last", None)
+            self.write_meta(meta)
+        return meta
+
+    def delete(self):
+        for f in ("ts",) + BAR_FIELDS:
+            (self.path / f"{f}.bin").unlink(missing_ok=True)
+        (self.path / "meta.json").unlink(missing_ok=True)
+
+
+class MinuteStore:
+    """
+    root: directory holding one sub-directory per symbol (created on first write)
+    Aggregates for each bar size are cached under <root>/<SYMBOL>/agg/ and kept in step
+    with the minutes automatically.
+    """
+
+    def __init__(self, root=DEFAULT_MINUTE_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    # ---- paths / metadata ----
+    def _series(self, symbol: str) -> _Series:
+        return _Series(self.root / re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper()))
+
+    def _agg(self, symbol: str, step: int) -> _Series:
+        return _Series(self._series(symbol).path / "agg" / f"{step // 10**9}s")
+
+    def meta(self, symbol: str) -> dict | None:
+        """Sidecar metadata: symbol, rows, fields, first / last bar (ns) and a generation counter."""
+        meta = self._series(symbol).meta()
+        return meta if meta["rows"] else None
+
+    def has(self, symbol: str) -> bool:
+        return self.meta(symbol) is not None
+
+    def symbols(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(m["symbol"] for m in (_Series(p).meta() for p in self.root.iterdir() if p.is_dir())
+                      if m.get("rows"))
+
+    # ---- write ----
+    def append(self, symbol: str, data, tz=None) -> int:
+        """
+        Append bars after the last stored one (earlier or duplicate timestamps are skipped).
+        data: DataFrame with a DatetimeIndex or timestamp column and OHLCV columns (any case;
+              only close is required), or a dict of arrays like resample_ohlcv's
+        tz: clock to store aware timestamps in (e.g. "America/New_York"); default UTC
+        Returns the number of rows added.
+        """
+        cols = _frame_columns(data, tz) if isinstance(data, pd.DataFrame) else \
+            {k: np.asarray(v) for k, v in data.items()}
+        ts = cols["ts"] = np.asarray(cols["ts"], dtype=np.int64)
+        if len(ts) > 1 and (np.diff(ts) <= 0).any():
+            order = np.argsort(ts, kind="stable")
+            keep = np.r_[ts[order][1:] != ts[order][:-1], True]  # last of each duplicate timestamp
+            cols = {k: v[order][keep] for k, v in cols.items()}
+        with self._lock:
+            series = self._series(symbol)
+            meta = series.meta()
+            if meta["rows"]:
+                new = cols["ts"] > meta["last"]
+                if not new.all():
+                    cols = {k: v[new] for k, v in cols.items()}
+            if not len(cols["ts"]):
+                return 0
+            series.append(cols, meta, symbol=symbol.upper(), generation=meta.get("generation", 0))
+            return len(cols["ts"])
+
+    def ingest(self, symbol: str, path, tz=None, dtype=None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+        """
+        Stream a local minute file into the store without reading it whole.
+        path: .parquet / .pq (read batch by batch from a memory map), .arrow / .feather / .ipc
+              (memory-mapped), .csv (chunked) or raw binary records (.bin / .dat / .npy)
+        dtype: numpy structured dtype of the records in a raw binary file, e.g.
+               [("ts", "<i8"), ("open", "<f4"), ..., ("volume", "<f8")]; .npy carries its own
+        Returns the number of rows added.
+        """
+        added = 0
+        for df in _iter_minute_file(path, dtype, chunk_rows):
+            added += self.append(symbol, df, tz)
+        return added
+
+    def delete(self, symbol: str):
+        """Remove a symbol's minutes and cached aggregates."""
+        with self._lock:
+            series = self._series(symbol)
+            generation = series.meta().get("generation", 0)
+            agg = series.path / "agg"
+            if agg.exists():
+                for p in agg.iterdir():
+                    _Series(p).delete()
+            series.delete()
+            if generation:  # re-ingested data must not match aggregates built from the old one
+                series.write_meta({"rows": 0, "symbol": symbol.upper(), "generation": generation + 1})
+
+    # ---- read ----
+    def columns(self, symbol: str, rule=None, fields=None, start=None, end=None) -> dict:
+        """
+        Memory-mapped columns {"ts", fields...} for start <= ts < end (no data is read until used).
+        rule: bar size; None for the stored minutes, else the cached aggregate (built / extended first)
+        """
+        series = self._series(symbol) if rule is None else self.aggregate(symbol, rule)
+        cols = series.columns(fields)
+        a, b = _range(cols["ts"], start, end)
+        return {k: v[a:b] for k, v in cols.items()}
+
+    def bars(self, symbol: str, rule=None, start=None, end=None) -> pd.DataFrame:
+        """
+        Bars as a DataFrame (Open, High, Low, Close, Volume; DatetimeIndex "Date").
+        rule: bar size like "5min", "1h", "1D"; None returns the stored minutes, which for
+              a long history should be limited with start / end
+        """
+        cols = self.columns(symbol, rule, start=start, end=end)
+        idx = pd.DatetimeIndex(np.asarray(cols.pop("ts")).view("datetime64[ns]"), name="Date")
+        return pd.DataFrame({FIELD_COLUMNS[f]: np.asarray(v, dtype=np.float64) for f, v in cols.items()}, index=idx)
+
+    def get(self, symbol: str, rule=None, start=None, end=None) -> tuple[pd.DataFrame, str | None]:
+        """bars() with PriceStore.get's (DataFrame, error) contract, for the app."""
+        if not self.has(symbol):
+            return pd.DataFrame(), f"No minute bars stored for {symbol.upper()}."
+        try:
+            df = self.bars(symbol, rule, start, end)
+        except Exception as e:
+            return pd.DataFrame(), f"{type(e).__name__}: {e}"
+        if df.empty:
+            return pd.DataFrame(), "No stored bars in the requested date range."
+        return df, None
+
+    # ---- aggregates ----
+    def aggregate(self, symbol: str, rule, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> _Series:
+        """
+        The cached `rule` bars of symbol, brought up to date with the stored minutes: new
+        minutes extend it from the last (possibly partial) bar on; a deleted and re-ingested
+        symbol rebuilds it. Returns the aggregate's series (see columns()).
+        """
+        step = bar_ns(rule)
+        with self._lock:
+            src = self._series(symbol)
+            src_meta = src.meta()
+            if not src_meta["rows"]:
+                raise KeyError(f"No minute bars stored for {symbol.upper()}")
+            agg = self._agg(symbol, step)
+            meta = agg.meta()
+            if meta.get("generation") != src_meta.get("generation", 0) or meta.get("source_rows", 0) > src_meta["rows"]:
+                agg.delete()
+                meta = {"rows": 0}
+            if meta.get("source_rows") == src_meta["rows"]:
+                return agg
+
+            cols = src.columns(meta=src_meta)
+            a = 0
+            if meta["rows"]:
+                # the last bar may have been partial: drop it and rebuild from its first minute
+                last = int(agg.columns(("close",), meta)["ts"][-1])
+                meta = agg.truncate(meta["rows"] - 1, meta)
+                a = int(np.searchsorted(cols["ts"], last, "left"))
+            extra = dict(symbol=symbol.upper(), step=step, generation=src_meta.get("generation", 0))
+            for piece in _aggregate_chunks(cols, a, src_meta["rows"], step, chunk_rows):
+                meta = agg.append(piece, dict(meta, fields=src_meta["fields"]), **extra)
+            agg.write_meta(dict(meta, source_rows=src_meta["rows"], **extra))
+            return agg
+
+    def clear_aggregates(self, symbol: str | None = None):
+        """Delete cached aggregates (all symbols, or one); they are rebuilt on the next read."""
+        dirs = [self._series(symbol).path] if symbol else [p for p in self.root.glob("*") if p.is_dir()]
+        with self._lock:
+            for d in dirs:
+                if (d / "agg").exists():
+                    for p in (d / "agg").iterdir():
+                        _Series(p).delete()
+
+
+def _range(ts, start=None, end=None) -> tuple[int, int]:
+    """Row range [a, b) of start <= ts < end by binary search on the (mapped) timestamps."""
+    a = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).as_unit("ns").value, "left"))
+    b = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).as_unit("ns").value, "left"))
+    return a, max(a, b)
+
+
+def _aggregate_chunks(cols: dict, a: int, b: int, step: int, chunk_rows: int):
+    """resample_ohlcv over rows [a, b) about chunk_rows at a time, never splitting a bar across chunks."""
+    ts = cols["ts"]
+    while a < b:
+        j = min(a + chunk_rows, b)
+        if j < b:
+            # cut at the start of the bar holding row j; if one bar spans the whole chunk, take all of it
+            edge = ts[j] // step * step
+            cut = a + int(np.searchsorted(ts[a:b], edge, "left"))
+            j = cut if cut > a else a + int(np.searchsorted(ts[a:b], edge + step, "left"))
+        yield resample_ohlcv({k: v[a:j] for k, v in cols.items()}, step)
+        a = j
+
+
+def _iter_minute_file(path, dtype=None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """DataFrame chunks of a local minute file (see MinuteStore.ingest)."""
+    p = str(path).lower()
+    if p.endswith((".parquet", ".pq", ".arrow", ".feather", ".ipc")):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        source = pa.memory_map(str(path))
+        if p.endswith((".parquet", ".pq")):
+            batches = pq.ParquetFile(source).iter_batches(batch_size=chunk_rows)
+        else:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            for a in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(a, chunk_rows).to_pandas()
+        return
+    if p.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    if p.endswith(".npy"):
+        records = np.load(path, mmap_mode="r")
+    else:
+        if dtype is None:
+            raise ValueError(f"Raw binary file {path!r} needs the record dtype (e.g. [('ts', '<i8'), ('close', '<f4')])")
+        records = np.memmap(path, dtype=np.dtype(dtype), mode="r")
+    if records.dtype.names is None:
+        raise ValueError(f"{path!r} doesn't hold structured records")
+    for a in range(0, len(records), chunk_rows):
+        chunk = records[a:a + chunk_rows]
+        cols = {n: np.asarray(chunk[n]) for n in records.dtype.names}
+        ts_name = next(n for n in records.dtype.names if n.lower() in _TS_NAMES)
+        if cols[ts_name].dtype.kind in "iu":
+            cols[ts_name] = cols[ts_name].astype("datetime64[ns]")
+        yield pd.DataFrame(cols)
+
+
+def stream_backtest(store: MinuteStore, symbol: str, fast: int, slow: int, rule=None, start=None, end=None,
+                    costs: CostModel | None = None, periods_per_year=None, rf: float = 0.0,
+                    chunk_rows: int = 250_000, max_points: int = 5_000) -> dict:
+    """
+    MA crossover backtest over stored bars, streamed a chunk at a time.
+    rule: bar size to trade (cached aggregate), None for the stored minutes
+    costs: optional CostModel, applied like src.costs.apply_costs
+    periods_per_year: annualisation; default src.metrics.bars_per_year of the bars' timestamps
+    max_points: equity curves are returned thinned to about this many bars
+    Same numbers as run_backtest(ma_signals(...)) + compute_all_metrics(positions=...) on the
+    whole series (up to float rounding), with memory bounded by chunk_rows.
+    Returns {"metrics": DataFrame (METRIC_COLUMNS; rows strategy, buyhold),
+             "equity": DataFrame (eq_strategy, eq_buyhold) thinned,
+             "bars": int, "periods_per_year": float}
+    """
+    fast, slow = int(fast), int(slow)
+    cols = store.columns(symbol, rule, fields=("close",), start=start, end=end)
+    ts, close = cols["ts"], cols["close"]
+    n = len(ts)
+    ppy = bars_per_year(ts) if periods_per_year is None else periods_per_year
+    acc = MetricsAccumulator(2, ppy, rf)
+    warm = max(fast, slow, costs.vol_lookback if costs is not None and costs.sizing != "fixed" else 0) + 1
+    every = max(1, -(-n // max_points))
+    rate = (float(costs.bps) + float(costs.spread_bps) / 2) / 1e4 if costs is not None else 0.0
+    fee = float(costs.fixed_fee) / float(costs.capital) if costs is not None and costs.has_fixed_fee else 0.0
+
+    eq = np.ones(2)  # strategy, buy & hold equity at the previous bar
+    kept_i, kept_eq = [], []
+    for a in range(0, n, chunk_rows):
+        b = min(a + chunk_rows, n)
+        w0 = max(0, a - warm)  # window = warm-up history + this chunk
+        p = np.asarray(close[w0:b], dtype=np.float64)
+        r = np.zeros(len(p))
+        r[1:] = p[1:] / p[:-1] - 1.0
+        with np.errstate(invalid="ignore"):
+            sma = sma_matrix(p, [fast, slow])
+            sig = (sma[0] > sma[1]).astype(np.float64)
+        target = sig if costs is None else target_positions(sig, r, costs, ppy)
+        pos = np.zeros(len(p))
+        pos[1:] = target[:-1]
+        turnover = np.abs(np.diff(pos, prepend=0.0))
+        h = a - w0  # rows of warm-up history in the window
+        pos, turnover, r = pos[h:], turnover[h:], r[h:]
+        if a == 0 and len(r):
+            r[0] = 0.0
+        net = pos * r - turnover * rate
+
+        growth = np.cumprod(1.0 + net)
+        if fee:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                e_st = growth * (eq[0] - np.cumsum(np.where(turnover > 0, fee / growth, 0.0)))
+        else:
+            e_st = growth * eq[0]
+        e_bh = np.cumprod(1.0 + r) * eq[1]
+        E = np.vstack((e_st, e_bh)).T  # (bars, 2) views of contiguous rows, as the accumulator wants them
+        R = np.empty_like(E.T).T
+        R[0] = E[0] / eq - 1.0
+        R[1:] = E[1:] / E[:-1] - 1.0
+        acc.update(R, E, np.vstack((pos, np.ones(len(pos)))).T)
+        eq = E[-1]
+
+        first = -(-a // every) * every  # next multiple of `every` at or after a
+        kept_i.append(np.arange(first, b, every))
+        kept_eq.append(E[first - a::every].copy())  # a view would keep the whole chunk alive
+        if b == n and not (kept_i[-1].size and kept_i[-1][-1] == b - 1):
+            kept_i.append(np.array([b - 1]))
+            kept_eq.append(E[-1:].copy())
+
+    metrics = acc.result(names=["strategy", "buyhold"])
+    for c in ["dd_start", "dd_end", "dd_recovery"]:
+        metrics[c] = [pd.Timestamp(int(ts[i])) if i >= 0 else None for i in metrics[c]]
+    at = np.concatenate(kept_i) if kept_i else np.zeros(0, dtype=np.int64)
+    curves = np.concatenate(kept_eq) if kept_eq else np.zeros((0, 2))
+    equity = pd.DataFrame(curves, columns=["eq_strategy", "eq_buyhold"],
+                          index=pd.DatetimeIndex(np.asarray(ts[at]).view("datetime64[ns]"), name="Date"))
+    return {"metrics": metrics, "equity": equity, "bars": n, "periods_per_year": ppy}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.intraday",
+                                 description="Ingest local minute files into the minute store and pre-build bar sizes.")
+    ap.add_argument("symbol")
+    ap.add_argument("files", nargs="+", help=".parquet, .arrow, .csv, .npy or raw binary (.bin/.dat, needs --dtype)")
+    ap.add_argument("--store", default=DEFAULT_MINUTE_DIR)
+    ap.add_argument("--tz", default=None, help="clock to store timezone-aware timestamps in (default UTC)")
+    ap.add_argument("--dtype", default=None,
+                    help="record layout of raw binary files, e.g. 'ts:<i8,open:<f4,high:<f4,low:<f4,close:<f4,volume:<f8'")
+    ap.add_argument("--bars", nargs="*", default=[], help="bar sizes to aggregate now, e.g. 5min 1h 1D")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = ap.parse_args(argv)
+
+    dtype = [tuple(f.split(":")) for f in args.dtype.split(",")] if args.dtype else None
+    store = MinuteStore(args.store)
+    t0 = time.perf_counter()
+    for path in args.files:
+        added = store.ingest(args.symbol, path, args.tz, dtype, args.chunk_rows)
+        print(f"{path}: +{added:,} rows", file=sys.stderr)
+    for rule in args.bars:
+        rows = store.aggregate(args.symbol, rule, args.chunk_rows).meta()["rows"]
+        print(f"{rule}: {rows:,} bars", file=sys.stderr)
+    meta = store.meta(args.symbol) or {"rows": 0}
+    print(f"{args.symbol.upper()}: {meta['rows']:,} minutes stored in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# src/jobs.py
+"""
+Background job runner for the app: backtests, sweeps and model fits run on a
+small thread pool while the page polls for progress.
+
+    runner = JobRunner(max_workers=2)
+    job = runner.submit(key, lambda job: store.sweep(ticker, px, fasts, slows, progress=job.report), owner=session_id)
+    job.progress, job.message, job.partial   # updated by the job as it runs
+    runner.cancel(key, owner=session_id)    # stops it once no session is waiting on it
+    job.wait(0.5) and job.result
+
+Jobs are keyed like src.cache entries (data fingerprint + parameters), so an
+identical job submitted from another session while it is queued or running
+attaches to the same Job instead of starting a second one; finished jobs are
+kept briefly so a rerun can pick up the result. The job function receives its
+Job and reports through job.report(...), which is also where cancellation
+happens: once cancelled, the next report() raises JobCancelled and the job
+unwinds. NumPy, pandas and scikit-learn release the GIL in their heavy loops,
+so threads keep the script thread responsive without copying data into
+worker processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by Job.report() / Job.check() once it has been cancelled."""
+
+
+class Job:
+    """
+    One submitted job, shared by every session that submitted the same key.
+    status: one of JOB_STATES
+    progress: 0..1 as last reported; message: short status text
+    partial: latest partial result reported by the job (e.g. the sweep rows scored so far)
+    result / error: set when the job finishes
+    timings: optional stage timings recorded by the job code (e.g. a utils.instrument.Recorder),
+             for whoever picks up the result
+    """
+
+    def __init__(self, key: str, label: str | None = None):
+        self.key = key
+        self.label = label or key
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = ""
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.timings = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.owners = set()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._future = None
+
+    def __repr__(self):
+        return f"Job({self.label!r}, {self.status}, {self.progress:.0%})"
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent running so far (0 while queued)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+
+    def report(self, done=None, total=None, partial=None, message: str | None = None):
+        """
+        Progress hook for job code: report(3, 10) -> 30%, report(0.3) -> 30%.
+        partial: optional partial result to expose to pollers
+        Raises JobCancelled once the job has been cancelled, so passing job.report as a
+        progress callback is enough to make a loop cancellable.
+        """
+        self.check()
+        if done is not None:
+            self.progress = float(done) / total if total else float(done)
+        if partial is not None:
+            self.partial = partial
+        if message is not None:
+            self.message = message
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the job has finished (or timeout); returns whether it has."""
+        return self._done.wait(timeout)
+
+
+class JobRunner:
+    """
+    max_workers: jobs running at once (the rest queue)
+    keep: finished jobs kept for pickup by key; older ones are dropped
+    """
+
+    def __init__(self, max_workers: int = 2, keep: int = 16):
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trendedge-job")
+        self._jobs = OrderedDict()  # key -> Job, oldest first
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "deduplicated": 0, "cancelled": 0}
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def get(self, key: str) -> Job | None:
+        return self._jobs.get(key)
+
+    def jobs(self) -> list[Job]:
+        """All known jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _attach(self, key: str, label, owner) -> tuple[Job, bool]:
+        """(job for key, whether it is new); a queued/running/done job is reused, failed/cancelled ones replaced."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status in ("queued", "running", "done") and not job.cancelled:
+                job.owners.add(owner)
+                self._jobs.move_to_end(key)
+                self.stats["deduplicated"] += 1
+                return job, False
+            job = Job(key, label)
+            job.owners.add(owner)
+            self._jobs[key] = job
+            self.stats["submitted"] += 1
+            self._trim()
+            return job, True
+
+    def submit(self, key: str, fn, *args, label: str | None = None, owner=None, **kwargs) -> Job:
+        """
+        Run fn(job, *args, **kwargs) in the background under `key` and return its Job.
+        If a job with the same key is queued, running or done, that job is returned instead.
+        owner: who is waiting on it (e.g. a session id); see cancel()
+        """
+        job, new = self._attach(key, label, owner)
+        if new:
+            job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def run(self, key: str, fn, *args, label: str | None = None, owner=None, **kwargs) -> Job:
+        """submit() but in the calling thread (e.g. under a profiler); waits for an in-flight duplicate."""
+        job, new = self._attach(key, label, owner)
+        if new:
+            self._run(job, fn, args, kwargs)
+        else:
+            job.wait()
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        try:
+            job.check()
+            job.status, job.started = "running", time.time()
+            job.result = fn(job, *args, **kwargs)
+            job.progress, job.partial, job.status = 1.0, None, "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error, job.status = f"{type(e).__name__}: {e}", "failed"
+        finally:
+            job.finished = time.time()
+            job._done.set()
+
+    def cancel(self, key: str, owner=None, force: bool = False) -> bool:
+        """
+        Withdraw `owner` from the job; it is actually stopped once no owner is left (or with force).
+        Queued jobs never start; running ones stop at their next report()/check().
+        Returns whether the job was cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.done:
+                return False
+            job.owners.discard(owner)
+            if job.owners and not force:
+                return False
+            job._cancel.set()
+            self.stats["cancelled"] += 1
+        if job._future is not None and job._future.cancel():  # never started
+            job.status, job.finished = "cancelled", time.time()
+            job._done.set()
+        return True
+
+    def forget(self, key: str):
+        """Drop a finished job so the next submit() with its key runs again."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.done:
+                del self._jobs[key]
+
+    def _trim(self):
+        finished = [k for k, j in self._jobs.items() if j.done]
+        for k in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[k]
+
+    def shutdown(self, cancel: bool = True):
+        if cancel:
+            for job in self.jobs():
+                if not job.done:
+                    job._cancel.set()
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
@@ -1,16 +1,352 @@
 ﻿import numpy as np
 import pandas as pd
 
-def cagr(equity: pd.Series, periods_per_year=252):
+try:  # optional accelerator for compute_all_metrics(engine="numba")
+    import numba
+except ImportError:
+    numba = None
+
+DAY_NS = 86_400 * 10**9
+
+
+def bars_per_year(index, trading_days=252, sample=200_000) -> float:
+    """
+    Annualisation factor for a bar index: `trading_days` for daily bars, bars per session x
+    `trading_days` for intraday bars (e.g. 78 x 252 for 5-minute bars over a 6.5h session),
+    about 52 / 12 for weekly / monthly bars.
+    index: DatetimeIndex, datetime64 array or int64 nanoseconds (e.g. a memory-mapped
+           src.intraday timestamp column); anything else (or fewer than 2 bars) -> trading_days
+    sample: only the first `sample` bars are looked at, so huge mapped columns stay cheap
+    24/7 markets should pass trading_days=365.
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        ts = index[:sample].as_unit("ns").asi8
+    elif index is None or isinstance(index, pd.Index):
+        return float(trading_days)
+    else:
+        ts = np.asarray(index[:sample])
+        if ts.dtype.kind == "M":
+            ts = ts.astype("datetime64[ns]").view(np.int64)
+        elif ts.dtype.kind not in "iu":
+            return float(trading_days)
+    if len(ts) < 2:
+        return float(trading_days)
+    day = ts // DAY_NS
+    per_day = np.diff(np.flatnonzero(np.r_[True, day[1:] != day[:-1], True]))
+    if np.median(per_day) > 1:
+        return float(np.median(per_day)) * trading_days
+    gap = np.median(np.diff(ts)) / DAY_NS
+    return float(trading_days) if gap <= 4 else 365.25 / gap
+
+
+def cagr(equity: pd.Series, periods_per_year=None):
+    """periods_per_year: default bars_per_year(equity.index) (252 for daily bars)"""
     n = len(equity)
     if n < 2: return np.nan
+    if periods_per_year is None: periods_per_year = bars_per_year(getattr(equity, "index", None))
     return equity.iloc[-1]**(periods_per_year/n) - 1
 
-def sharpe(returns: pd.Series, periods_per_year=252, rf=0.0):
+def sharpe(returns: pd.Series, periods_per_year=None, rf=0.0):
+    """periods_per_year: default bars_per_year(returns.index) (252 for daily bars)"""
     if returns.std() == 0: return np.nan
+    if periods_per_year is None: periods_per_year = bars_per_year(getattr(returns, "index", None))
     return (returns.mean() - rf/periods_per_year) / returns.std() * np.sqrt(periods_per_year)
 
 def max_drawdown(equity: pd.Series):
     rollmax = equity.cummax()
     dd = equity/rollmax - 1
     return dd.min(), dd
+
+
+METRIC_COLUMNS = ["cagr", "sharpe", "sortino", "max_dd", "dd_start", "dd_end", "dd_recovery",
+                  "calmar", "hit_rate", "exposure"]
+
+
+def compute_all_metrics(returns, equity, positions=None, periods_per_year=None, rf=0.0, engine="numpy", valid=None):
+    """
+    All headline metrics from one sweep over contiguous NumPy buffers.
+    returns, equity: 1-D series or 2-D (bars x strategies) arrays/DataFrames of the same shape
+    positions: optional exposure per bar (same shape); defaults to "return != 0"
+    periods_per_year: default bars_per_year(index) (252 for daily bars or no datetime index)
+    valid: optional bool mask (same shape) of the bars each column actually has, e.g. a
+           PricePanel's mask; other rows are left out of the return statistics, CAGR's
+           year count and exposure (equity should be carried across them)
+    engine: "numpy" (one scan over row blocks, vectorised over columns; memory O(block x columns))
+            or "numba" (single fused loop per column; needs numba installed)
+    Returns a dict for 1-D input, else a DataFrame with one row per column.
+    Drawdown dates are index labels when the input has an index, otherwise bar positions
+    (None / -1 when there is no drawdown or no recovery yet).
+    Definitions match cagr(), sharpe() and max_drawdown(); Sortino uses downside deviation vs 0,
+    hit rate is the share of exposed bars with a positive return.
+    """
+    index = getattr(returns, "index", getattr(equity, "index", None))
+    names = getattr(returns, "columns", None)
+    if periods_per_year is None: periods_per_year = bars_per_year(index)
+    one_d = np.ndim(returns) == 1
+    R = np.ascontiguousarray(np.asarray(returns, dtype=np.float64).reshape(len(returns), -1))
+    E = np.ascontiguousarray(np.asarray(equity, dtype=np.float64).reshape(len(equity), -1))
+    if R.shape != E.shape:
+        raise ValueError(f"returns and equity shapes differ: {R.shape} vs {E.shape}")
+    P = None
+    if positions is not None:
+        P = np.ascontiguousarray(np.asarray(positions, dtype=np.float64).reshape(R.shape))
+    V = None
+    if valid is not None:
+        V = np.ascontiguousarray(np.asarray(valid, dtype=bool).reshape(R.shape))
+
+    if engine == "numba":
+        if numba is None:
+            raise ImportError("engine='numba' requires the optional numba package")
+        out = _numba_kernel()(R, E, P if P is not None else R, P is not None,
+                              V if V is not None else np.ones((0, 0), dtype=bool), V is not None,
+                              periods_per_year, rf)
+    elif engine == "numpy":
+        out = _metrics_numpy(R, E, P, periods_per_year, rf, V)
+    else:
+        raise ValueError(f"Unknown engine {engine!r}")
+
+    cols = dict(zip(METRIC_COLUMNS, out))
+    for c in ["dd_start", "dd_end", "dd_recovery"]:
+        if index is not None and len(index):
+            cols[c] = [index[i] if i >= 0 else None for i in cols[c]]
+        else:
+            cols[c] = np.asarray(cols[c], dtype=int)
+    if one_d:
+        return {c: (v[0].item() if hasattr(v[0], "item") else v[0]) for c, v in cols.items()}
+    return pd.DataFrame(cols, index=names)
+
+
+class MetricsAccumulator:
+    """
+    compute_all_metrics over bars that arrive in chunks (e.g. streamed from memory-mapped
+    files by src.intraday), keeping only running sums, the running peak and the worst
+    drawdown so far:
+
+        acc = MetricsAccumulator(k=2, periods_per_year=bars_per_year(ts))
+        for R, E, P in chunks:
+            acc.update(R, E, P)
+        acc.result(names=["strategy", "buyhold"])
+
+    k: number of columns (strategies) per chunk
+    Matches compute_all_metrics on the concatenated chunks up to float rounding (it is
+    also how compute_all_metrics' NumPy engine scans long inputs); drawdown dates are bar
+    positions unless result() is given an index.
+    """
+
+    def __init__(self, k: int = 1, periods_per_year=252, rf=0.0):
+        self.k, self.periods_per_year, self.rf = k, periods_per_year, rf
+        self.bars = 0  # rows seen, valid or not (drawdown positions count all of them)
+        self.n = np.zeros(k, dtype=np.int64)  # valid bars per column
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.d2 = np.zeros(k)
+        self.n_exp = np.zeros(k, dtype=np.int64)
+        self.n_hit = np.zeros(k, dtype=np.int64)
+        self.last = np.full(k, np.nan)
+        self.peak = np.full(k, -np.inf)
+        self.peak_i = np.full(k, -1)
+        self.worst = np.zeros(k)
+        self.worst_peak = np.zeros(k)
+        self.start = np.full(k, -1)
+        self.trough = np.full(k, -1)
+        self.recovery = np.full(k, -1)
+
+    def update(self, returns, equity, positions=None, valid=None) -> "MetricsAccumulator":
+        """
+        Add the next bars: (bars,) or (bars, k) returns / equity (/ positions / valid mask)
+        like compute_all_metrics.
+        """
+        # (k, bars) rows, so every reduction runs over contiguous memory
+        R = np.ascontiguousarray(np.asarray(returns, dtype=np.float64).reshape(len(returns), self.k).T)
+        E = np.ascontiguousarray(np.asarray(equity, dtype=np.float64).reshape(len(equity), self.k).T)
+        m = R.shape[1]
+        if m == 0:
+            return self
+        off, cols, t = self.bars, np.arange(self.k), np.arange(m)
+        V = None if valid is None else np.asarray(valid, dtype=bool).reshape(m, self.k).T
+
+        # mean / sum of squared deviations merged chunk-wise (Chan et al.), stable on long series
+        if V is None:
+            cnt, Rv = np.full(self.k, m), R
+            mean = R.mean(axis=1)
+            sq = ((R - mean[:, None]) ** 2).sum(axis=1)
+        else:
+            cnt, Rv = V.sum(axis=1), np.where(V, R, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(cnt > 0, Rv.sum(axis=1) / cnt, 0.0)
+            sq = np.where(V, (R - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        n = self.n + cnt
+        delta = mean - self.mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.m2 += sq + np.where(n > 0, delta ** 2 * self.n * cnt / n, 0.0)
+            self.mean += np.where(n > 0, delta * cnt / n, 0.0)
+        self.n = n
+        self.d2 += (np.minimum(Rv, 0.0) ** 2).sum(axis=1)
+        exposed = (np.asarray(positions).reshape(m, self.k).T != 0) if positions is not None else (R != 0)
+        if V is not None:
+            exposed &= V
+        self.n_exp += exposed.sum(axis=1)
+        self.n_hit += (exposed & (R > 0)).sum(axis=1)
+
+        # drawdown: running peak (and where it was last touched) carried across chunks
+        peak = np.maximum(np.maximum.accumulate(E, axis=1), self.peak[:, None])
+        at = np.where(E >= peak, t + off, -1)
+        np.maximum.accumulate(at, axis=1, out=at)
+        at = np.where(at < 0, self.peak_i[:, None], at)
+        dd = E / peak - 1
+        low = dd.argmin(axis=1)
+        new = dd[cols, low] < self.worst
+        wait = ~new & (self.trough >= 0) & (self.recovery < 0)
+        if wait.any():
+            back = E >= self.worst_peak[:, None]
+            self.recovery = np.where(wait & back.any(axis=1), back.argmax(axis=1) + off, self.recovery)
+        if new.any():
+            pk = peak[cols, low]
+            back = (E >= pk[:, None]) & (t > low[:, None])
+            self.worst = np.where(new, dd[cols, low], self.worst)
+            self.worst_peak = np.where(new, pk, self.worst_peak)
+            self.start = np.where(new, at[cols, low], self.start)
+            self.trough = np.where(new, low + off, self.trough)
+            self.recovery = np.where(new, np.where(back.any(axis=1), back.argmax(axis=1) + off, -1), self.recovery)
+        self.peak, self.peak_i, self.last = peak[:, -1], at[:, -1], E[:, -1]
+        self.bars += m
+        return self
+
+    def values(self) -> tuple:
+        """METRIC_COLUMNS as arrays (one entry per column); drawdown dates as bar positions."""
+        ppy, n, k = self.periods_per_year, self.n, self.k
+        nan = np.full(k, np.nan)
+        if not self.bars:
+            return nan, nan, nan, nan, np.full(k, -1), np.full(k, -1), np.full(k, -1), nan, nan, nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            excess = self.mean - self.rf / ppy
+            sd = np.where(n > 1, np.sqrt(self.m2 / (n - 1)), 0.0)
+            down = np.where(n > 0, np.sqrt(self.d2 / n), np.nan)
+            cagr_ = np.where(n > 1, self.last ** (ppy / n) - 1, np.nan)
+            sharpe_ = np.where(sd == 0, np.nan, excess / sd * np.sqrt(ppy))
+            sortino = np.where(down == 0, np.nan, excess / down * np.sqrt(ppy))
+            has_dd = self.worst < 0
+            calmar = np.where(has_dd, cagr_ / -self.worst, np.nan)
+            hit = np.where(self.n_exp > 0, self.n_hit / self.n_exp, np.nan)
+            exposure = np.where(n > 0, self.n_exp / n, np.nan)
+        return (cagr_, sharpe_, sortino, self.worst.copy(),
+                *(np.where(has_dd, a, -1) for a in (self.start, self.trough, self.recovery)),
+                calmar, hit, exposure)
+
+    def result(self, index=None, names=None) -> pd.DataFrame:
+        """METRIC_COLUMNS per column; index: optional bar labels for the drawdown positions."""
+        cols = dict(zip(METRIC_COLUMNS, self.values()))
+        for c in ["dd_start", "dd_end", "dd_recovery"]:
+            if index is not None:
+                cols[c] = [index[i] if i >= 0 else None for i in cols[c]]
+        return pd.DataFrame(cols, index=names)
+
+
+def _metrics_numpy(R, E, P, periods_per_year, rf, V=None, cells=1 << 16):
+    """
+    NumPy engine: a blockwise scan of about `cells` values per block through
+    MetricsAccumulator, so the running peak, drawdown and return sums never need
+    full (bars, k) temporaries; memory is O(block x k).
+    """
+    n, k = R.shape
+    acc = MetricsAccumulator(k, periods_per_year, rf)
+    step = max(1, cells // max(k, 1))
+    for i0 in range(0, n, step):
+        i1 = min(i0 + step, n)
+        acc.update(R[i0:i1], E[i0:i1], None if P is None else P[i0:i1], None if V is None else V[i0:i1])
+    return acc.values()
+
+
+def _metrics_loop(R, E, P, use_p, V, use_v, periods_per_year, rf):
+    """Single fused pass per column; plain Python so it can be compiled by numba.njit."""
+    n, k = R.shape
+    cagr_ = np.full(k, np.nan)
+    sharpe_ = np.full(k, np.nan)
+    sortino = np.full(k, np.nan)
+    mdd = np.full(k, np.nan)
+    start = np.full(k, -1)
+    trough = np.full(k, -1)
+    recovery = np.full(k, -1)
+    calmar = np.full(k, np.nan)
+    hit = np.full(k, np.nan)
+    exposure = np.full(k, np.nan)
+    if n == 0:
+        return cagr_, sharpe_, sortino, mdd, start, trough, recovery, calmar, hit, exposure
+
+    for j in range(k):
+        s1 = 0.0
+        s2 = 0.0
+        d2 = 0.0
+        n_exp = 0
+        n_hit = 0
+        peak = -np.inf
+        peak_i = -1
+        worst = 0.0
+        worst_peak = 0.0
+        w_start = -1
+        w_trough = -1
+        w_rec = -1
+        mean = 0.0
+        nv = 0
+        for i in range(n):
+            if not use_v or V[i, j]:
+                r = R[i, j]
+                nv += 1
+                # Welford-style update keeps the variance stable on long series
+                delta = r - mean
+                mean += delta / nv
+                s2 += delta * (r - mean)
+                s1 += r
+                if r < 0.0:
+                    d2 += r * r
+                exp_ = P[i, j] != 0.0 if use_p else r != 0.0
+                if exp_:
+                    n_exp += 1
+                    if r > 0.0:
+                        n_hit += 1
+
+            e = E[i, j]
+            if e >= peak:
+                peak = e
+                peak_i = i
+            dd = e / peak - 1.0
+            if dd < worst:
+                worst = dd
+                worst_peak = peak
+                w_start = peak_i
+                w_trough = i
+                w_rec = -1
+            elif w_trough >= 0 and w_rec < 0 and e >= worst_peak:
+                w_rec = i
+
+        if nv == 0:
+            continue
+        excess = s1 / nv - rf / periods_per_year
+        if nv > 1:
+            sd = np.sqrt(s2 / (nv - 1))
+            if sd != 0.0:
+                sharpe_[j] = excess / sd * np.sqrt(periods_per_year)
+            cagr_[j] = E[n - 1, j] ** (periods_per_year / nv) - 1
+        down = np.sqrt(d2 / nv)
+        if down != 0.0:
+            sortino[j] = excess / down * np.sqrt(periods_per_year)
+        mdd[j] = worst
+        if worst < 0.0:
+            start[j] = w_start
+            trough[j] = w_trough
+            recovery[j] = w_rec
+            calmar[j] = cagr_[j] / -worst
+        if n_exp > 0:
+            hit[j] = n_hit / n_exp
+        exposure[j] = n_exp / nv
+    return cagr_, sharpe_, sortino, mdd, start, trough, recovery, calmar, hit, exposure
+
+
+_NUMBA_KERNEL = None
+
+
+def _numba_kernel():
+    global _NUMBA_KERNEL
+    if _NUMBA_KERNEL is None:
+        _NUMBA_KERNEL = numba.njit(cache=True)(_metrics_loop)
+    return _NUMBA_KERNEL
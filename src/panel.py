@@ -0,0 +1,204 @@
+# src/panel.py
+"""
+Columnar multi-symbol price container.
+
+    panel, errors = PricePanel.load(symbols, loader=PriceStore().get)
+    panel.field()            # (dates, symbols) float32 close block (Adj Close if present)
+    panel.column("SPY")      # zero-copy 1-D view of one symbol
+    panel.series("SPY")      # its valid bars as a Series (no copy unless the history has holes)
+
+All symbols share one sorted int64 date axis (nanoseconds since the epoch).
+Every field lives in a single C-contiguous float32 block of shape
+(fields, dates, symbols) next to a boolean validity mask (dates, symbols): True
+where the symbol has a finite close on that date. Dates a symbol did not trade
+hold NaN. A 5,000-symbol x 30-year daily close panel is ~150 MB instead of
+several GB of per-symbol float64 DataFrames, and cross-sectional kernels
+(src.signals.panel_ma_signals, src.backtest.run_backtest_panel,
+src.metrics.compute_all_metrics(valid=...)) read it without reindexing.
+"""
+import numpy as np
+import pandas as pd
+
+from src.data import PRICE_COLUMNS
+
+
+class PricePanel:
+    """
+    dates: sorted, unique int64 nanoseconds since the epoch (tz-naive)
+    symbols: symbol names, one per column
+    fields: field names (subset of src.data.PRICE_COLUMNS), one per leading slice of `values`
+    values: float32 array (fields, dates, symbols)
+    mask: bool array (dates, symbols); True where the close is present
+    """
+
+    def __init__(self, dates, symbols, fields, values, mask):
+        self.dates = np.asarray(dates, dtype=np.int64)
+        self.symbols = tuple(symbols)
+        self.fields = tuple(fields)
+        self.values = values
+        self.mask = mask
+        shape = (len(self.fields), len(self.dates), len(self.symbols))
+        if values.shape != shape or mask.shape != shape[1:]:
+            raise ValueError(f"values {values.shape} / mask {mask.shape} don't match {shape}")
+        self.close_field = "Adj Close" if "Adj Close" in self.fields else "Close"
+        if self.close_field not in self.fields:
+            raise ValueError("A panel needs a Close or Adj Close field.")
+        self._pos = {s: j for j, s in enumerate(self.symbols)}
+        self._index = None
+
+    # ---- construction ----
+    @classmethod
+    def from_frames(cls, frames: dict, fields=None, dtype=np.float32):
+        """
+        frames: {symbol: DataFrame with DatetimeIndex and price columns, or a close Series}
+        fields: columns to keep (default: every PRICE_COLUMNS column any frame has)
+        """
+        frames = {s: (f.to_frame("Close") if isinstance(f, pd.Series) else f) for s, f in frames.items()}
+        if fields is None:
+            present = set().union(*(f.columns for f in frames.values())) if frames else {"Close"}
+            fields = [c for c in PRICE_COLUMNS if c in present]
+        fields = list(fields)
+
+        # union of the date axes; universes usually share one calendar, so most frames skip the merge
+        dates = np.empty(0, dtype=np.int64)
+        stamps = {}
+        for sym, df in frames.items():
+            d = stamps[sym] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+            if not np.array_equal(d, dates):
+                dates = np.union1d(dates, d)
+
+        values = np.full((len(fields), len(dates), len(frames)), np.nan, dtype=dtype)
+        mask = np.zeros((len(dates), len(frames)), dtype=bool)
+        close = "Adj Close" if "Adj Close" in fields else "Close"
+        for j, (sym, df) in enumerate(frames.items()):
+            rows = np.searchsorted(dates, stamps[sym])
+            for i, f in enumerate(fields):
+                if f in df.columns:
+                    values[i, rows, j] = df[f].to_numpy(dtype=dtype, na_value=np.nan)
+            if close not in df.columns and "Close" in df.columns:  # same fallback as close_prices
+                values[fields.index(close), rows, j] = df["Close"].to_numpy(dtype=dtype, na_value=np.nan)
+        mask[:] = np.isfinite(values[fields.index(close)])
+        return cls(dates, list(frames), fields, values, mask)
+
+    @classmethod
+    def load(cls, symbols, start=None, end=None, loader=None, fields=None):
+        """
+        Load symbols with `loader(symbol, start, end) -> (DataFrame, err)` (default
+        src.data.download_prices; PriceStore().get reads memory-mapped files instead).
+        Returns (panel, errors dict).
+        """
+        if loader is None:
+            from src.data import download_prices as loader
+        frames, errors = {}, {}
+        for sym in symbols:
+            df, err = loader(sym, start, end)
+            if err or df.empty:
+                errors[sym] = err or "no data"
+            else:
+                frames[sym] = df
+        return cls.from_frames(frames, fields), errors
+
+    # ---- shape / lookup ----
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._pos
+
+    def __repr__(self):
+        return (f"PricePanel({len(self.symbols)} symbols x {len(self.dates)} dates, "
+                f"fields={list(self.fields)}, {self.nbytes / 1e6:.1f} MB)")
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.values.nbytes + self.mask.nbytes
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """The date axis as a DatetimeIndex over the same int64 buffer."""
+        if self._index is None:
+            self._index = pd.DatetimeIndex(self.dates.view("datetime64[ns]"), copy=False)
+        return self._index
+
+    def _col(self, symbol) -> int:
+        try:
+            return self._pos[symbol]
+        except KeyError:
+            raise KeyError(f"{symbol!r} is not in the panel") from None
+
+    # ---- zero-copy views ----
+    def field(self, name: str | None = None) -> np.ndarray:
+        """(dates, symbols) view of one field (default: the close field)."""
+        return self.values[self.fields.index(name or self.close_field)]
+
+    def column(self, symbol, field: str | None = None) -> np.ndarray:
+        """(dates,) view of one symbol's field, NaN on dates it has no bar."""
+        return self.field(field)[:, self._col(symbol)]
+
+    def valid(self, symbol) -> np.ndarray:
+        return self.mask[:, self._col(symbol)]
+
+    def span(self, symbol) -> tuple[int, int]:
+        """[first, last + 1) date positions of the symbol's valid bars ((0, 0) if none)."""
+        rows = np.flatnonzero(self.valid(symbol))
+        return (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (0, 0)
+
+    def series(self, symbol, field: str | None = None) -> pd.Series:
+        """The symbol's valid bars as a float32 Series; a view unless its history has holes."""
+        a, b = self.span(symbol)
+        ok = self.valid(symbol)[a:b]
+        col = self.column(symbol, field)[a:b]
+        idx = self.index[a:b]
+        if not ok.all():
+            col, idx = col[ok], idx[ok]
+        return pd.Series(col, index=idx, name=symbol, copy=False)
+
+    def frame(self, symbol) -> pd.DataFrame:
+        """All fields of one symbol over its valid bars (a copy, for charts and exports)."""
+        a, b = self.span(symbol)
+        ok = self.valid(symbol)[a:b]
+        j = self._col(symbol)
+        block = self.values[:, a:b, j].T[ok]
+        return pd.DataFrame(block, index=self.index[a:b][ok], columns=list(self.fields))
+
+    def select(self, symbols) -> "PricePanel":
+        """Panel over a subset of symbols (views when they are adjacent columns, else copies)."""
+        cols = [self._col(s) for s in symbols]
+        if cols and cols == list(range(cols[0], cols[0] + len(cols))):
+            cols = slice(cols[0], cols[0] + len(cols))
+        return PricePanel(self.dates, [self.symbols[j] for j in np.arange(len(self.symbols))[cols]],
+                          self.fields, self.values[:, :, cols], self.mask[:, cols])
+
+    def between(self, start=None, end=None) -> "PricePanel":
+        """Panel over start <= date < end (end exclusive, like yfinance); always views."""
+        a = np.searchsorted(self.dates, pd.Timestamp(start).value) if start is not None else 0
+        b = np.searchsorted(self.dates, pd.Timestamp(end).value) if end is not None else len(self.dates)
+        return PricePanel(self.dates[a:b], self.symbols, self.fields, self.values[:, a:b], self.mask[a:b])
+
+    # ---- shared memory ----
+    def share(self):
+        """
+        Copy the panel into one shared-memory block for worker processes.
+        Returns (shm, spec); workers call PricePanel.attach(spec). The caller owns shm
+        (close() and unlink() it when done).
+        """
+        from multiprocessing import shared_memory
+
+        parts = [np.ascontiguousarray(a) for a in (self.dates, self.values, self.mask)]
+        offsets = np.concatenate(([0], np.cumsum([p.nbytes for p in parts])))
+        shm = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+        for p, off in zip(parts, offsets):
+            np.ndarray(p.shape, p.dtype, buffer=shm.buf, offset=int(off))[...] = p
+        spec = {"name": shm.name, "symbols": self.symbols, "fields": self.fields,
+                "arrays": [(p.shape, p.dtype.str, int(off)) for p, off in zip(parts, offsets)]}
+        return shm, spec
+
+    @classmethod
+    def attach(cls, spec):
+        """Zero-copy panel over a block created by share(). Returns (panel, shm); keep shm referenced."""
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        dates, values, mask = (np.ndarray(shape, np.dtype(dt), buffer=shm.buf, offset=off)
+                               for shape, dt, off in spec["arrays"])
+        return cls(dates, spec["symbols"], spec["fields"], values, mask), shm
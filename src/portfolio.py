@@ -0,0 +1,232 @@
+# src/portfolio.py
+"""
+Portfolio backtests over a src.panel.PricePanel (dates x symbols).
+
+    from src.portfolio import run_portfolio
+    pf = run_portfolio(panel, fast=20, slow=50, weighting="inverse_vol", cap=0.05, rebalance="M")
+    pf["returns"]["eq_portfolio"], pf["attribution"].sort_values("contribution")
+
+Each symbol's MA signal (src.signals.panel_ma_signals) says whether it is held.
+On rebalance dates the held symbols get target weights (equal, inverse-vol,
+optionally capped per name); between rebalances the holdings drift with their
+returns. Execution is next-bar, like run_backtest: weights decided at a close
+apply from the next bar's return, and uninvested weight sits in cash at 0%.
+
+Everything is matrix math over (dates, symbols) blocks. Drift is solved in
+closed form per rebalance segment (units held = target weight / cumulative
+growth at the rebalance), so there is no loop over symbols, and dates are
+processed in blocks to bound scratch memory.
+"""
+import numpy as np
+import pandas as pd
+
+from src.backtest import run_backtest_panel
+from src.costs import CostModel, realised_vol
+from src.signals import panel_ma_signals
+
+WEIGHTINGS = ("equal", "inverse_vol")
+CALENDAR_REBALANCE = ("D", "W", "M", "Q", "Y")
+PORTFOLIO_COLUMNS = ["ret_portfolio", "eq_portfolio", "gross", "positions", "turnover", "cost"]
+ATTRIBUTION_COLUMNS = ["contribution", "avg_weight", "max_weight", "bars_held", "turnover", "cost"]
+
+
+def rebalance_dates(dates, rule, signal=None) -> np.ndarray:
+    """
+    Bool mask of the closes at which the book is rebalanced.
+    dates: int64 nanoseconds (PricePanel.dates)
+    rule: "signal" (whenever any position flips), a calendar rule ("D", "W", "M", "Q", "Y":
+          last bar of each period) or an int N (every N bars)
+    signal: (dates, symbols) held positions, needed for "signal"
+    """
+    n = len(dates)
+    out = np.zeros(n, dtype=bool)
+    if n == 0:
+        return out
+    if rule == "signal":
+        if signal is None:
+            raise ValueError("rebalance='signal' needs the signal matrix")
+        out[0] = True
+        out[1:] = (signal[1:] != signal[:-1]).any(axis=1)
+        return out
+    if isinstance(rule, (int, np.integer)) and not isinstance(rule, bool):
+        if rule < 1:
+            raise ValueError("rebalance every N bars needs N >= 1")
+        out[::int(rule)] = True
+        return out
+    if rule not in CALENDAR_REBALANCE:
+        raise ValueError(f"rebalance must be 'signal', one of {CALENDAR_REBALANCE} or an int")
+    d = np.asarray(dates, dtype=np.int64).view("datetime64[ns]")
+    if rule == "D":
+        period = d.astype("datetime64[D]").astype(np.int64)
+    elif rule == "W":
+        period = (d.astype("datetime64[D]").astype(np.int64) + 3) // 7  # weeks starting Monday
+    elif rule == "M":
+        period = d.astype("datetime64[M]").astype(np.int64)
+    elif rule == "Q":
+        period = d.astype("datetime64[M]").astype(np.int64) // 3
+    else:
+        period = d.astype("datetime64[Y]").astype(np.int64)
+    out[:-1] = period[1:] != period[:-1]
+    out[-1] = True
+    return out
+
+
+def target_weights(active, vol=None, weighting: str = "equal", cap: float | None = None,
+                   gross: float = 1.0, max_iter: int = 100) -> np.ndarray:
+    """
+    Target weights for rows of held/not-held flags.
+    active: (rows, symbols) bool, symbols to hold
+    vol: (rows, symbols) annualised vol, needed for "inverse_vol" (NaN/0 vol -> not held)
+    cap: optional max weight per symbol; the excess is spread over uncapped names and
+         whatever cannot be placed stays in cash
+    gross: total weight when nothing is capped (1.0 = fully invested)
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"weighting must be one of {WEIGHTINGS}")
+    raw = np.asarray(active, dtype=np.float64)
+    if weighting == "inverse_vol":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = 1.0 / np.asarray(vol, dtype=np.float64)
+        raw *= np.where(np.isfinite(inv), inv, 0.0)
+    total = raw.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.where(total > 0, raw * (gross / total), 0.0)
+    if cap is None:
+        return w
+
+    # water-filling: clip at the cap, hand the excess to names still under it (pro rata), repeat
+    cap = float(cap)
+    for _ in range(max_iter):
+        excess = np.maximum(w - cap, 0.0).sum(axis=1, keepdims=True)
+        if not (excess > 1e-12).any():
+            break
+        np.minimum(w, cap, out=w)
+        room = (w > 0) & (w < cap)
+        base = np.where(room, w, 0.0)
+        base_sum = base.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w += np.where(base_sum > 0, base * (excess / base_sum), 0.0)
+    return np.minimum(w, cap)
+
+
+def run_portfolio(panel, signal=None, fast: int = 20, slow: int = 50, weighting: str = "equal",
+                  cap: float | None = None, rebalance="signal", vol_lookback: int = 60, gross: float = 1.0,
+                  costs: CostModel | None = None, periods_per_year: int = 252,
+                  keep_weights: bool = False, block: int = 256) -> dict:
+    """
+    panel: src.panel.PricePanel
+    signal: optional (dates, symbols) 0/1 positions; default panel_ma_signals(panel, fast, slow)
+    weighting: "equal" or "inverse_vol" (1 / realised vol over `vol_lookback` bars)
+    cap: optional max weight per symbol
+    rebalance: "signal", "D"/"W"/"M"/"Q"/"Y" or an int number of bars (see rebalance_dates)
+    gross: invested fraction at each rebalance
+    costs: optional CostModel; bps + half the spread are charged on rebalance turnover
+           (sizing and fixed fees don't apply at portfolio level)
+    keep_weights: also return the (dates, symbols) float32 matrix of weights held over each bar
+    block: dates per pass (bounds scratch memory to ~block x symbols floats)
+    Returns {"returns": DataFrame (PORTFOLIO_COLUMNS) on the panel's dates,
+             "attribution": DataFrame (ATTRIBUTION_COLUMNS) per symbol,
+             "rebalances": DatetimeIndex of rebalance closes, ["weights": array]}
+    contribution is the sum over bars of weight x return, so the column sums to the
+    summed (arithmetic) portfolio return.
+    """
+    M = panel.mask
+    n, k = M.shape
+    S = panel_ma_signals(panel, fast, slow) if signal is None else np.asarray(signal)
+    if S.shape != (n, k):
+        raise ValueError(f"signal shape {S.shape} doesn't match the panel {(n, k)}")
+    R = run_backtest_panel(panel, S, columns=("ret_buyhold",))["ret_buyhold"]
+    held = (S != 0) & M  # only names with a bar today can be bought
+
+    # ---- targets at each rebalance close ----
+    D = rebalance_dates(panel.dates, rebalance, held)
+    dec = np.flatnonzero(D)
+    vol = realised_vol(R, vol_lookback, periods_per_year, rows=dec) if weighting == "inverse_vol" else None
+    T = target_weights(held[dec], vol, weighting, cap, gross)
+    cash = 1.0 - T.sum(axis=1)
+
+    # cumulative growth per asset at each rebalance close; units held = weight / growth
+    growth = np.ones(k)
+    G_dec = np.empty((len(dec), k))
+    # segment governing each bar: the latest rebalance strictly before it (-1 = not started)
+    seg = np.concatenate(([-1], np.cumsum(D)[:-1] - 1))
+
+    ret = np.zeros(n)
+    gross_held = np.zeros(n)
+    n_pos = np.zeros(n, dtype=np.int64)
+    contrib = np.zeros(k)
+    w_sum = np.zeros(k)
+    w_max = np.zeros(k)
+    bars_held = np.zeros(k, dtype=np.int64)
+    weights = np.zeros((n, k), dtype=np.float32) if keep_weights else None
+    units = np.zeros_like(T)  # filled in as each rebalance close is reached
+
+    j_next = 0  # next rebalance to record
+    for a in range(0, n, block):
+        b = min(a + block, n)
+        Gb = growth * np.cumprod(1.0 + R[a:b], axis=0)   # growth through the close of each bar
+        Gprev = np.vstack((growth[None], Gb[:-1]))         # ... and through the previous close
+        # record growth at rebalance closes inside this block
+        while j_next < len(dec) and dec[j_next] < b:
+            G_dec[j_next] = Gb[dec[j_next] - a]
+            np.divide(T[j_next], G_dec[j_next], out=units[j_next], where=G_dec[j_next] > 0)
+            j_next += 1
+
+        sb = seg[a:b]
+        live = sb >= 0
+        if live.any():
+            rows = np.flatnonzero(live)
+            A = units[sb[rows]] * Gprev[rows]                  # value of each holding at the previous close
+            start_val = A.sum(axis=1) + cash[sb[rows]]        # portfolio value then (per unit at the rebalance)
+            W = A / start_val[:, None]                         # weights held over the bar
+            C = W * R[a:b][rows]
+            ret[a + rows] = C.sum(axis=1)
+            gross_held[a + rows] = W.sum(axis=1)
+            n_pos[a + rows] = (W > 0).sum(axis=1)
+            contrib += C.sum(axis=0)
+            w_sum += W.sum(axis=0)
+            np.maximum(w_max, W.max(axis=0), out=w_max)
+            bars_held += (W > 0).sum(axis=0)
+            if keep_weights:
+                weights[a + rows] = W
+        growth = Gb[-1]
+
+    # ---- rebalance turnover: targets vs the drifted book just before trading ----
+    pre = np.zeros_like(T)
+    if len(dec) > 1:
+        drift = units[:-1] * G_dec[1:]
+        pre[1:] = drift / (drift.sum(axis=1) + cash[:-1])[:, None]
+    trade = np.abs(T - pre)
+    turnover = np.zeros(n)
+    cost = np.zeros(n)
+    cost_by_asset = np.zeros(k)
+    exec_bar = dec + 1  # trades fill at the next bar, like run_backtest
+    ok = exec_bar < n
+    turnover[exec_bar[ok]] = trade[ok].sum(axis=1)
+    if costs is not None:
+        rate = (float(costs.bps) + float(costs.spread_bps) / 2) / 1e4
+        cost[exec_bar[ok]] = turnover[exec_bar[ok]] * rate
+        cost_by_asset = trade[ok].sum(axis=0) * rate
+        ret -= cost
+
+    idx = panel.index
+    returns = pd.DataFrame({
+        "ret_portfolio": ret,
+        "eq_portfolio": np.cumprod(1.0 + ret),
+        "gross": gross_held,
+        "positions": n_pos,
+        "turnover": turnover,
+        "cost": cost,
+    }, index=idx)
+    attribution = pd.DataFrame({
+        "contribution": contrib - cost_by_asset,
+        "avg_weight": w_sum / max(n, 1),
+        "max_weight": w_max,
+        "bars_held": bars_held,
+        "turnover": trade[ok].sum(axis=0),
+        "cost": cost_by_asset,
+    }, index=pd.Index(panel.symbols, name="symbol"))
+    out = {"returns": returns, "attribution": attribution, "rebalances": idx[dec]}
+    if keep_weights:
+        out["weights"] = weights
+    return out
@@ -0,0 +1,192 @@
+# src/research.py
+"""
+Next-bar direction model for the Research tab.
+
+Features come from one IndicatorEngine pass and are written into a single
+C-contiguous float32 matrix (one row per bar, built only from data up to that
+bar): lagged returns, price/MA and fast/slow MA ratios, the crossover state,
+RSI and realised volatility. Models are plain scikit-learn logistic
+regressions (imported on first fit); pass a src.cache.ResultCache to reuse
+fits keyed by the feature-matrix fingerprint plus hyperparameters.
+
+    X, y, valid, names = build_features(px, fast=20, slow=50)
+    res = direction_model(px, 20, 50, mode="rolling", cache=cache)
+    score_many(res["model"], {"SPY": spy, "QQQ": qqq}, 20, 50)  # one predict_proba call
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.cache import cache_key, fingerprint
+from src.costs import realised_vol
+from src.indicators import IndicatorEngine
+
+DEFAULT_LAGS = (0, 1, 2, 5, 10)        # return of bar t-k, for each k
+DEFAULT_VOL_WINDOWS = (10, 20, 60)
+RSI_WINDOW = 14
+RETRAIN_MODES = ("holdout", "rolling", "expanding")
+
+
+def feature_names(fast: int, slow: int, lags=DEFAULT_LAGS, vol_windows=DEFAULT_VOL_WINDOWS) -> list[str]:
+    return ([f"ret_lag{k}" for k in lags]
+            + [f"px_over_ma{fast}", f"px_over_ma{slow}", f"ma{fast}_over_ma{slow}", "xover", f"rsi{RSI_WINDOW}"]
+            + [f"vol{w}" for w in vol_windows])
+
+
+def build_features(close, fast: int, slow: int, lags=DEFAULT_LAGS, vol_windows=DEFAULT_VOL_WINDOWS,
+                   engine: IndicatorEngine | None = None, dtype=np.float32):
+    """
+    close: price series/array without NaNs
+    engine: optional IndicatorEngine over `close` (shares its MAs/RSI with the caller)
+    Returns (X, y, valid, names):
+      X: (bars, features) C-contiguous array of `dtype`
+      y: next-bar direction as float64 (1 up, 0 not; NaN on the last bar)
+      valid: rows where every feature is defined (warm-up rows are False)
+    """
+    p = np.asarray(close, dtype=np.float64).ravel()
+    n = len(p)
+    engine = IndicatorEngine(p) if engine is None else engine
+    names = feature_names(fast, slow, lags, vol_windows)
+    X = np.empty((n, len(names)), dtype=dtype)
+
+    ret = np.full(n, np.nan)
+    if n > 1:
+        ret[1:] = p[1:] / p[:-1] - 1
+    col = 0
+    for k in lags:
+        X[:k, col] = np.nan
+        X[k:, col] = ret[:n - k]
+        col += 1
+
+    ma_f, ma_s = engine.node(("sma", "close", int(fast))), engine.node(("sma", "close", int(slow)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X[:, col] = p / ma_f - 1
+        X[:, col + 1] = p / ma_s - 1
+        X[:, col + 2] = ma_f / ma_s - 1
+        X[:, col + 3] = np.where(np.isnan(ma_s), np.nan, ma_f > ma_s)
+    X[:, col + 4] = (engine.node(("rsi", "close", RSI_WINDOW)) - 50) / 100
+    col += 5
+
+    r0 = np.nan_to_num(ret)
+    for w in vol_windows:
+        X[:, col] = realised_vol(r0, w)
+        X[:w, col] = np.nan  # the first bar's return is undefined
+        col += 1
+
+    y = np.full(n, np.nan)
+    if n > 1:
+        y[:-1] = p[1:] > p[:-1]
+    valid = np.isfinite(X).all(axis=1)
+    return X, y, valid, names
+
+
+def make_model(C: float = 1.0, max_iter: int = 200, warm_start: bool = False):
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(C=C, max_iter=max_iter, warm_start=warm_start)
+
+
+def fit_model(X, y, C: float = 1.0, max_iter: int = 200, cache=None):
+    """Fit a logistic regression; with a ResultCache, identical data + hyperparameters reuse the fit."""
+    if cache is None:
+        return make_model(C, max_iter).fit(X, y)
+    key = cache_key("model", fingerprint(X, y), C=C, max_iter=max_iter)
+    return cache.get_or_compute(key, lambda: make_model(C, max_iter).fit(X, y))
+
+
+def retrain_probs(X, y, rows, mode: str = "rolling", train: int = 756, step: int = 21,
+                  C: float = 1.0, max_iter: int = 200, cache=None, progress=None):
+    """
+    Out-of-sample P(up) for the bars in `rows` (indices into X with known targets).
+    mode: "holdout" (fit on the first 75%, predict the rest), "rolling" (refit every
+          `step` bars on the last `train` bars) or "expanding" (refit on everything so far)
+    Rolling/expanding refits warm-start from the previous coefficients, so each refit
+    only nudges the model.
+    progress: optional callback(done, total) after each refit window (raising from it stops the run)
+    Returns (prob, model, refits): prob has NaN where no out-of-sample prediction exists.
+    """
+    if mode not in RETRAIN_MODES:
+        raise ValueError(f"mode must be one of {RETRAIN_MODES}")
+    Xv, yv = np.ascontiguousarray(X[rows]), y[rows]
+    m = len(rows)
+    prob = np.full(len(X), np.nan)
+
+    if mode == "holdout":
+        cut = m - math.ceil(m * 0.25)  # same split as train_test_split(test_size=0.25, shuffle=False)
+        model = fit_model(Xv[:cut], yv[:cut], C, max_iter, cache)
+        prob[rows[cut:]] = model.predict_proba(Xv[cut:])[:, 1]
+        return prob, model, 1
+
+    if m <= train:
+        raise ValueError(f"Need more than train={train} usable bars, got {m}.")
+    model, refits = make_model(C, max_iter, warm_start=True), 0
+    windows = range(train, m, step)
+    for w, t0 in enumerate(windows):
+        a = 0 if mode == "expanding" else t0 - train
+        if len(np.unique(yv[a:t0])) == 2:  # keep the previous fit on one-sided windows
+            model.fit(Xv[a:t0], yv[a:t0])
+            refits += 1
+        if refits:
+            prob[rows[t0:t0 + step]] = model.predict_proba(Xv[t0:t0 + step])[:, 1]
+        if progress is not None:
+            progress(w + 1, len(windows))
+    return prob, model, refits
+
+
+def direction_model(close, fast: int, slow: int, mode: str = "holdout", train: int = 756, step: int = 21,
+                    C: float = 1.0, max_iter: int = 200, engine: IndicatorEngine | None = None, cache=None,
+                    progress=None) -> dict:
+    """
+    Features -> (re)training -> out-of-sample probabilities for one price series.
+    cache: optional ResultCache; fits and retraining runs are keyed by the feature
+           fingerprint plus hyperparameters, so repeat calls skip all model work
+    progress: optional callback(done, total) per refit window (see retrain_probs)
+    Returns {prob (Series of OOS P(up)), accuracy, refits, model, names}, or None with too little data.
+    """
+    X, y, valid, names = build_features(close, fast, slow, engine=engine)
+    rows = np.flatnonzero(valid & ~np.isnan(y))
+    if len(rows) <= 100 or (mode != "holdout" and len(rows) <= train):
+        return None
+    if cache is None:
+        prob, model, refits = retrain_probs(X, y, rows, mode, train, step, C, max_iter, progress=progress)
+    else:
+        key = cache_key("retrain", fingerprint(X, y), mode=mode, train=train, step=step, C=C, max_iter=max_iter)
+        prob, model, refits = cache.get_or_compute(
+            key, lambda: retrain_probs(X, y, rows, mode, train, step, C, max_iter, cache, progress))
+    oos = ~np.isnan(prob)
+    acc = float(((prob[oos] > 0.5) == y[oos]).mean()) if oos.any() else np.nan
+    idx = getattr(close, "index", None)
+    return {
+        "prob": pd.Series(prob, index=idx, name="prob_up")[oos],
+        "accuracy": acc,
+        "refits": refits,
+        "model": model,
+        "names": names,
+    }
+
+
+def score_many(model, closes: dict, fast: int, slow: int, last_only: bool = True):
+    """
+    Score many tickers with one predict_proba call over a stacked feature matrix.
+    closes: {symbol: price series}
+    Returns a Series of P(up next bar) at each symbol's last bar (last_only=True),
+    otherwise {symbol: Series of P(up) over its history} (NaN on warm-up bars).
+    """
+    feats = {sym: build_features(px, fast, slow) for sym, px in closes.items()}
+    if last_only:
+        blocks = [X[-1:] for X, *_ in feats.values()]
+    else:
+        blocks = [X for X, *_ in feats.values()]
+    lengths = np.array([len(b) for b in blocks])
+    stacked = np.concatenate(blocks) if blocks else np.empty((0, len(feature_names(fast, slow))), np.float32)
+    ok = np.isfinite(stacked).all(axis=1)
+    prob = np.full(len(stacked), np.nan)
+    if ok.any():
+        prob[ok] = model.predict_proba(stacked[ok])[:, 1]
+
+    if last_only:
+        return pd.Series(prob, index=list(closes), name="prob_up")
+    out, offsets = {}, np.concatenate(([0], np.cumsum(lengths)))
+    for i, (sym, px) in enumerate(closes.items()):
+        out[sym] = pd.Series(prob[offsets[i]:offsets[i + 1]], index=getattr(px, "index", None), name="prob_up")
+    return out
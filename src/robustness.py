@@ -0,0 +1,316 @@
+# src/robustness.py
+"""
+Is that Sharpe ratio luck? Bootstrap confidence intervals and data-snooping
+tests for strategy returns.
+
+    ci = bootstrap_ci(res["ret_strategy"], n_boot=2000)      # every metric with a 95% interval
+    R = pair_returns(px, range(5, 101, 5), range(20, 301, 10))  # one column per tested pair
+    reality_check(R, benchmark=res["ret_buyhold"])            # White (2000): best pair vs benchmark
+    deflated_sharpe(R)                                        # Bailey & Lopez de Prado (2014)
+
+Resamples are drawn as index matrices (one row of bar positions per resample)
+by the stationary bootstrap of Politis & Romano (random-length blocks, mean
+length `block`), a circular moving-block bootstrap, or i.i.d. draws, and
+evaluated a chunk of rows at a time:
+
+- path metrics (CAGR, drawdown, ...) gather the resampled returns into a
+  (bars, resamples) matrix and run src.metrics.compute_all_metrics over all
+  columns at once;
+- tests across many strategies only need resampled means, which are
+  count-weighted sums: each resample becomes a row of bar counts and a chunk
+  of resamples x every strategy is a single matrix product.
+
+With workers > 1 chunks run in a process pool that reads the return matrix
+from shared memory; each chunk draws from its own child seed, so results only
+depend on `seed` and `chunk`, not on the number of workers.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from src.costs import CostModel, apply_costs
+from src.metrics import METRIC_COLUMNS, compute_all_metrics
+
+BOOTSTRAP_METHODS = ("stationary", "block", "iid")
+CI_METRICS = [c for c in METRIC_COLUMNS if c not in ("dd_start", "dd_end", "dd_recovery")]
+EULER_GAMMA = 0.5772156649015329
+
+# per-worker view of the shared return matrix, set by _init_worker
+_SHARED = None
+
+
+def default_block(n: int) -> int:
+    """Mean block length for n bars (~n^(1/3), the usual rate for the stationary bootstrap)."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def bootstrap_indices(n: int, n_boot: int, block: int | None = None, method: str = "stationary",
+                      rng=None) -> np.ndarray:
+    """
+    (n_boot, n) int32 matrix of resampled bar positions.
+    method: "stationary" (blocks of geometric length with mean `block`, wrapping around),
+            "block" (circular moving blocks of exactly `block` bars) or "iid"
+    block: mean / fixed block length (default default_block(n))
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"method must be one of {BOOTSTRAP_METHODS}")
+    rng = np.random.default_rng(rng)
+    block = default_block(n) if block is None else int(block)
+    t = np.arange(n, dtype=np.int64)
+    if method == "iid" or block <= 1:
+        return rng.integers(0, n, (n_boot, n), dtype=np.int32)
+    if method == "block":
+        starts = rng.integers(0, n, (n_boot, -(-n // block), 1))
+        return ((starts + np.arange(block)).reshape(n_boot, -1)[:, :n] % n).astype(np.int32)
+    # stationary: a new block starts with probability 1/block at every bar (always at bar 0)
+    new = rng.random((n_boot, n)) < 1.0 / block
+    new[:, 0] = True
+    last = np.maximum.accumulate(np.where(new, t, 0), axis=1)  # bar where the current block started
+    starts = rng.integers(0, n, (n_boot, n))
+    return ((np.take_along_axis(starts, last, axis=1) + (t - last)) % n).astype(np.int32)
+
+
+def bootstrap_counts(idx: np.ndarray, n: int) -> np.ndarray:
+    """(resamples, n) float64 count of how often each bar appears in each row of `idx`."""
+    rows = idx.shape[0]
+    flat = (idx + (np.arange(rows, dtype=np.int64) * n)[:, None]).ravel()
+    return np.bincount(flat, minlength=rows * n).reshape(rows, n).astype(np.float64)
+
+
+def _chunks(n_boot: int, chunk: int, seed):
+    """[(rows, child seed)] covering n_boot resamples."""
+    sizes = [min(chunk, n_boot - a) for a in range(0, n_boot, chunk)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _map_chunks(fn, arrays, jobs, workers, progress=None):
+    """
+    fn(arrays, *job) for every job, inline or in a process pool over shared-memory copies of `arrays`.
+    progress: optional callback(done, total) as chunks finish
+    """
+    if workers == 1 or len(jobs) <= 1:
+        out = []
+        for job in jobs:
+            out.append(fn(arrays, *job))
+            if progress is not None:
+                progress(len(out), len(jobs))
+        return out
+    parts = [np.ascontiguousarray(a, dtype=np.float64) for a in arrays]
+    shm = shared_memory.SharedMemory(create=True, size=max(sum(a.nbytes for a in parts), 1))
+    try:
+        offset, specs = 0, []
+        for a in parts:
+            np.ndarray(a.shape, dtype=np.float64, buffer=shm.buf, offset=offset)[...] = a
+            specs.append((a.shape, offset))
+            offset += a.nbytes
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shm.name, specs)) as ex:
+            out = []
+            for res in ex.map(_shared_call, [fn] * len(jobs), jobs):
+                out.append(res)
+                if progress is not None:
+                    progress(len(out), len(jobs))
+            return out
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _init_worker(name, specs):
+    global _SHARED
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED = (shm, tuple(np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=off) for shape, off in specs))
+
+
+def _shared_call(fn, job):
+    return fn(_SHARED[1], *job)
+
+
+def _label(names, j: int):
+    """Column label of position j with NumPy scalars turned into plain Python values."""
+    if names is None:
+        return j
+    label = names[j]
+    return tuple(getattr(v, "item", lambda v=v: v)() for v in label) if isinstance(label, tuple) else label
+
+
+# ------------------ confidence intervals for one strategy ------------------
+def _metrics_chunk(arrays, rows, seed, block, method, periods_per_year, rf):
+    r, p = arrays
+    idx = bootstrap_indices(len(r), rows, block, method, np.random.default_rng(seed))
+    R = np.ascontiguousarray(r[idx].T)  # (bars, resamples)
+    E = np.cumprod(1.0 + R, axis=0)
+    P = np.ascontiguousarray(p[idx].T) if p.size else None
+    m = compute_all_metrics(R, E, P, periods_per_year, rf)
+    return m[CI_METRICS].to_numpy(dtype=np.float64)
+
+
+def bootstrap_metrics(returns, positions=None, n_boot: int = 2000, block: int | None = None,
+                      method: str = "stationary", periods_per_year=252, rf=0.0, seed=None,
+                      workers: int | None = 1, chunk: int | None = None, progress=None) -> pd.DataFrame:
+    """
+    Metrics of `n_boot` bootstrap resamples of one return series.
+    returns: (bars,) strategy returns, e.g. run_backtest(...)["ret_strategy"]
+    positions: optional exposure per bar, resampled alongside (for hit rate / exposure)
+    workers: processes (1 = inline, None = CPU count)
+    chunk: resamples per task (default: ~16 MB of resampled returns, at most 256)
+    progress: optional callback(done, total) per chunk of resamples (e.g. src.jobs.Job.report)
+    Returns a DataFrame with one row per resample and CI_METRICS columns.
+    """
+    r = np.asarray(returns, dtype=np.float64).ravel()
+    p = np.empty(0) if positions is None else np.asarray(positions, dtype=np.float64).ravel()
+    if len(r) < 2:
+        raise ValueError("Need at least 2 bars to bootstrap.")
+    chunk = chunk or max(1, min(256, 2**21 // len(r)))
+    jobs = [(rows, seed_, block, method, periods_per_year, rf) for rows, seed_ in _chunks(n_boot, chunk, seed)]
+    out = np.vstack(_map_chunks(_metrics_chunk, (r, p), jobs, workers, progress))
+    return pd.DataFrame(out, columns=CI_METRICS)
+
+
+def bootstrap_ci(returns, positions=None, n_boot: int = 2000, alpha: float = 0.05, **kw) -> pd.DataFrame:
+    """
+    Percentile confidence intervals for every metric of one return series.
+    kw: passed to bootstrap_metrics (block, method, periods_per_year, rf, seed, workers, chunk, progress)
+    Returns a DataFrame indexed by metric: estimate (full sample), mean, std, lo, hi
+    (the alpha/2 and 1 - alpha/2 quantiles of the resampled values).
+    """
+    r = np.asarray(returns, dtype=np.float64).ravel()
+    boot = bootstrap_metrics(r, positions, n_boot, **kw)
+    ppy, rf = kw.get("periods_per_year", 252), kw.get("rf", 0.0)
+    point = compute_all_metrics(r, np.cumprod(1.0 + r), positions, ppy, rf)
+    return pd.DataFrame({
+        "estimate": [point[c] for c in CI_METRICS],
+        "mean": boot.mean(),
+        "std": boot.std(ddof=1),
+        "lo": boot.quantile(alpha / 2),
+        "hi": boot.quantile(1 - alpha / 2),
+    }, index=pd.Index(CI_METRICS, name="metric"))
+
+
+# ------------------ data snooping across many strategies ------------------
+def pair_returns(prices, fasts, slows, costs: CostModel | None = None, periods_per_year=252) -> pd.DataFrame:
+    """
+    Strategy returns of every fast < slow MA pair (next-bar execution, like run_grid).
+    Returns a (bars, pairs) DataFrame with (fast, slow) MultiIndex columns.
+    """
+    from src.backtest import _simple_returns, _to_series
+    from src.signals import pair_signals
+
+    px = _to_series(prices, fallback_index=getattr(prices, "index", None), name="price").astype(float).dropna()
+    p = px.to_numpy()
+    signals = pair_signals(px, fasts, slows)
+    sig = signals.to_numpy(dtype=float)  # (bars, pairs)
+    ret = _simple_returns(p)
+    if costs is None:
+        R = np.zeros_like(sig)
+        R[1:] = sig[:-1] * ret[1:, None]
+    else:
+        R = apply_costs(ret, sig, costs, periods_per_year)["ret_strategy"]
+    return pd.DataFrame(R, index=px.index, columns=signals.columns)
+
+
+def _rc_chunk(arrays, rows, seed, block, method):
+    (D,) = arrays
+    n = D.shape[0]
+    C = bootstrap_counts(bootstrap_indices(n, rows, block, method, np.random.default_rng(seed)), n)
+    centred = (C @ D) / n - D.mean(axis=0)  # resampled minus full-sample mean excess return
+    return np.sqrt(n) * centred.max(axis=1)
+
+
+def reality_check(returns, benchmark=0.0, n_boot: int = 10_000, block: int | None = None,
+                  method: str = "stationary", seed=None, workers: int | None = 1, chunk: int | None = None,
+                  periods_per_year=252, progress=None) -> dict:
+    """
+    White's (2000) Reality Check: is the best of many tested strategies better than the
+    benchmark once the search is accounted for?
+    returns: (bars, strategies) array or DataFrame (e.g. pair_returns)
+    benchmark: scalar or (bars,) benchmark returns (0 = cash; ret_buyhold for buy & hold)
+    chunk: resamples per task (default: ~32 MB of bar counts)
+    progress: optional callback(done, total) per chunk
+    Returns {best, mean_excess (annualised), statistic, p_value, n_strategies, n_boot}; a small
+    p_value means the best strategy's edge is unlikely to come from data snooping alone.
+    """
+    names = getattr(returns, "columns", None)
+    R = np.asarray(returns, dtype=np.float64)
+    R = R.reshape(len(R), -1)
+    D = R - np.asarray(benchmark, dtype=np.float64).reshape(-1, 1) if np.ndim(benchmark) else R - float(benchmark)
+    n, k = D.shape
+    if n < 2 or k == 0:
+        raise ValueError("Need at least 2 bars and 1 strategy.")
+    fbar = D.mean(axis=0)
+    stat = math.sqrt(n) * fbar.max()
+    chunk = chunk or max(1, 2**22 // n)
+    jobs = [(rows, seed_, block, method) for rows, seed_ in _chunks(n_boot, chunk, seed)]
+    null = np.concatenate(_map_chunks(_rc_chunk, (D,), jobs, workers, progress))
+    best = int(fbar.argmax())
+    return {
+        "best": _label(names, best),
+        "mean_excess": float(fbar[best] * periods_per_year),
+        "statistic": float(stat),
+        "p_value": float((null >= stat).mean()),
+        "n_strategies": k,
+        "n_boot": int(n_boot),
+    }
+
+
+def probabilistic_sharpe(returns, sr_benchmark: float = 0.0) -> float:
+    """
+    P(true Sharpe > sr_benchmark) given the sample's length, skew and kurtosis
+    (Bailey & Lopez de Prado). Both Sharpe ratios are per bar, not annualised.
+    """
+    r = np.asarray(returns, dtype=np.float64).ravel()
+    n = len(r)
+    sd = r.std(ddof=1) if n > 1 else 0.0
+    if sd == 0:
+        return float("nan")
+    sr = r.mean() / sd
+    z = (r - r.mean()) / r.std()
+    skew, kurt = float((z ** 3).mean()), float((z ** 4).mean())
+    denom = 1.0 - skew * sr + (kurt - 1.0) / 4.0 * sr * sr
+    if denom <= 0:
+        return float("nan")
+    return NormalDist().cdf((sr - sr_benchmark) * math.sqrt(n - 1) / math.sqrt(denom))
+
+
+def deflated_sharpe(returns, selected=None, n_trials: int | None = None, periods_per_year=252) -> dict:
+    """
+    Deflated Sharpe ratio (Bailey & Lopez de Prado 2014) of the selected strategy among
+    all tested ones: the probability its true Sharpe is above what the best of `n_trials`
+    zero-skill strategies would show, given the spread of the tested Sharpe ratios.
+    returns: (bars, strategies) array or DataFrame, one column per tested strategy
+    selected: column position (or label) that was picked (default: highest Sharpe)
+    n_trials: number of independent trials (default: number of columns)
+    Returns {selected, sharpe, sr0 (both annualised), dsr, psr (vs 0), n_trials}.
+    """
+    names = getattr(returns, "columns", None)
+    R = np.asarray(returns, dtype=np.float64)
+    R = R.reshape(len(R), -1)
+    sd = R.std(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        srs = np.where(sd > 0, R.mean(axis=0) / sd, np.nan)
+    if selected is None:
+        j = int(np.nanargmax(srs))
+    elif names is not None and not isinstance(selected, (int, np.integer)):
+        j = int(names.get_loc(selected))
+    else:
+        j = int(selected)
+    trials = int(n_trials or R.shape[1])
+    finite = srs[np.isfinite(srs)]
+    sr_sd = finite.std(ddof=1) if len(finite) > 1 else 0.0
+    if trials > 1:
+        nd = NormalDist()
+        sr0 = sr_sd * ((1 - EULER_GAMMA) * nd.inv_cdf(1 - 1 / trials) + EULER_GAMMA * nd.inv_cdf(1 - 1 / (trials * math.e)))
+    else:
+        sr0 = 0.0
+    ann = math.sqrt(periods_per_year)
+    return {
+        "selected": _label(names, j),
+        "sharpe": float(srs[j] * ann),
+        "sr0": float(sr0 * ann),
+        "dsr": probabilistic_sharpe(R[:, j], sr0),
+        "psr": probabilistic_sharpe(R[:, j], 0.0),
+        "n_trials": trials,
+    }
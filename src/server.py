@@ -0,0 +1,606 @@
+# src/server.py
+"""
+Headless HTTP API over the backtest core, for other systems to call.
+
+    python -m src.server --port 8000 --store .trendedge/prices
+    curl -s localhost:8000/backtest -d '{"symbol": "SPY", "fast": 20, "slow": 50}'
+    curl -s 'localhost:8000/sweep?format=arrow' -d '{"symbol": "SPY", "fasts": [5, 10, 20], "slows": [50, 100]}' -o grid.arrow
+
+A Starlette (ASGI) app served by uvicorn (`uvicorn --factory src.server:create_app`
+works too):
+
+    POST /backtest  {symbol, fast, slow}      metrics for the strategy and buy & hold
+                                              ("series": true adds the per-bar results)
+    POST /sweep     {symbol, fasts, slows}    run_grid table (cagr / sharpe / max_dd per pair)
+    POST /batch     {symbols, fast, slow}     one src.batch-style row per symbol
+    GET  /health, GET /stats
+
+Every endpoint also takes start / end (YYYY-MM-DD), bar (1D or an intraday bar
+size served from the minute store) and costs (src.costs.CostModel arguments),
+and accepts the same fields as a query string (lists comma-separated) on GET.
+Responses are JSON, or an Arrow IPC stream with `?format=arrow` or
+`Accept: application/vnd.apache.arrow.stream`; the Arrow table is the tabular
+result (per-bar results for /backtest) and everything else — parameters,
+metrics — is JSON in its schema metadata under b"trendedge".
+
+Requests for the same symbol share their work. PricePool keeps each loaded
+series with its fingerprint and one IndicatorEngine: concurrent requests for a
+symbol that is not loaded yet wait on a single load instead of each reading
+the store, and every moving average is computed once per series (the engine
+memoises SMA nodes over one cumulative sum), whichever request asks first.
+Identical requests in flight attach to one JobRunner job, and results are kept
+in a ResultCache keyed by the data fingerprint, as in the app.
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from src.backtest import run_backtest
+from src.batch import RESULT_COLUMNS
+from src.cache import ResultCache, cache_key, fingerprint
+from src.costs import CostModel
+from src.data import close_prices, select_symbol
+from src.indicators import IndicatorEngine
+from src.jobs import JobRunner
+from src.metrics import bars_per_year, compute_all_metrics
+from src.signals import ma_signals
+from src.sweep import SweepStore
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+BAR_SIZES = ("1D", "1h", "30min", "15min", "5min", "1min")  # as in the app's sidebar
+MAX_PAIRS = 250_000
+MAX_SYMBOLS = 2_000
+
+
+class NoData(LookupError):
+    """No prices for the requested symbol / range (HTTP 404)."""
+
+
+def default_loader(store_dir=None, minute_dir=None):
+    """
+    loader(symbol, start, end, bar) -> (DataFrame, error) like the app's fetch_prices:
+    daily bars from a src.store.PriceStore, intraday bar sizes from a src.intraday.MinuteStore.
+    """
+    from src.intraday import DEFAULT_MINUTE_DIR, MinuteStore
+    from src.store import DEFAULT_ROOT, PriceStore
+
+    prices = PriceStore(store_dir or DEFAULT_ROOT)
+    minutes = MinuteStore(minute_dir or DEFAULT_MINUTE_DIR)
+
+    def load(symbol, start=None, end=None, bar="1D"):
+        if bar != "1D":
+            return minutes.get(symbol, None if bar == "1min" else bar, start, end)
+        return prices.get(symbol, start, end)
+    return load
+
+
+class Prices:
+    """
+    One loaded close series as served to requests; shared (read-only) by all of them.
+    key: data fingerprint (results are cached under it)
+    engine: IndicatorEngine over px, so each moving average is computed once per series
+    """
+
+    def __init__(self, symbol: str, bar: str, px: pd.Series):
+        self.symbol, self.bar, self.px = symbol, bar, px
+        self.key = fingerprint(px)
+        self.periods_per_year = bars_per_year(px.index)
+        self.engine = IndicatorEngine(px)
+        self.loaded_at = time.time()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Prices({self.symbol!r}, {self.bar}, {len(self.px)} bars)"
+
+    def signal(self, fast: int, slow: int) -> pd.Series:
+        """ma_signals over the shared engine (the engine's memo is not thread-safe, hence the lock)."""
+        with self._lock:
+            return ma_signals(self.px, fast, slow, engine=self.engine)
+
+    @property
+    def sma_count(self) -> int:
+        return sum(1 for key in self.engine.evaluated if key[0] == "sma")
+
+
+class _Flight:
+    """A load in progress; requests for the same series wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = (None, "Load was interrupted.")
+
+
+class PricePool:
+    """
+    loader: callable(symbol, start, end, bar) -> (DataFrame, error), e.g. default_loader()
+    ttl: seconds a loaded series is served before the loader is asked again (for new bars);
+         a reload with unchanged data keeps the old Prices and so its moving averages
+    max_series: loaded series kept; the least recently used are dropped
+    """
+
+    def __init__(self, loader=None, ttl: float = 60.0, max_series: int = 256):
+        self.loader = default_loader() if loader is None else loader
+        self.ttl, self.max_series = ttl, max_series
+        self._series = OrderedDict()  # (symbol, start, end, bar) -> Prices, oldest first
+        self._loading = {}            # same key -> _Flight
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "coalesced": 0, "hits": 0, "failed": 0}
+
+    def __len__(self):
+        return len(self._series)
+
+    @property
+    def sma_count(self) -> int:
+        """Moving averages computed over the series currently held."""
+        with self._lock:
+            return sum(p.sma_count for p in self._series.values())
+
+    def get(self, symbol: str, start=None, end=None, bar: str = "1D") -> tuple[Prices | None, str | None]:
+        """(Prices, None) or (None, error). Concurrent calls for the same series share one load."""
+        key = (symbol.upper(), start, end, bar)
+        with self._lock:
+            hit = self._series.get(key)
+            if hit is not None and time.time() - hit.loaded_at < self.ttl:
+                self._series.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit, None
+            flight = self._loading.get(key)
+            lead = flight is None
+            if lead:
+                flight = self._loading[key] = _Flight()
+                self.stats["loads"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not lead:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = self._load(*key)
+        except Exception as e:
+            flight.result = (None, f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                del self._loading[key]
+                prices, _ = flight.result
+                if prices is None:
+                    self.stats["failed"] += 1
+                else:
+                    if hit is not None and hit.key == prices.key:  # unchanged data: keep its moving averages
+                        hit.loaded_at = prices.loaded_at
+                        prices = hit
+                        flight.result = (hit, None)
+                    self._series[key] = prices
+                    self._series.move_to_end(key)
+                    while len(self._series) > self.max_series:
+                        self._series.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def _load(self, symbol, start, end, bar) -> tuple[Prices | None, str | None]:
+        df, err = self.loader(symbol, start, end, bar)
+        if err or df is None or df.empty:
+            return None, err or "No data found for that symbol/date range."
+        px = close_prices(select_symbol(df, symbol))
+        if px.empty:
+            return None, "No prices in the data returned for that symbol."
+        return Prices(symbol, bar, px), None
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _check_windows(fast: int, slow: int, bars: int | None = None):
+    if fast < 1 or slow < 1:
+        raise ValueError("MA window lengths must be positive integers.")
+    if fast >= slow:
+        raise ValueError("Fast MA must be strictly smaller than Slow MA.")
+    if bars is not None and bars < slow:
+        raise ValueError(f"Not enough data ({bars} bars) for a {slow}-bar moving average.")
+
+
+def _about(p: Prices, costs) -> dict:
+    return {"symbol": p.symbol, "bar": p.bar, "bars": len(p.px), "start": p.px.index[0], "end": p.px.index[-1],
+            "periods_per_year": p.periods_per_year, "costs": vars(costs) if costs is not None else None}
+
+
+class BacktestService:
+    """
+    The API's work without the HTTP layer (usable in-process too).
+    prices: PricePool (default: the local price and minute stores)
+    sweeps: SweepStore for /sweep (the same saved cubes as the app's heatmap)
+    cache: ResultCache for backtests and sweeps
+    workers: JobRunner threads; io_workers: parallel loads for batch()
+    Methods return (table, summary dict) and raise ValueError for bad parameters and
+    NoData when there are no prices.
+    """
+
+    def __init__(self, prices: PricePool | None = None, sweeps: SweepStore | None = None,
+                 cache: ResultCache | None = None, workers: int = 4, io_workers: int = 8):
+        self.prices = PricePool() if prices is None else prices
+        self.sweeps = SweepStore() if sweeps is None else sweeps
+        self.cache = ResultCache() if cache is None else cache
+        self.runner = JobRunner(max_workers=workers, keep=64)
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="trendedge-load")
+
+    def close(self):
+        self.runner.shutdown()
+        self._io.shutdown(wait=False, cancel_futures=True)
+
+    def load(self, symbol: str, start=None, end=None, bar: str = "1D") -> Prices:
+        if bar not in BAR_SIZES:
+            raise ValueError(f"bar must be one of {list(BAR_SIZES)}")
+        p, err = self.prices.get(symbol, start, end, bar)
+        if p is None:
+            raise NoData(err)
+        return p
+
+    # ---- jobs ----
+    def _submit(self, key: str, fn, label: str):
+        """fn() on the job runner, through the result cache; identical keys in flight share one job."""
+        return self.runner.submit(key, lambda job: self.cache.get_or_compute(key, fn), label=label)
+
+    @staticmethod
+    def _result(job):
+        job.wait()
+        if job.status != "done":
+            raise RuntimeError(job.error or f"Job {job.status}")
+        return job.result
+
+    def _backtest_job(self, p: Prices, fast: int, slow: int, costs):
+        def compute():
+            sig = p.signal(fast, slow)
+            res = run_backtest(p.px, sig, costs=costs, periods_per_year=p.periods_per_year)
+            m = compute_all_metrics(res[["ret_strategy", "ret_buyhold"]], res[["eq_strategy", "eq_buyhold"]],
+                                    periods_per_year=p.periods_per_year)
+            m.index = ["strategy", "buyhold"]
+            return res.assign(signal=sig.to_numpy(np.int8)), m.to_dict("index")
+        key = cache_key("api.backtest", p.key, fast=fast, slow=slow, costs=costs)
+        return self._submit(key, compute, f"Backtest {p.symbol} {fast}/{slow}")
+
+    # ---- endpoints ----
+    def backtest(self, symbol: str, fast: int, slow: int, start=None, end=None, bar: str = "1D",
+                 costs: CostModel | None = None) -> tuple[pd.DataFrame, dict]:
+        """(run_backtest results + signal column, summary with metrics for "strategy" and "buyhold")."""
+        p = self.load(symbol, start, end, bar)
+        _check_windows(fast, slow, len(p.px))
+        res, m = self._result(self._backtest_job(p, fast, slow, costs))
+        return res, {**_about(p, costs), "fast": fast, "slow": slow, "metrics": m}
+
+    def sweep(self, symbol: str, fasts, slows, start=None, end=None, bar: str = "1D",
+              costs: CostModel | None = None) -> tuple[pd.DataFrame, dict]:
+        """(run_grid table for every fast < slow pair, summary with the best pair by Sharpe)."""
+        fasts, slows = np.unique(np.asarray(fasts, dtype=np.int64)), np.unique(np.asarray(slows, dtype=np.int64))
+        if not len(fasts) or not len(slows) or fasts[0] < 1 or slows[0] < 1:
+            raise ValueError("fasts and slows must be non-empty lists of positive integers.")
+        pairs = int((fasts[:, None] < slows[None, :]).sum())
+        if not pairs:
+            raise ValueError("The grid has no fast < slow pair.")
+        if pairs > MAX_PAIRS:
+            raise ValueError(f"The grid has {pairs:,} pairs; at most {MAX_PAIRS:,} per request.")
+        p = self.load(symbol, start, end, bar)
+        key = cache_key("api.sweep", p.key, fasts=tuple(fasts.tolist()), slows=tuple(slows.tolist()), costs=costs)
+        cube = self._result(self._submit(
+            key, lambda: self.sweeps.sweep(p.symbol, p.px, fasts, slows, costs, periods_per_year=p.periods_per_year),
+            f"Sweep {p.symbol} {len(fasts)}x{len(slows)}"))
+        best = cube.best("sharpe")
+        return cube.to_table(), {**_about(p, costs), "pairs": pairs,
+                                 "best": dict(zip(("fast", "slow", "sharpe"), best)) if best else None}
+
+    def batch(self, symbols, fast: int, slow: int, start=None, end=None, bar: str = "1D",
+              costs: CostModel | None = None) -> tuple[pd.DataFrame, dict]:
+        """
+        (one row per symbol with src.batch's RESULT_COLUMNS, summary). Symbols are loaded in
+        parallel and backtested as separate jobs, so they share loads, moving averages and
+        cached results with concurrent /backtest requests. Failed symbols get an error row.
+        """
+        symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+        if not symbols:
+            raise ValueError("symbols must be a non-empty list.")
+        if len(symbols) > MAX_SYMBOLS:
+            raise ValueError(f"{len(symbols):,} symbols; at most {MAX_SYMBOLS:,} per request.")
+        if bar not in BAR_SIZES:
+            raise ValueError(f"bar must be one of {list(BAR_SIZES)}")
+        _check_windows(fast, slow)
+
+        loaded = list(self._io.map(lambda s: self.prices.get(s, start, end, bar), symbols))
+        rows, jobs = {}, {}
+        for sym, (p, err) in zip(symbols, loaded):
+            if p is None:
+                rows[sym] = {"error": err}
+            elif len(p.px) < slow:
+                rows[sym] = {"error": f"Not enough data ({len(p.px)} bars) for a {slow}-bar moving average."}
+            else:
+                jobs[sym] = p, self._backtest_job(p, fast, slow, costs)
+        for sym, (p, job) in jobs.items():
+            try:
+                _, m = self._result(job)
+            except RuntimeError as e:
+                rows[sym] = {"error": str(e)}
+                continue
+            rows[sym] = {"bars": len(p.px), "start": str(p.px.index[0])[:10], "end": str(p.px.index[-1])[:10],
+                         **{f"{c}_{side}": m[side][c] for c in ("cagr", "sharpe", "max_dd")
+                            for side in ("strategy", "buyhold")}}
+        table = pd.DataFrame([{"symbol": s, "fast": fast, "slow": slow, "error": None, **rows[s]} for s in symbols])
+        table = table.reindex(columns=list(RESULT_COLUMNS)).astype(RESULT_COLUMNS)
+        return table, {"symbols": len(symbols), "failed": int(table["error"].notna().sum()), "fast": fast, "slow": slow,
+                       "bar": bar, "costs": vars(costs) if costs is not None else None}
+
+    def stats(self) -> dict:
+        return {
+            "prices": {**self.prices.stats, "series": len(self.prices), "sma_computed": self.prices.sma_count},
+            "jobs": dict(self.runner.stats),
+            "cache": {**self.cache.stats, "entries": len(self.cache)},
+        }
+
+
+# ---- encoding ----
+def _jsonable(obj):
+    """Plain JSON values: NaN / inf -> None, NumPy scalars -> Python, timestamps -> ISO strings."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if obj is None or obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, date)):
+        return obj.isoformat()
+    return obj
+
+
+def columns_json(df: pd.DataFrame, index: bool = False) -> dict:
+    """Column-oriented JSON of a table, {column: [values]}, with the index first when index=True."""
+    if index:
+        df = df.reset_index()
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_float_dtype(s.dtype):
+            a = s.to_numpy(dtype=np.float64)
+            vals = a.astype(object)
+            vals[~np.isfinite(a)] = None
+            out[str(c)] = vals.tolist()
+        else:
+            out[str(c)] = [_jsonable(v) for v in s.tolist()]
+    return out
+
+
+def arrow_bytes(table: pd.DataFrame, meta: dict | None = None, index: bool = False) -> bytes:
+    """Arrow IPC stream of `table`, with `meta` as JSON in the schema metadata under b"trendedge"."""
+    import pyarrow as pa
+
+    t = pa.Table.from_pandas(table, preserve_index=index)
+    if meta is not None:
+        t = t.replace_schema_metadata({**(t.schema.metadata or {}), b"trendedge": json.dumps(_jsonable(meta)).encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, t.schema) as writer:
+        writer.write_table(t)
+    return sink.getvalue().to_pybytes()
+
+
+def read_arrow(body: bytes) -> tuple[pd.DataFrame, dict]:
+    """Client side of arrow_bytes: (table, summary dict)."""
+    import pyarrow as pa
+
+    t = pa.ipc.open_stream(body).read_all()
+    return t.to_pandas(), json.loads((t.schema.metadata or {}).get(b"trendedge", b"{}"))
+
+
+# ---- HTTP ----
+async def _params(request) -> dict:
+    if request.method == "GET":
+        return {k: v for k, v in request.query_params.items() if k != "format"}
+    body = await request.body()
+    params = json.loads(body) if body.strip() else {}
+    if not isinstance(params, dict):
+        raise ValueError("The request body must be a JSON object.")
+    return params
+
+
+def _int(params: dict, name: str) -> int:
+    if params.get(name) is None:
+        raise ValueError(f"{name} is required.")
+    try:
+        return int(params[name])
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {params[name]!r}") from None
+
+
+def _list(params: dict, name: str) -> list:
+    v = params.get(name)
+    if v is None:
+        raise ValueError(f"{name} is required.")
+    if isinstance(v, str):
+        v = [x for x in v.split(",") if x.strip()]
+    if not isinstance(v, list):
+        raise ValueError(f"{name} must be a list.")
+    return v
+
+
+def _ints(params: dict, name: str) -> list[int]:
+    try:
+        return [int(x) for x in _list(params, name)]
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a list of integers.") from None
+
+
+def _common(params: dict) -> dict:
+    """start, end, bar and costs of a request (validated)."""
+    out = {"bar": str(params.get("bar") or "1D")}
+    for k in ("start", "end"):
+        out[k] = date.fromisoformat(str(params[k])) if params.get(k) else None
+    costs = params.get("costs")
+    if isinstance(costs, str):
+        costs = json.loads(costs)
+    if costs is not None:
+        if not isinstance(costs, dict):
+            raise ValueError("costs must be an object of CostModel arguments.")
+        try:
+            costs = CostModel(**costs)
+        except TypeError as e:
+            raise ValueError(f"costs: {e}") from None
+    out["costs"] = costs
+    return out
+
+
+def _wants_arrow(request) -> bool:
+    fmt = request.query_params.get("format")
+    if fmt is not None:
+        if fmt not in ("json", "arrow"):
+            raise ValueError("format must be json or arrow.")
+        return fmt == "arrow"
+    return "application/vnd.apache.arrow" in request.headers.get("accept", "")
+
+
+def _respond(request, table: pd.DataFrame, meta: dict, field: str, index: bool = False, include: bool = True):
+    if _wants_arrow(request):
+        return Response(arrow_bytes(table, meta, index=index), media_type=ARROW_MIME)
+    payload = _jsonable(meta)
+    if include:
+        payload[field] = columns_json(table, index=index)
+    return JSONResponse(payload)
+
+
+def _endpoint(handler):
+    """Map NoData to 404, bad parameters to 400 and failed jobs to 500, each as {"error": ...}."""
+    async def endpoint(request):
+        try:
+            return await handler(request)
+        except NoData as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except RuntimeError as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+    return endpoint
+
+
+def create_app(service: BacktestService | None = None) -> Starlette:
+    """The ASGI app (service defaults to one over the local price / minute stores)."""
+    service = BacktestService() if service is None else service
+
+    async def backtest(request):
+        q = await _params(request)
+        res, meta = await run_in_threadpool(service.backtest, str(q.get("symbol") or ""),
+                                            _int(q, "fast"), _int(q, "slow"), **_common(q))
+        series = str(q.get("series", "")).lower() in ("1", "true")
+        return _respond(request, res, meta, "series", index=True, include=series)
+
+    async def sweep(request):
+        q = await _params(request)
+        table, meta = await run_in_threadpool(service.sweep, str(q.get("symbol") or ""),
+                                              _ints(q, "fasts"), _ints(q, "slows"), **_common(q))
+        return _respond(request, table, meta, "table")
+
+    async def batch(request):
+        q = await _params(request)
+        table, meta = await run_in_threadpool(service.batch, _list(q, "symbols"),
+                                              _int(q, "fast"), _int(q, "slow"), **_common(q))
+        return _respond(request, table, meta, "table")
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    async def stats(request):
+        return JSONResponse(_jsonable(service.stats()))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        service.close()
+
+    app = Starlette(routes=[
+        Route("/backtest", _endpoint(backtest), methods=["GET", "POST"]),
+        Route("/sweep", _endpoint(sweep), methods=["GET", "POST"]),
+        Route("/batch", _endpoint(batch), methods=["GET", "POST"]),
+        Route("/health", health),
+        Route("/stats", stats),
+    ], lifespan=lifespan)
+    app.state.service = service
+    return app
+
+
+class LocalServer:
+    """
+    The API served by uvicorn on a background thread, e.g. for load tests:
+
+        with LocalServer(create_app(BacktestService(PricePool(loader)))) as srv:
+            requests.post(srv.url + "/backtest", json={"symbol": "AAA", "fast": 20, "slow": 50})
+    """
+
+    def __init__(self, app=None, host: str = "127.0.0.1", port: int = 0, log_level: str = "warning"):
+        import uvicorn
+
+        # port 0 = any free port (see url once started)
+        self._server = uvicorn.Server(uvicorn.Config(create_app() if app is None else app, host=host, port=port, log_level=log_level))
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 10.0):
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.server",
+                                 description="HTTP API for backtests, parameter sweeps and batch runs.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--store", default=None, help="price store directory (default: TRENDEDGE_DATA_DIR or .trendedge/prices)")
+    ap.add_argument("--minutes", default=None, help="minute store directory for intraday bars")
+    ap.add_argument("--sweeps", default=None, help="saved sweep cubes directory (default: TRENDEDGE_SWEEP_DIR)")
+    ap.add_argument("--workers", type=int, default=4, help="backtest / sweep job threads")
+    ap.add_argument("--ttl", type=float, default=60.0, help="seconds before a loaded series is checked for new bars")
+    ap.add_argument("--log-level", default="warning")
+    args = ap.parse_args(argv)
+
+    import uvicorn
+
+    service = BacktestService(PricePool(default_loader(args.store, args.minutes), ttl=args.ttl),
+                              SweepStore(args.sweeps) if args.sweeps else None, workers=args.workers)
+    print(f"serving http://{args.host}:{args.port}  (Ctrl+C to stop)", file=sys.stderr)
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,106 @@
+import numpy as np
 import pandas as pd
 
-def ma_signals(prices: pd.Series, fast: int, slow: int) -> pd.Series:
-    f = prices.rolling(fast).mean()
-    s = prices.rolling(slow).mean()
-    return (f > s).astype(int)  # 1=long, 0=flat
+from src.indicators import IndicatorEngine
+
+def ma_signals(prices: pd.Series, fast: int, slow: int, engine=None) -> pd.Series:
+    """
+    engine: optional src.indicators.IndicatorEngine over `prices`, so the MAs are
+            shared with charts/features that need them too
+    """
+    engine = IndicatorEngine(prices) if engine is None else engine
+    f = engine.node(("sma", "close", int(fast)))
+    s = engine.node(("sma", "close", int(slow)))
+    with np.errstate(invalid="ignore"):
+        return pd.Series((f > s).astype(int), index=prices.index)  # 1=long, 0=flat
+
+
+def sma_matrix(prices, windows) -> np.ndarray:
+    """
+    Simple moving averages for many windows from a single cumulative-sum pass.
+    Returns an array of shape (len(windows), len(prices)); bars before a full
+    window are NaN, matching prices.rolling(w).mean().
+    """
+    p = np.asarray(prices, dtype=float).ravel()
+    windows = np.asarray(windows, dtype=int).ravel()
+    n = len(p)
+    out = np.full((len(windows), n), np.nan)
+    if n == 0:
+        return out
+
+    # centre on the first price so long histories don't lose precision in the sum
+    base = p[0]
+    cs = np.concatenate(([0.0], np.cumsum(p - base)))
+    for i, w in enumerate(windows):
+        if w < 1:
+            raise ValueError(f"MA window must be a positive integer, got {w}")
+        if w > n:
+            continue
+        out[i, w - 1:] = (cs[w:] - cs[:-w]) / w + base
+    return out
+
+
+def pair_signals(prices: pd.Series, fasts, slows) -> pd.DataFrame:
+    """
+    ma_signals for every fast < slow pair of a sweep at once, e.g. for src.trades.trade_list.
+    Returns an int8 (bars, pairs) DataFrame (1=long, 0=flat) with (fast, slow) MultiIndex columns.
+    """
+    fasts = np.unique(np.asarray(fasts, dtype=int).ravel())
+    slows = np.unique(np.asarray(slows, dtype=int).ravel())
+    f, s = (a.ravel() for a in np.meshgrid(fasts, slows, indexing="ij"))
+    keep = f < s
+    f, s = f[keep], s[keep]
+    p = np.asarray(prices, dtype=float).ravel()
+    ma_f, ma_s = sma_matrix(p, fasts), sma_matrix(p, slows)
+    with np.errstate(invalid="ignore"):
+        sig = (ma_f[np.searchsorted(fasts, f)] > ma_s[np.searchsorted(slows, s)]).T.astype(np.int8)
+    return pd.DataFrame(sig, index=getattr(prices, "index", None),
+                        columns=pd.MultiIndex.from_arrays([f, s], names=["fast", "slow"]))
+
+
+def panel_ma_signals(panel, fast: int, slow: int, field: str | None = None, chunk: int = 512) -> np.ndarray:
+    """
+    ma_signals for every symbol of a src.panel.PricePanel at once.
+    MAs run over each symbol's own bars (dates it has no bar are skipped, as if the
+    series had been dropna()'d), and the position is held across those dates.
+    chunk: symbols per pass (bounds the float64 scratch memory)
+    Returns an int8 array (dates, symbols): 1=long, 0=flat.
+    """
+    fast, slow = int(fast), int(slow)
+    if fast < 1 or slow < 1:
+        raise ValueError("MA window lengths must be positive integers.")
+    X, M = panel.field(field), panel.mask
+    n, k = M.shape
+    out = np.zeros((n, k), dtype=np.int8)
+    for a in range(0, k, chunk):
+        Mc = M[:, a:a + chunk].T
+        # each symbol's valid bars, back to back: one ragged 1-D pass for the whole chunk
+        v = X[:, a:a + chunk].T[Mc].astype(np.float64)
+        counts = Mc.sum(axis=1)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        row = np.repeat(np.arange(len(counts)), counts)
+        rank = np.arange(len(v)) - starts[row]
+        base = np.zeros(len(counts))
+        base[counts > 0] = v[starts[counts > 0]]
+        base = base[row]  # centre each symbol on its first price, like sma_matrix
+        cs = np.concatenate(([0.0], np.cumsum(v - base)))
+
+        def sma(w):
+            out_ = np.empty(len(v))
+            out_[:w - 1] = np.nan
+            body = out_[w - 1:]
+            np.subtract(cs[w:], cs[:-w], out=body)
+            body /= w
+            body += base[w - 1:]
+            out_[rank < w - 1] = np.nan  # windows reaching back into the previous symbol
+            return out_
+
+        dense = np.zeros(Mc.shape, dtype=np.int8)
+        with np.errstate(invalid="ignore"):
+            dense[Mc] = sma(fast) > sma(slow)
+        if not Mc.all():
+            # hold the last position over dates without a bar
+            src = np.maximum.accumulate(np.where(Mc, np.arange(n), 0), axis=1)
+            dense = np.take_along_axis(dense, src, axis=1)
+        out[:, a:a + chunk] = dense.T
+    return out
@@ -0,0 +1,203 @@
+# src/store.py
+"""
+Local on-disk price store: one uncompressed Arrow/Feather file per symbol plus a
+small JSON sidecar with the last stored bar and when the source was last checked.
+
+Reads are memory-mapped, so a cold start only touches local disk. Refreshes
+fetch bars from the last stored date on from a pluggable `source` and append the
+new ones; if the refetched last bar no longer matches the stored one (history
+re-adjusted upstream after a split or dividend, or a provisional intraday bar),
+the whole history is downloaded again instead.
+A source is any callable `source(symbol, start, end) -> (DataFrame, err | None)`
+with a DatetimeIndex, e.g. src.data.download_prices (the default) or CSVSource.
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import PRICE_COLUMNS, download_prices
+
+DEFAULT_ROOT = os.environ.get("TRENDEDGE_DATA_DIR", ".trendedge/prices")
+
+
+class CSVSource:
+    """Serve prices from `<directory>/<SYMBOL>.csv` (first column = date). Handy offline stand-in for Yahoo."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def __call__(self, symbol: str, start=None, end=None) -> tuple[pd.DataFrame, str | None]:
+        path = self.directory / f"{symbol}.csv"
+        if not path.exists():
+            return pd.DataFrame(), f"No local file for {symbol}."
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df = _slice(df, start, end)
+        if df.empty:
+            return pd.DataFrame(), "Empty dataframe from local source."
+        return df, None
+
+
+class PriceStore:
+    """
+    root: directory holding the per-symbol files (created on first write)
+    source: callable used for the initial download and incremental refreshes
+    refresh_after: seconds before the source is asked again for new bars
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, source=None, refresh_after=60 * 30):
+        self.root = Path(root)
+        self.source = source or download_prices
+        self.refresh_after = refresh_after
+
+    # ---- paths / metadata ----
+    def _stem(self, symbol: str) -> Path:
+        return self.root / re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper())
+
+    def meta(self, symbol: str) -> dict | None:
+        """Sidecar metadata: symbol, rows, first_bar, last_bar, checked_at (epoch seconds)."""
+        try:
+            with open(self._stem(symbol).with_suffix(".json"), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, symbol: str, meta: dict):
+        path = self._stem(symbol).with_suffix(".json")
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, path)
+
+    def symbols(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(m["symbol"] for m in (self.meta(p.stem) for p in self.root.glob("*.json")) if m)
+
+    # ---- read / write ----
+    def read(self, symbol: str) -> pd.DataFrame:
+        """Stored history for symbol (empty DataFrame if none). Columns are zero-copy views over the mapped file."""
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        path = self._stem(symbol).with_suffix(".arrow")
+        if not path.exists():
+            return pd.DataFrame()
+        table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        df = table.to_pandas(split_blocks=True)
+        return df.set_index("Date")
+
+    def write(self, symbol: str, df: pd.DataFrame, checked_at: float | None = None):
+        """Replace the stored history for symbol with df (DatetimeIndex) and update its metadata."""
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        table = pa.Table.from_pandas(df.rename_axis("Date").reset_index(), preserve_index=False)
+
+        path = self._stem(symbol).with_suffix(".arrow")
+        tmp = path.with_suffix(".arrow.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)  # uncompressed, so reads can map it without decoding
+        os.replace(tmp, path)
+        self._write_meta(symbol, {
+            "symbol": symbol.upper(),
+            "rows": len(df),
+            "first_bar": df.index[0].isoformat() if len(df) else None,
+            "last_bar": df.index[-1].isoformat() if len(df) else None,
+            "checked_at": time.time() if checked_at is None else checked_at,
+        })
+
+    def append(self, symbol: str, new: pd.DataFrame, checked_at: float | None = None) -> int:
+        """Merge new bars into the stored history (new rows win on equal dates). Returns the stored row count."""
+        old = self.read(symbol)
+        df = pd.concat([old, new]) if not old.empty else new
+        df = df[~df.index.duplicated(keep="last")]
+        self.write(symbol, df, checked_at=checked_at)
+        return len(df)
+
+    def touch(self, symbol: str, checked_at: float | None = None):
+        """Record that the source was checked (nothing new) without rewriting the data."""
+        meta = self.meta(symbol)
+        if meta:
+            meta["checked_at"] = time.time() if checked_at is None else checked_at
+            self._write_meta(symbol, meta)
+
+    # ---- incremental refresh ----
+    def refresh(self, symbol: str, force: bool = False) -> str | None:
+        """
+        Bring symbol up to date: full download if nothing is stored, otherwise fetch
+        bars from the last stored date on and append the newer ones. If the refetched
+        last bar differs from the stored one, the history is reloaded in full.
+        Returns an error message or None.
+        """
+        symbol = symbol.upper()
+        meta = self.meta(symbol)
+        now = time.time()
+        if meta and not force and now - meta.get("checked_at", 0) < self.refresh_after:
+            return None
+
+        if not meta or not meta.get("last_bar"):
+            df, err = self.source(symbol, None, None)
+            if err or df.empty:
+                return err or "Empty dataframe from source."
+            self.write(symbol, df, checked_at=now)
+            return None
+
+        last = pd.Timestamp(meta["last_bar"])
+        # refetch the last stored bar too: it is the overlap that tells whether history moved
+        new, err = self.source(symbol, last.date(), None)
+        if not err and not new.empty and last in new.index \
+                and not same_bar(self.read(symbol).loc[[last]].iloc[-1], new.loc[[last]].iloc[-1]):
+            # re-adjusted upstream (split / dividend) or a provisional bar: stored bars are on another basis
+            full, err = self.source(symbol, None, None)
+            if not err and not full.empty:
+                self.write(symbol, full, checked_at=now)
+                return None
+            new = full
+        if not err and not new.empty:
+            new = new[new.index > last]
+        if err or new.empty:
+            # nothing new (or the source is down): keep serving what we have, try again later
+            self.touch(symbol, now)
+            return None
+        self.append(symbol, new, checked_at=now)
+        return None
+
+    def get(self, symbol: str, start=None, end=None) -> tuple[pd.DataFrame, str | None]:
+        """Same contract as src.data.download_prices, served from disk after a (cheap) refresh check."""
+        symbol = symbol.upper()
+        try:
+            err = self.refresh(symbol)
+            df = self.read(symbol)
+        except Exception as e:
+            return pd.DataFrame(), f"{type(e).__name__}: {e}"
+        if df.empty:
+            return pd.DataFrame(), err or "No stored data."
+        df = _slice(df, start, end)
+        if df.empty:
+            return pd.DataFrame(), "No stored bars in the requested date range."
+        return df, None
+
+
+def same_bar(stored: pd.Series, fetched: pd.Series, rtol: float = 1e-6) -> bool:
+    """Whether two versions of one bar agree on the price columns they share (within float / CSV rounding)."""
+    cols = [c for c in PRICE_COLUMNS if c in stored.index and c in fetched.index]
+    a = pd.to_numeric(stored[cols], errors="coerce").to_numpy(dtype=np.float64)
+    b = pd.to_numeric(fetched[cols], errors="coerce").to_numpy(dtype=np.float64)
+    return bool(np.isclose(a, b, rtol=rtol, equal_nan=True).all())
+
+
+def _slice(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Rows with start <= date < end (end exclusive, like yfinance)."""
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df.index < pd.Timestamp(end)]
+    return df
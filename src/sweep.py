@@ -0,0 +1,196 @@
+# src/sweep.py
+"""
+Persisted parameter-sweep cubes behind the Strategy tab's heatmap.
+
+    store = SweepStore()
+    cube = store.sweep("SPY", px, fasts=range(5, 101, 5), slows=range(20, 301, 10), costs=costs)
+    cube.metric("sharpe")        # DataFrame: fast windows x slow windows
+    cube.best("sharpe")          # (fast, slow, value)
+
+A cube holds every run_grid score for a fast x slow grid as one float32 array
+(metrics, fasts, slows), NaN where fast >= slow. It is saved as a small .npz
+per ticker, bar range, bar size and cost model, together with the fingerprint of the
+prices it was computed from. Asking again for the same grid, or any sub-grid,
+reads the file instead of rescoring; asking for windows outside it scores
+only the missing rows/columns and grows the cube. New bars change the bar
+range (and the fingerprint), so a stale cube is never served.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import GRID_COLUMNS, run_grid
+from src.cache import fingerprint
+
+SWEEP_METRICS = ("cagr", "sharpe", "max_dd")
+DEFAULT_SWEEP_DIR = os.environ.get("TRENDEDGE_SWEEP_DIR", ".trendedge/sweeps")
+
+
+class SweepCube:
+    """
+    fasts, slows: sorted unique window lengths (the grid axes)
+    values: float32 array (len(SWEEP_METRICS), fasts, slows); NaN where fast >= slow or unscored
+    meta: free-form dict (ticker, first/last bar, data fingerprint, costs)
+    """
+
+    def __init__(self, fasts, slows, values, meta=None):
+        self.fasts = np.asarray(fasts, dtype=np.int64)
+        self.slows = np.asarray(slows, dtype=np.int64)
+        self.values = values
+        self.meta = dict(meta or {})
+        if values.shape != (len(SWEEP_METRICS), len(self.fasts), len(self.slows)):
+            raise ValueError(f"values {values.shape} don't match {len(self.fasts)} fasts x {len(self.slows)} slows")
+
+    def __repr__(self):
+        return f"SweepCube({len(self.fasts)} fasts x {len(self.slows)} slows, {self.scored} pairs scored)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.fasts.nbytes + self.slows.nbytes + self.values.nbytes
+
+    @property
+    def scored(self) -> int:
+        return int(np.isfinite(self.values[0]).sum())
+
+    # ---- construction ----
+    @classmethod
+    def empty(cls, fasts, slows, meta=None) -> "SweepCube":
+        fasts, slows = np.unique(np.asarray(fasts, dtype=np.int64)), np.unique(np.asarray(slows, dtype=np.int64))
+        return cls(fasts, slows, np.full((len(SWEEP_METRICS), len(fasts), len(slows)), np.nan, np.float32), meta)
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, fasts=None, slows=None, meta=None) -> "SweepCube":
+        """Cube from a run_grid table (axes default to the windows present in it)."""
+        cube = cls.empty(table["fast"] if fasts is None else fasts, table["slow"] if slows is None else slows, meta)
+        return cube.fill(table)
+
+    def fill(self, table: pd.DataFrame) -> "SweepCube":
+        """Write the rows of a run_grid table into the cube (in place; pairs off the axes are ignored)."""
+        f, s = table["fast"].to_numpy(np.int64), table["slow"].to_numpy(np.int64)
+        i, j = np.searchsorted(self.fasts, f), np.searchsorted(self.slows, s)
+        ok = (i < len(self.fasts)) & (j < len(self.slows))
+        ok[ok] = (self.fasts[i[ok]] == f[ok]) & (self.slows[j[ok]] == s[ok])
+        for m, name in enumerate(SWEEP_METRICS):
+            self.values[m, i[ok], j[ok]] = table[name].to_numpy(np.float32)[ok]
+        return self
+
+    # ---- slicing ----
+    def covers(self, fasts, slows) -> bool:
+        return bool(np.isin(np.asarray(fasts), self.fasts).all() and np.isin(np.asarray(slows), self.slows).all())
+
+    def select(self, fasts, slows) -> "SweepCube":
+        """Sub-cube over the given windows (all must be on the axes; see covers())."""
+        fasts, slows = np.unique(np.asarray(fasts, dtype=np.int64)), np.unique(np.asarray(slows, dtype=np.int64))
+        i, j = np.searchsorted(self.fasts, fasts), np.searchsorted(self.slows, slows)
+        return SweepCube(fasts, slows, self.values[:, i][:, :, j], self.meta)
+
+    def metric(self, name: str) -> pd.DataFrame:
+        """One metric as a fast x slow DataFrame (a view of the cube)."""
+        return pd.DataFrame(self.values[SWEEP_METRICS.index(name)],
+                            index=pd.Index(self.fasts, name="fast"), columns=pd.Index(self.slows, name="slow"))
+
+    def best(self, name: str = "sharpe") -> tuple[int, int, float] | None:
+        """(fast, slow, value) of the highest score (max_dd is negative, so highest = shallowest)."""
+        v = self.values[SWEEP_METRICS.index(name)]
+        if not np.isfinite(v).any():
+            return None
+        i, j = np.unravel_index(np.nanargmax(v), v.shape)
+        return int(self.fasts[i]), int(self.slows[j]), float(v[i, j])
+
+    def to_table(self) -> pd.DataFrame:
+        """Every fast < slow pair in run_grid's long format."""
+        i, j = np.nonzero(self.fasts[:, None] < self.slows[None, :])
+        return pd.DataFrame({"fast": self.fasts[i], "slow": self.slows[j],
+                             **{m: self.values[k, i, j].astype(np.float64) for k, m in enumerate(SWEEP_METRICS)}},
+                            columns=GRID_COLUMNS)
+
+    # ---- persistence ----
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, fasts=self.fasts, slows=self.slows, values=self.values,
+                     meta=np.array(json.dumps(self.meta, default=str)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "SweepCube":
+        with np.load(path) as z:
+            return cls(z["fasts"], z["slows"], z["values"], json.loads(str(z["meta"])))
+
+
+class SweepStore:
+    """
+    root: directory of saved cubes, one sub-directory per ticker (created on first save)
+    """
+
+    def __init__(self, root=DEFAULT_SWEEP_DIR):
+        self.root = Path(root)
+
+    def path(self, ticker: str, px: pd.Series, costs=None, periods_per_year=252) -> Path:
+        """File for this ticker, bar range, cost model and annualisation (i.e. bar size)."""
+        first, last = (f"{pd.Timestamp(t):%Y%m%d}" for t in (px.index[0], px.index[-1])) if len(px) else ("x", "x")
+        scored = repr(costs) if periods_per_year == 252 else f"{costs!r}/{periods_per_year:g}"
+        tag = hashlib.blake2b(scored.encode(), digest_size=6).hexdigest()
+        return self.root / re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper()) / f"{first}-{last}-{tag}.npz"
+
+    def load(self, ticker: str, px: pd.Series, costs=None, data_fingerprint: str | None = None,
+             periods_per_year=252) -> SweepCube | None:
+        """The saved cube for these prices, or None (missing, unreadable or computed from other data)."""
+        try:
+            cube = SweepCube.load(self.path(ticker, px, costs, periods_per_year))
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        if cube.meta.get("fingerprint") != (data_fingerprint or fingerprint(px)):
+            return None
+        return cube
+
+    def sweep(self, ticker: str, px: pd.Series, fasts, slows, costs=None, progress=None,
+              periods_per_year: int = 252) -> SweepCube:
+        """
+        Scores for every fast x slow pair on px, from the saved cube where possible.
+        Missing windows are scored with run_grid and merged into the saved cube.
+        progress: optional callback(done, total, partial cube), e.g. src.jobs.Job.report
+        Returns the cube restricted to the requested windows.
+        """
+        fasts, slows = np.unique(np.asarray(fasts, dtype=np.int64)), np.unique(np.asarray(slows, dtype=np.int64))
+        fp = fingerprint(px)
+        old = self.load(ticker, px, costs, fp, periods_per_year)
+        if old is not None and old.covers(fasts, slows):
+            return old.select(fasts, slows)
+
+        meta = {"ticker": ticker.upper(), "first": str(px.index[0]), "last": str(px.index[-1]),
+                "bars": len(px), "fingerprint": fp, "costs": repr(costs), "periods_per_year": periods_per_year}
+        if old is None:
+            cube, todo = SweepCube.empty(fasts, slows, meta), [(fasts, slows)]
+        else:
+            cube = SweepCube.empty(np.union1d(old.fasts, fasts), np.union1d(old.slows, slows), meta)
+            i, j = np.searchsorted(cube.fasts, old.fasts), np.searchsorted(cube.slows, old.slows)
+            cube.values[:, i[:, None], j[None, :]] = old.values
+            # only new rows (all columns) and new columns (old rows) need scoring
+            new_f, new_s = np.setdiff1d(fasts, old.fasts), np.setdiff1d(cube.slows, old.slows)
+            todo = [(new_f, cube.slows), (old.fasts, new_s)]
+            todo = [(f, s) for f, s in todo if len(f) and len(s)]
+
+        total, done = sum(len(f) for f, _ in todo), 0
+        for f, s in todo:
+            def step(k, _n, rows, base=done):
+                progress(base + k, total, cube.fill(rows).select(fasts, slows))
+            cube.fill(run_grid(px, f, s, periods_per_year, costs, progress=step if progress else None))
+            done += len(f)
+        cube.save(self.path(ticker, px, costs, periods_per_year))
+        return cube.select(fasts, slows)
+
+    def clear(self, ticker: str | None = None):
+        """Delete saved cubes (all, or one ticker's)."""
+        base = self.root if ticker is None else self.root / re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper())
+        if base.exists():
+            for p in base.rglob("*.npz"):
+                p.unlink(missing_ok=True)
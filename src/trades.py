@@ -0,0 +1,183 @@
+# src/trades.py
+"""
+Trade ledgers: one row per round trip, for a single run or a whole sweep at once.
+
+    trades = trade_list(px, sig, returns=res["ret_strategy"])    # one backtest
+    trades = trade_list(px, pair_signals(px, fasts, slows))      # every pair of a sweep
+    trade_stats(trades)                                          # win rate, streaks, ... per strategy
+
+Positions follow run_backtest's next-bar execution: the signal decided at one
+close is held over the following bars, so a trade entered on a crossover at
+bar i enters at close[i] and earns from bar i + 1. A trade is a run of bars
+held on the same side (long / short; a size change inside it, e.g. from
+volatility targeting, is not a new trade) and exits at the close where the
+signal leaves that side. Trades still open at the last bar are marked `open`.
+
+Everything is found with array operations over a (strategies, bars) block:
+entries and exits are the nonzero positions of the side's first difference,
+trade returns come from differences of a cumulative log-return, MAE / MFE
+from np.minimum / np.maximum.reduceat over the in-trade excursions, and
+win/loss streaks from run lengths of the win flags. There is no loop over
+bars or trades; strategies are processed in column blocks to bound memory.
+"""
+import numpy as np
+import pandas as pd
+
+TRADE_COLUMNS = ["entry", "exit", "side", "entry_price", "exit_price", "bars", "duration",
+                 "return", "mae", "mfe", "open", "streak"]
+STATS_COLUMNS = ["trades", "win_rate", "avg_return", "median_return", "best", "worst", "profit_factor",
+                 "avg_bars", "avg_mae", "avg_mfe", "max_win_streak", "max_loss_streak"]
+
+
+def trade_list(prices, signal, returns=None, high=None, low=None, cells: int = 1 << 21) -> pd.DataFrame:
+    """
+    prices: close series (pd.Series preferred; its index labels entry / exit)
+    signal: positions decided at each close, (bars,) like run_backtest's signal or a
+            (bars, strategies) matrix / DataFrame (e.g. src.signals.pair_signals)
+    returns: optional per-bar strategy returns shaped like signal (e.g. res["ret_strategy"]
+             with costs); default position x price return. Costs charged when a trade is
+             closed fall on the bar after its exit and so are not in its return.
+    high, low: optional bar extremes for intrabar MAE / MFE (default: closes only)
+    cells: strategies x bars per block (bounds the float64 scratch memory)
+    Returns a DataFrame with TRADE_COLUMNS (duration is a Timedelta for dated prices,
+    else the bar count); batched input adds a leading "strategy" column (or the
+    signal's column levels, e.g. fast / slow).
+      side: 1 long, -1 short; return: compounded over the trade's bars
+      mae / mfe: worst / best open excursion vs the entry price (<= 0 / >= 0)
+      streak: +k for the k-th win in a row, -k for the k-th loss (per strategy, by exit)
+    """
+    index = getattr(prices, "index", None)
+    p = np.asarray(prices, dtype=np.float64).ravel()
+    n = len(p)
+    S = np.asarray(signal)  # kept in its own dtype (e.g. int8 from pair_signals); cast per block
+    one_d = S.ndim == 1
+    S = S.reshape(n, -1)
+    k = S.shape[1]
+    R = None if returns is None else np.asarray(returns).reshape(n, k)
+    hi = p if high is None else np.asarray(high, dtype=np.float64).ravel()
+    lo = p if low is None else np.asarray(low, dtype=np.float64).ravel()
+    ret = np.zeros(n)
+    if n > 1:
+        ret[1:] = p[1:] / p[:-1] - 1.0
+
+    parts = []
+    block = max(1, cells // max(n, 1))
+    for a in range(0, k, block):
+        parts.append(_block_trades(p, hi, lo, ret, S[:, a:a + block].T.astype(np.float64),
+                                   None if R is None else R[:, a:a + block].T.astype(np.float64), a))
+    col, start, end, side, tret, mae, mfe = (np.concatenate(x) for x in zip(*parts)) if parts else \
+        (np.zeros(0, dtype=np.int64),) * 3 + (np.zeros(0),) * 4
+
+    entry_i, exit_i = start - 1, end - 1  # exit at the close of the last held bar (the last bar if still open)
+    is_open = end >= n
+    win = tret > 0
+    labels = index if index is not None else pd.RangeIndex(n)
+    if isinstance(labels, pd.DatetimeIndex):
+        duration = labels[exit_i] - labels[entry_i] if len(start) else pd.to_timedelta([])
+    else:
+        duration = exit_i - entry_i
+    out = pd.DataFrame({
+        "entry": labels[entry_i],
+        "exit": labels[exit_i],
+        "side": side.astype(np.int8),
+        "entry_price": p[entry_i],
+        "exit_price": p[exit_i],
+        "bars": end - start,
+        "duration": np.asarray(duration),
+        "return": tret,
+        "mae": mae,
+        "mfe": mfe,
+        "open": is_open,
+        "streak": _streaks(col, win),
+    }, columns=TRADE_COLUMNS)
+    if one_d:
+        return out
+    names = getattr(signal, "columns", None)
+    if isinstance(names, pd.MultiIndex):
+        keys = pd.DataFrame({lvl: names.get_level_values(i)[col] for i, lvl in enumerate(names.names)})
+    else:
+        keys = pd.DataFrame({"strategy": (names[col] if names is not None else col)})
+    return pd.concat([keys, out], axis=1)
+
+
+def _block_trades(p, hi, lo, ret, S, R, offset):
+    """Trades of a (strategies, bars) signal block as arrays; [start, end) are the held bars (start >= 1)."""
+    k, n = S.shape
+    pos = np.zeros((k, n))
+    pos[:, 1:] = S[:, :-1]  # held over bar t = decided at close t - 1
+    side = np.sign(pos)
+    # a trade starts where the side changes to nonzero and ends where it changes again (or at n)
+    change = np.zeros((k, n + 1), dtype=bool)
+    change[:, 1:n] = side[:, 1:] != side[:, :-1]
+    change[:, 0] = side[:, 0] != 0
+    change[:, n] = True
+    col, start = np.nonzero(change[:, :n] & (side != 0))
+    end = np.nonzero(change[:, 1:] & (side != 0))[1] + 1  # one past the last held bar, same order
+    tside = side[col, start]
+
+    # trade return: compounded strategy returns over [start, end)
+    r = pos * ret if R is None else R
+    with np.errstate(divide="ignore", invalid="ignore"):
+        L = np.cumsum(np.log1p(r), axis=1)
+    tret = np.expm1(L[col, end - 1] - L[col, start - 1])
+
+    # excursions vs the entry close, 0 outside trades so reduceat can run over the flat block
+    entry_bar = np.zeros((k, n), dtype=np.int64)
+    entry_bar[col, start] = start - 1
+    np.maximum.accumulate(entry_bar, axis=1, out=entry_bar)
+    held = side != 0
+    ep = p[entry_bar]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adverse = np.where(side > 0, lo / ep - 1.0, 1.0 - hi / ep)
+        favourable = np.where(side > 0, hi / ep - 1.0, 1.0 - lo / ep)
+    adverse = np.where(held, np.minimum(adverse, 0.0), 0.0).ravel()
+    favourable = np.where(held, np.maximum(favourable, 0.0), 0.0).ravel()
+    flat = col * n + start
+    mae = np.minimum.reduceat(adverse, flat) if len(flat) else np.zeros(0)
+    mfe = np.maximum.reduceat(favourable, flat) if len(flat) else np.zeros(0)
+    return col + offset, start, end, tside, tret, mae, mfe
+
+
+def _streaks(col, win) -> np.ndarray:
+    """+k / -k for the k-th consecutive win / loss, restarting for each strategy."""
+    m = len(win)
+    if m == 0:
+        return np.zeros(0, dtype=np.int64)
+    new_run = np.ones(m, dtype=bool)
+    new_run[1:] = (win[1:] != win[:-1]) | (col[1:] != col[:-1])
+    run_start = np.maximum.accumulate(np.where(new_run, np.arange(m), 0))
+    length = np.arange(m) - run_start + 1
+    return np.where(win, length, -length)
+
+
+def trade_stats(trades: pd.DataFrame) -> pd.DataFrame | pd.Series:
+    """
+    Summary per strategy of a trade_list ledger (STATS_COLUMNS); a Series for a single run.
+    profit_factor: sum of winning returns / -sum of losing returns
+    """
+    keys = [c for c in trades.columns[:trades.columns.get_loc("entry")]]
+    r = trades["return"]
+    frame = trades.assign(_win=r.where(r > 0, 0.0), _loss=r.where(r <= 0, 0.0), _w=r > 0,
+                          _ws=trades["streak"].clip(lower=0), _ls=(-trades["streak"]).clip(lower=0))
+    g = frame.groupby(keys, sort=False) if keys else frame.groupby(np.zeros(len(frame), dtype=int))
+    out = pd.DataFrame({
+        "trades": g.size(),
+        "win_rate": g["_w"].mean(),
+        "avg_return": g["return"].mean(),
+        "median_return": g["return"].median(),
+        "best": g["return"].max(),
+        "worst": g["return"].min(),
+        "profit_factor": g["_win"].sum() / -g["_loss"].sum(),
+        "avg_bars": g["bars"].mean(),
+        "avg_mae": g["mae"].mean(),
+        "avg_mfe": g["mfe"].mean(),
+        "max_win_streak": g["_ws"].max(),
+        "max_loss_streak": g["_ls"].max(),
+    }, columns=STATS_COLUMNS)
+    if keys:
+        return out
+    if out.empty:
+        empty = pd.Series(np.nan, index=STATS_COLUMNS)
+        empty["trades"] = 0
+        return empty
+    return out.iloc[0].rename(None)
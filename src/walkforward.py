@@ -0,0 +1,147 @@
+# src/walkforward.py
+"""
+Walk-forward optimisation of the MA crossover.
+
+For each fold the best (fast, slow) pair is picked on the training window and
+then traded on the following test window; the test windows are stitched into
+one out-of-sample equity curve. Moving averages are computed once over the
+whole history (they only look backwards, so slicing them is look-ahead free)
+and shared by every fold; with workers > 1 the folds run in a process pool
+that reads the MA matrices from shared memory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import _grid_scores, _simple_returns, _to_series
+from src.metrics import bars_per_year, cagr, max_drawdown, sharpe
+from src.signals import sma_matrix
+
+SELECT_METRICS = ("sharpe", "cagr", "max_dd")
+
+# per-worker views into the shared block, set by _init_worker
+_SHARED = None
+
+
+def make_folds(n: int, train: int, test: int, anchored: bool = False) -> list[tuple[int, int, int]]:
+    """
+    (train_start, test_start, test_end) bar positions. Test windows are consecutive and
+    non-overlapping; rolling folds keep `train` bars, anchored ones grow from bar 0.
+    """
+    if train < 2 or test < 1:
+        raise ValueError("train must be >= 2 bars and test >= 1 bar")
+    folds = []
+    for t0 in range(train, n, test):
+        folds.append((0 if anchored else t0 - train, t0, min(t0 + test, n)))
+    return folds
+
+
+def _fold(arrays, fasts, slows, fold, metric, periods_per_year):
+    """Pick the best pair on the training slice; return it with its in-sample score and OOS returns."""
+    ma_fast, ma_slow, ret = arrays
+    a, b, c = fold
+    f, s, cg, sh, dd = _grid_scores(fasts, slows, ma_fast[:, a:b], ma_slow[:, a:b], ret[a:b], periods_per_year)
+    score = {"cagr": cg, "sharpe": sh, "max_dd": dd}[metric]
+    if len(f) == 0:
+        raise ValueError("No valid (fast < slow) pairs to optimise over.")
+    k = int(np.nanargmax(score)) if not np.isnan(score).all() else 0
+
+    # next-day execution: the position over bar t was decided on bar t-1 (the last training bar for t = b)
+    i, j = np.searchsorted(fasts, f[k]), np.searchsorted(slows, s[k])
+    with np.errstate(invalid="ignore"):
+        pos = (ma_fast[i, b - 1:c - 1] > ma_slow[j, b - 1:c - 1]).astype(float)
+    return int(f[k]), int(s[k]), float(score[k]), ret[b:c] * pos
+
+
+def _init_worker(name, shapes):
+    global _SHARED
+    shm = shared_memory.SharedMemory(name=name)
+    views, offset = [], 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        views.append(np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=offset * 8))
+        offset += size
+    _SHARED = (shm, tuple(views))
+
+
+def _fold_worker(fasts, slows, fold, metric, periods_per_year):
+    return _fold(_SHARED[1], fasts, slows, fold, metric, periods_per_year)
+
+
+def walk_forward(prices, fasts, slows, train: int = 756, test: int = 126, anchored: bool = False,
+                 metric: str = "sharpe", workers: int | None = 1, periods_per_year=None):
+    """
+    prices: price series (pd.Series preferred)
+    fasts, slows: candidate MA windows (pairs with fast >= slow are skipped)
+    train, test: window lengths in bars (default ~3 years in-sample, ~6 months out-of-sample)
+    anchored: grow the training window from the first bar instead of rolling it
+    metric: in-sample selection criterion, one of "sharpe", "cagr", "max_dd"
+    workers: processes for the folds (1 = run inline, None = CPU count)
+    periods_per_year: annualisation for selection and OOS metrics; default bars_per_year(prices.index)
+    Returns (folds, oos):
+      folds: one row per fold with window dates, chosen fast/slow, in-sample score
+             and out-of-sample cagr/sharpe/max_dd
+      oos:   run_backtest-style frame over the stitched test windows
+             (price, ret_buyhold, ret_strategy, eq_buyhold, eq_strategy, fast, slow)
+    """
+    if metric not in SELECT_METRICS:
+        raise ValueError(f"metric must be one of {SELECT_METRICS}")
+    px = _to_series(prices, fallback_index=getattr(prices, "index", None), name="price").astype(float).dropna()
+    p = px.to_numpy()
+    if periods_per_year is None:
+        periods_per_year = bars_per_year(px.index)
+    fasts = np.unique(np.asarray(fasts, dtype=int).ravel())
+    slows = np.unique(np.asarray(slows, dtype=int).ravel())
+    folds = make_folds(len(p), train, test, anchored)
+    if not folds:
+        raise ValueError(f"Need more than train={train} bars, got {len(p)}.")
+
+    arrays = (sma_matrix(p, fasts), sma_matrix(p, slows), _simple_returns(p))
+    if workers == 1 or len(folds) == 1:
+        results = [_fold(arrays, fasts, slows, fd, metric, periods_per_year) for fd in folds]
+    else:
+        total = sum(a.size for a in arrays)
+        shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+        try:
+            offset = 0
+            for a in arrays:
+                np.ndarray(a.shape, dtype=np.float64, buffer=shm.buf, offset=offset * 8)[...] = a
+                offset += a.size
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shm.name, [a.shape for a in arrays])) as ex:
+                results = list(ex.map(_fold_worker, *zip(*[(fasts, slows, fd, metric, periods_per_year)
+                                                           for fd in folds])))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # --- Stitch the out-of-sample windows ---
+    idx = px.index
+    rows, pieces = [], []
+    for n, ((a, b, c), (f, s, score, oos_ret)) in enumerate(zip(folds, results)):
+        seg = pd.DataFrame({
+            "price": p[b:c],
+            "ret_buyhold": arrays[2][b:c],
+            "ret_strategy": oos_ret,
+            "fast": f,
+            "slow": s,
+        }, index=idx[b:c])
+        pieces.append(seg)
+        eq = (1.0 + seg["ret_strategy"]).cumprod()
+        rows.append({
+            "fold": n,
+            "train_start": idx[a], "train_end": idx[b - 1],
+            "test_start": idx[b], "test_end": idx[c - 1],
+            "fast": f, "slow": s, f"is_{metric}": score,
+            "oos_cagr": cagr(eq, periods_per_year),
+            "oos_sharpe": sharpe(seg["ret_strategy"], periods_per_year),
+            "oos_max_dd": max_drawdown(eq)[0],
+        })
+
+    oos = pd.concat(pieces)
+    oos["eq_buyhold"] = (1.0 + oos["ret_buyhold"]).cumprod()
+    oos["eq_strategy"] = (1.0 + oos["ret_strategy"]).cumprod()
+    oos = oos[["price", "ret_buyhold", "ret_strategy", "eq_buyhold", "eq_strategy", "fast", "slow"]]
+    return pd.DataFrame(rows), oos
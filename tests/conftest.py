@@ -0,0 +1,21 @@
+# tests/conftest.py
+"""Shared fixtures: everything runs offline on benchmarks.common's synthetic prices."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import synthetic_ohlc, synthetic_prices  # noqa: E402
+
+
+@pytest.fixture
+def px():
+    """1,500 daily closes."""
+    return synthetic_prices(1_500, seed=7)
+
+
+@pytest.fixture
+def ohlc(px):
+    return synthetic_ohlc(px)
@@ -0,0 +1,48 @@
+# tests/test_backtest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import IncrementalBacktester, run_backtest, run_grid
+from src.costs import CostModel
+from src.metrics import cagr, max_drawdown, sharpe
+from src.signals import ma_signals
+
+
+@pytest.mark.parametrize("costs", [None, CostModel(bps=5, spread_bps=2, fixed_fee=1.0)])
+def test_run_grid_matches_per_pair_run_backtest(px, costs):
+    grid = run_grid(px, [3, 10, 20, 50], [10, 30, 100, 200], costs=costs)
+    assert len(grid) == 12  # fast >= slow pairs are skipped
+    for row in grid.itertuples():
+        bt = run_backtest(px, ma_signals(px, row.fast, row.slow), costs=costs)
+        assert row.cagr == pytest.approx(cagr(bt["eq_strategy"]), rel=1e-9, nan_ok=True)
+        assert row.sharpe == pytest.approx(sharpe(bt["ret_strategy"]), rel=1e-9, nan_ok=True)
+        assert row.max_dd == pytest.approx(max_drawdown(bt["eq_strategy"])[0], rel=1e-9, abs=1e-12)
+
+
+def test_run_grid_progress_rows_add_up_to_the_full_grid(px):
+    seen = []
+    grid = run_grid(px, [5, 10], [20, 40], progress=lambda done, total, rows: seen.append((done, total, rows)))
+    assert [(d, t) for d, t, _ in seen] == [(1, 2), (2, 2)]
+    assert sum(len(rows) for *_, rows in seen) == len(grid) == 4
+
+
+@pytest.mark.parametrize("fast, slow", [(10, 30), (30, 10), (1, 5)])
+def test_incremental_backtester_matches_run_backtest(px, fast, slow):
+    px = px.copy()
+    px.iloc[[40, 41, 700]] = np.nan  # skipped, like run_backtest's dropna()
+    ref = run_backtest(px, ma_signals(px.dropna(), fast, slow))
+    bt = IncrementalBacktester(fast, slow)
+    got = pd.concat([bt.update_many(px.iloc[:500]), bt.update_many(px.iloc[500:])])
+    cols = ["price", "ret_buyhold", "ret_strategy", "eq_buyhold", "eq_strategy"]
+    pd.testing.assert_frame_equal(got[cols], ref[cols], rtol=1e-9)
+    assert bt.bars == len(ref)
+    assert bt.max_dd_strategy == pytest.approx(max_drawdown(ref["eq_strategy"])[0])
+
+
+def test_incremental_backtester_single_updates_match_update_many(px):
+    a, b = IncrementalBacktester(5, 20), IncrementalBacktester(5, 20)
+    rows = [a.update(p) for p in px.iloc[:100]]
+    batch = b.update_many(px.iloc[:100])
+    assert pd.DataFrame(rows, index=batch.index).equals(batch)
+    assert a.update(np.nan) is None and a.bars == 100
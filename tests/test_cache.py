@@ -0,0 +1,36 @@
+# tests/test_cache.py
+import numpy as np
+
+from src.cache import ResultCache, estimate_nbytes
+from src.sweep import SweepCube
+
+
+def test_estimate_nbytes_uses_the_objects_own_size():
+    cube = SweepCube.empty(range(2, 100), range(10, 300), {})
+    assert estimate_nbytes(cube) == cube.nbytes
+    assert estimate_nbytes((np.zeros(100), cube, 3)) >= cube.nbytes + 800
+
+    class Model:
+        pass
+    model = Model()
+    model.coef_ = np.zeros((1, 10_000))
+    model.self_ = model  # cycles are counted once
+    assert estimate_nbytes(model) >= model.coef_.nbytes
+
+
+def test_memory_budget_bounds_objects_with_nbytes():
+    cache = ResultCache(max_bytes=3 * 2**20, disk_dir=None)
+    for i in range(10):
+        cache.put(f"cube-{i}", SweepCube.empty(range(2, 200), range(10, 500), {}))  # ~1.2 MB each
+    assert len(cache) == 2 and cache.nbytes <= cache.max_bytes
+    assert cache.stats["evictions"] == 8
+
+
+def test_unreadable_disk_entry_is_dropped_and_recomputed(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path)
+    cache.put("k", {"x": 1})
+    (tmp_path / "k.pkl").write_bytes(b"\x80\x04cno_such_module\nThing\n)\x81.")
+    fresh = ResultCache(disk_dir=tmp_path)
+    assert fresh.get_or_compute("k", lambda: "recomputed") == "recomputed"
+    assert fresh.stats["misses"] == 1
+    assert ResultCache(disk_dir=tmp_path).get("k") == "recomputed"
@@ -0,0 +1,39 @@
+# tests/test_export.py
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from src.backtest import run_backtest
+from src.export import export_file, stream_export
+from src.signals import ma_signals
+
+
+@pytest.fixture
+def res(px):
+    return run_backtest(px, ma_signals(px, 10, 50))
+
+
+def _download(data) -> bytes:
+    """What st.download_button(data=lambda: ...) serves for a callable's return value."""
+    out, _ = convert_data_to_bytes_and_infer_mime(data, TypeError(f"unsupported {type(data)}"))
+    return out
+
+
+@pytest.mark.parametrize("spool_bytes", [32 * 2**20, 1_000])  # in memory / spilled to a temp file
+def test_export_file_is_a_streamlit_download(res, spool_bytes):
+    fh = export_file(res, "csv", chunk_rows=200, spool_bytes=spool_bytes)
+    assert _download(fh) == res.to_csv().encode()
+    fh.close()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_file_binary_formats_round_trip(res, fmt):
+    data = _download(export_file(res, fmt, chunk_rows=300, spool_bytes=4_096))
+    back = pd.read_parquet(io.BytesIO(data)) if fmt == "parquet" else pd.read_feather(io.BytesIO(data))
+    pd.testing.assert_frame_equal(back, res, check_names=False, check_freq=False)
+
+
+def test_stream_export_pieces_concatenate_to_to_csv(res):
+    assert b"".join(stream_export(res, "csv", chunk_rows=128, index=False)) == res.to_csv(index=False).encode()
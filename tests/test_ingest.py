@@ -0,0 +1,65 @@
+# tests/test_ingest.py
+import pandas as pd
+import pytest
+
+from benchmarks.common import synthetic_ohlc, synthetic_prices
+from src.ingest import BulkDownloader, PerSymbolSource
+from src.store import PriceStore
+
+
+def _upstream(bars=300):
+    return {sym: synthetic_ohlc(synthetic_prices(bars, seed=i)) for i, sym in enumerate(["AAA", "BBB", "CCC"])}
+
+
+def _downloader(store, upstream, **kw):
+    def fetch(symbol, start=None, end=None):
+        df = upstream[symbol]
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df.copy(), None
+    return BulkDownloader(store, PerSymbolSource(fetch), workers=1, rate=1e6, burst=100, **kw)
+
+
+@pytest.fixture
+def stored(tmp_path):
+    """Store holding the first 250 of 300 upstream bars for each symbol."""
+    upstream = _upstream()
+    store = PriceStore(tmp_path / "prices", source=None)
+    for sym, df in upstream.items():
+        store.write(sym, df.iloc[:250])
+    return store, upstream
+
+
+def test_incremental_appends_new_bars(stored):
+    store, upstream = stored
+    status, summary = _downloader(store, upstream).run(list(upstream))
+    assert summary["failed"] == 0
+    for sym, df in upstream.items():
+        pd.testing.assert_frame_equal(store.read(sym), df, check_freq=False, check_names=False)
+
+
+def test_readjusted_symbol_reloads_without_touching_the_rest_of_its_batch(stored):
+    # AAA is re-adjusted upstream (e.g. a 2:1 split); BBB and CCC, in the same batch, are not
+    store, upstream = stored
+    upstream["AAA"] = upstream["AAA"] * 0.5
+    status, _ = _downloader(store, upstream, batch_size=3).run(["AAA", "BBB", "CCC"])
+    assert set(status["status"]) == {"ok"}
+    for sym, df in upstream.items():
+        got = store.read(sym)
+        assert len(got) == 300, sym
+        pd.testing.assert_frame_equal(got, df, check_freq=False, check_names=False)
+
+
+def test_explicit_start_merges_and_full_replaces(stored):
+    store, upstream = stored
+    store.write("AAA", upstream["AAA"].iloc[100:250])  # missing its first 100 bars
+    start = upstream["AAA"].index[50].date()
+    _downloader(store, upstream).run(["AAA"], start=start)
+    got = store.read("AAA")
+    assert got.index[0] == upstream["AAA"].index[50] and got.index[-1] == upstream["AAA"].index[-1]
+
+    upstream["BBB"] = upstream["BBB"].iloc[:200]  # upstream now has less than the store
+    _downloader(store, upstream).run(["BBB"], incremental=False)
+    pd.testing.assert_frame_equal(store.read("BBB"), upstream["BBB"], check_freq=False, check_names=False)
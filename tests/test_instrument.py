@@ -0,0 +1,24 @@
+# tests/test_instrument.py
+import time
+
+from src.jobs import JobRunner
+from utils.instrument import Recorder
+
+
+def test_job_stage_timings_merge_onto_the_page_clock():
+    page = Recorder(enabled=True)
+
+    def work(job):
+        job.timings = Recorder(enabled=True)
+        with job.timings.stage("fit"):
+            time.sleep(0.01)
+        return 1
+
+    t_submit = time.perf_counter()
+    job = JobRunner(max_workers=1).submit("k", work)
+    assert job.wait(5) and job.status == "done"
+    page.merge(job.timings)
+    (ev,) = page.events
+    assert ev["name"] == "fit" and ev["dur_s"] >= 0.01
+    # start_s is relative to the page recorder's clock, not the job's
+    assert ev["start_s"] >= t_submit - page._t0 - 1e-3
@@ -0,0 +1,49 @@
+# tests/test_intraday.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import run_backtest
+from src.costs import CostModel
+from src.intraday import MinuteStore, stream_backtest
+from src.metrics import METRIC_COLUMNS, compute_all_metrics
+from src.signals import ma_signals
+
+
+@pytest.fixture
+def store(tmp_path):
+    """20 sessions of 390 one-minute bars for "SYN"."""
+    days = pd.bdate_range("2024-01-02", periods=20)
+    idx = pd.DatetimeIndex([d + pd.Timedelta(minutes=570 + i) for d in days for i in range(390)])
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 5e-4, len(idx))))
+    store = MinuteStore(tmp_path / "minutes")
+    store.append("SYN", pd.DataFrame({"Close": close}, index=idx))
+    return store
+
+
+@pytest.mark.parametrize("rule", [None, "5min"])
+@pytest.mark.parametrize("costs", [None, CostModel(bps=2, spread_bps=1, fixed_fee=0.5, sizing="vol_target")])
+@pytest.mark.parametrize("chunk_rows", [97, 250_000])
+def test_stream_backtest_matches_the_in_memory_path(store, rule, costs, chunk_rows):
+    got = stream_backtest(store, "SYN", 10, 30, rule=rule, costs=costs, chunk_rows=chunk_rows, max_points=100)
+
+    px = store.bars("SYN", rule)["Close"]
+    ppy = got["periods_per_year"]
+    sig = ma_signals(px, 10, 30)
+    res = run_backtest(px, sig, costs=costs, periods_per_year=ppy)
+    # held position, not "return != 0": float32 minute closes often don't move over a bar
+    pos = res["position"] if costs is not None else sig.shift(1, fill_value=0).astype(float)
+    ref = compute_all_metrics(res["ret_strategy"], res["eq_strategy"], positions=pos, periods_per_year=ppy)
+
+    assert got["bars"] == len(px)
+    m = got["metrics"].loc["strategy"]
+    for c in METRIC_COLUMNS:
+        if c.startswith("dd_"):
+            assert m[c] == ref[c], c
+        else:
+            assert m[c] == pytest.approx(ref[c], rel=1e-8, abs=1e-12, nan_ok=True), c
+    eq = got["equity"]
+    assert eq.index[-1] == px.index[-1] and len(eq) <= 102
+    np.testing.assert_allclose(eq["eq_strategy"], res["eq_strategy"].loc[eq.index], rtol=1e-9)
+    np.testing.assert_allclose(eq["eq_buyhold"], res["eq_buyhold"].loc[eq.index], rtol=1e-9)
@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+import numpy as np
+import pytest
+
+from src.metrics import METRIC_COLUMNS, _metrics_loop, _metrics_numpy, cagr, compute_all_metrics, max_drawdown, sharpe
+
+
+def test_compute_all_metrics_matches_the_single_metric_functions(px):
+    r = px.pct_change().fillna(0)
+    eq = (1 + r).cumprod()
+    m = compute_all_metrics(r, eq)
+    dd, curve = max_drawdown(eq)
+    assert m["cagr"] == pytest.approx(cagr(eq))
+    assert m["sharpe"] == pytest.approx(sharpe(r))
+    assert m["max_dd"] == pytest.approx(dd)
+    assert m["dd_end"] == curve.idxmin()
+
+
+@pytest.mark.parametrize("cells", [1, 50, 1 << 16])
+def test_blockwise_numpy_engine_matches_the_fused_loop(cells):
+    rng = np.random.default_rng(0)
+    R = rng.normal(0.0003, 0.01, (2_000, 4)) * (rng.random((2_000, 4)) > 0.3)
+    V = rng.random(R.shape) > 0.1
+    R[~V] = 0.0
+    E = np.cumprod(1 + R, axis=0)
+    P = (R != 0).astype(float)
+    for v in (None, V):
+        got = _metrics_numpy(R, E, P, 252, 0.02, v, cells=cells)
+        ref = _metrics_loop(R, E, P, True, v if v is not None else np.ones((0, 0), dtype=bool), v is not None, 252, 0.02)
+        for name, a, b in zip(METRIC_COLUMNS, got, ref):
+            np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-12, err_msg=name)
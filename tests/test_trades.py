@@ -0,0 +1,67 @@
+# tests/test_trades.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.trades import TRADE_COLUMNS, trade_list
+
+
+def _loop_trades(p, sig, hi, lo):
+    """Bar-by-bar reference: position over bar t is the signal decided at close t - 1."""
+    trades, cur = [], None
+    for t in range(1, len(p) + 1):
+        side = int(np.sign(sig[t - 1])) if t < len(p) else 0
+        if cur is not None and side != cur["side"]:
+            cur["end"] = t
+            trades.append(cur)
+            cur = None
+        if cur is None and side != 0:
+            cur = {"side": side, "start": t, "growth": 1.0, "mae": 0.0, "mfe": 0.0}
+        if cur is not None:
+            ep = p[cur["start"] - 1]
+            cur["growth"] *= 1 + sig[t - 1] * (p[t] / p[t - 1] - 1)
+            worst, best = (lo[t] / ep - 1, hi[t] / ep - 1) if side > 0 else (1 - hi[t] / ep, 1 - lo[t] / ep)
+            cur["mae"], cur["mfe"] = min(cur["mae"], worst), max(cur["mfe"], best)
+    rows, streak = [], 0
+    for tr in trades:
+        ret = tr["growth"] - 1
+        streak = (max(streak, 0) + 1) if ret > 0 else (min(streak, 0) - 1)
+        rows.append({"entry_i": tr["start"] - 1, "exit_i": tr["end"] - 1, "side": tr["side"],
+                     "bars": tr["end"] - tr["start"], "return": ret, "mae": tr["mae"], "mfe": tr["mfe"],
+                     "open": tr["end"] == len(p), "streak": streak})
+    return pd.DataFrame(rows)
+
+
+def _signal(n, seed):
+    rng = np.random.default_rng(seed)
+    # persistent long / flat / short regimes, with a held position on the last bar
+    return np.repeat(rng.choice([-1.0, 0.0, 1.0, 0.5], size=n // 10 + 1), 10)[:n]
+
+
+def test_trade_list_matches_a_loop_reference(px, ohlc):
+    p, hi, lo = px.to_numpy(), ohlc["High"].to_numpy(), ohlc["Low"].to_numpy()
+    sig = _signal(len(p), 1)
+    sig[-5:] = 1.0
+    got = trade_list(px, sig, high=ohlc["High"], low=ohlc["Low"])
+    ref = _loop_trades(p, sig, hi, lo)
+
+    assert list(got.columns) == TRADE_COLUMNS
+    assert len(got) == len(ref) > 10 and got["open"].iloc[-1]
+    np.testing.assert_array_equal(got["entry"], px.index[ref["entry_i"]])
+    np.testing.assert_array_equal(got["exit"], px.index[ref["exit_i"]])
+    np.testing.assert_array_equal(got["duration"], px.index[ref["exit_i"]] - px.index[ref["entry_i"]])
+    np.testing.assert_array_equal(got["entry_price"], p[ref["entry_i"]])
+    for c in ("side", "bars", "open", "streak"):
+        np.testing.assert_array_equal(got[c], ref[c], err_msg=c)
+    for c in ("return", "mae", "mfe"):
+        np.testing.assert_allclose(got[c], ref[c], rtol=1e-9, atol=1e-12, err_msg=c)
+
+
+@pytest.mark.parametrize("cells", [1, 1 << 21])
+def test_batched_trade_list_matches_one_strategy_at_a_time(px, cells):
+    cols = pd.MultiIndex.from_tuples([(5, 20), (10, 50), (20, 100)], names=["fast", "slow"])
+    S = pd.DataFrame(np.column_stack([_signal(len(px), i) for i in range(len(cols))]), index=px.index, columns=cols)
+    got = trade_list(px, S, cells=cells)
+    for fast, slow in cols:
+        one = got[(got["fast"] == fast) & (got["slow"] == slow)].drop(columns=["fast", "slow"])
+        pd.testing.assert_frame_equal(one.reset_index(drop=True), trade_list(px, S[(fast, slow)]))
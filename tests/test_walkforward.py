@@ -0,0 +1,29 @@
+# tests/test_walkforward.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics import bars_per_year
+from src.walkforward import walk_forward
+
+
+def _intraday(sessions=60, seed=0):
+    days = pd.bdate_range("2024-01-02", periods=sessions)
+    idx = pd.DatetimeIndex([d + pd.Timedelta(minutes=570 + 5 * i) for d in days for i in range(78)])
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 1e-3, len(idx)))), idx)
+
+
+@pytest.mark.parametrize("prices", ["daily", "intraday"])
+def test_walk_forward_infers_annualisation(px, prices):
+    series = px if prices == "daily" else _intraday()
+    ppy = bars_per_year(series.index)
+    assert ppy == (252 if prices == "daily" else 78 * 252)
+    kw = dict(fasts=[5, 10], slows=[20, 40], train=600, test=200)
+    folds, oos = walk_forward(series, **kw)
+    ref, ref_oos = walk_forward(series, periods_per_year=ppy, **kw)
+    pd.testing.assert_frame_equal(folds, ref)
+    pd.testing.assert_frame_equal(oos, ref_oos)
+    if prices == "intraday":
+        daily_scaled, _ = walk_forward(series, periods_per_year=252, **kw)
+        assert not np.allclose(folds["oos_sharpe"], daily_scaled["oos_sharpe"])
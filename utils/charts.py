@@ -0,0 +1,131 @@
+# utils/charts.py
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.downsample import lttb, ohlc_buckets
+from utils.theming import PALETTE, register_plotly_template
+
+register_plotly_template()
+
+
+def _thin(s: pd.Series, max_points: int | None) -> pd.Series:
+    return lttb(s, max_points) if max_points else s
+
+
+def price_ma_figure(px: pd.Series, ma_fast: pd.Series, ma_slow: pd.Series,
+                    ticker: str, fast: int, slow: int, max_points: int | None = None) -> go.Figure:
+    """Price with fast/slow moving-average overlays (Overview tab). max_points caps each trace (LTTB)."""
+    fig = go.Figure()
+    for s, name, line in [
+        (px, f"{ticker} Price", dict(color=PALETTE["text"], width=2)),
+        (ma_fast, f"MA {fast}", dict(color=PALETTE["accent"], width=2)),
+        (ma_slow, f"MA {slow}", dict(color="#60a5fa", width=2)),
+    ]:
+        s = _thin(s, max_points)
+        fig.add_scatter(x=s.index, y=s, name=name, line=line)
+    fig.update_layout(height=420, margin=dict(l=30, r=20, t=10, b=30),
+                      xaxis_title="Date", yaxis_title="Price")
+    return fig
+
+
+def equity_figure(res: pd.DataFrame, max_points: int | None = None) -> go.Figure:
+    """Strategy vs Buy & Hold equity curves from a run_backtest result. max_points caps each trace (LTTB)."""
+    fig = go.Figure()
+    eq_s, eq_b = _thin(res["eq_strategy"], max_points), _thin(res["eq_buyhold"], max_points)
+    fig.add_scatter(x=eq_s.index, y=eq_s, name="Strategy",
+                    line=dict(color=PALETTE["accent"], width=3))
+    fig.add_scatter(x=eq_b.index, y=eq_b, name="Buy & Hold",
+                    line=dict(color="#9aa4b2", width=2, dash="dash"))
+    fig.update_layout(height=420, margin=dict(l=30, r=20, t=10, b=30),
+                      xaxis_title="Date", yaxis_title="Equity")
+    return fig
+
+
+def probability_figure(prob: pd.Series) -> go.Figure:
+    """Model P(up next day) line (Research tab)."""
+    fig = go.Figure()
+    fig.add_scatter(x=prob.index, y=prob, mode="lines", name="P(up next day)",
+                    line=dict(color=PALETTE["accent"], width=2))
+    fig.update_layout(height=300, margin=dict(l=30, r=20, t=10, b=30), yaxis_range=[0, 1])
+    return fig
+
+
+SWEEP_LABELS = {"sharpe": "Sharpe", "cagr": "CAGR", "max_dd": "Max drawdown"}
+
+
+def sweep_heatmap(grid: pd.DataFrame, metric: str, pick: tuple[int, int] | None = None) -> go.Figure:
+    """
+    Score heatmap from a fast x slow grid (src.sweep.SweepCube.metric): slow windows on x,
+    fast windows on y, unscored / fast >= slow cells blank. pick: (fast, slow) cell to outline.
+    """
+    pct = metric in ("cagr", "max_dd")
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=grid.columns, y=grid.index, colorscale="RdYlGn", zmid=None if metric == "max_dd" else 0,
+        colorbar=dict(title=SWEEP_LABELS.get(metric, metric), tickformat=".0%" if pct else ".2f"),
+        hovertemplate=f"fast %{{y}} / slow %{{x}}<br>{SWEEP_LABELS.get(metric, metric)} "
+                      f"%{{z:{'.2%' if pct else '.2f'}}}<extra></extra>",
+        hoverongaps=False,
+    ))
+    if pick is not None:
+        fig.add_scatter(x=[pick[1]], y=[pick[0]], mode="markers", hoverinfo="skip", showlegend=False,
+                        marker=dict(symbol="square-open", size=14, color=PALETTE["text"], line=dict(width=2)))
+    fig.update_layout(height=460, margin=dict(l=30, r=20, t=10, b=30),
+                      xaxis_title="Slow MA", yaxis_title="Fast MA", clickmode="event+select")
+    return fig
+
+
+def plot_candles(df: pd.DataFrame, ticker: str, cols=None, max_points: int | None = None) -> go.Figure:
+    """
+    df: DataFrame with OHLC columns (any names or even MultiIndex flattened)
+    max_points: if set, consecutive bars are merged into at most this many candles
+    """
+    cols = cols or {}
+
+    # robust column finder: works even if labels are tuples
+    def pick(name: str):
+        # explicit mapping takes priority
+        if name in cols:
+            return cols[name]
+        # exact case-insensitive match
+        for c in df.columns:
+            if str(c).lower() == name:
+                return c
+        # substring match (e.g., "('Open','SPY')" -> 'open')
+        for c in df.columns:
+            if name in str(c).lower():
+                return c
+        return None
+
+    open_col  = pick("open")
+    high_col  = pick("high")
+    low_col   = pick("low")
+    close_col = pick("close")
+
+    missing = [n for n, v in {"Open": open_col, "High": high_col, "Low": low_col, "Close": close_col}.items() if v is None]
+    if missing:
+        raise ValueError(f"plot_candles: missing columns: {', '.join(missing)}")
+
+    if max_points:
+        df = ohlc_buckets(df, max_points, cols=(open_col, high_col, low_col, close_col))
+
+    fig = go.Figure([
+        go.Candlestick(
+            x=df.index,
+            open=df[open_col],
+            high=df[high_col],
+            low=df[low_col],
+            close=df[close_col],
+            increasing_line_color="#22c55e",
+            decreasing_line_color="#ef4444",
+            name=f"{ticker} OHLC",
+        )
+    ])
+    fig.update_layout(
+        template="plotly_dark",
+        height=500,
+        margin=dict(l=30, r=20, t=10, b=30),
+        xaxis_title="Date",
+        yaxis_title="Price",
+        xaxis_rangeslider_visible=False,
+    )
+    return fig
@@ -0,0 +1,105 @@
+# utils/downsample.py
+"""
+Point-budget downsampling for charts: Largest-Triangle-Three-Buckets for lines,
+first/max/min/last bucket aggregation for OHLC candles. Payload size depends
+only on the budget, not on history length. Slice to a date range first
+(see clip_range) to re-aggregate a zoomed window at full detail.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:  # pandas is imported on first use so the app can read DEFAULT_MAX_POINTS before loading it
+    import pandas as pd
+
+DEFAULT_MAX_POINTS = 2000
+
+
+def _as_float_x(index) -> np.ndarray:
+    import pandas as pd
+
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.asarray(index, dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """Positions of the points LTTB keeps (always includes first and last)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # bucket boundaries for the n - 2 interior points
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # third triangle vertex for bucket i = mean of bucket i + 1 (the last point for the final bucket)
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1])[1:] / counts[1:], x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1])[1:] / counts[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    if n // n_out <= 32:
+        # small buckets: plain float math beats per-bucket NumPy call overhead
+        _lttb_scan_small(x.tolist(), y.tolist(), edges.tolist(), avg_x.tolist(), avg_y.tolist(), out)
+        return out
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a], y[a]
+        area = np.abs((xa - avg_x[i]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (avg_y[i] - ya))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def _lttb_scan_small(x, y, edges, avg_x, avg_y, out):
+    a = 0
+    for i in range(len(edges) - 1):
+        xa, ya = x[a], y[a]
+        dx, dy = xa - avg_x[i], avg_y[i] - ya
+        best, pick = -1.0, edges[i]
+        for j in range(edges[i], edges[i + 1]):
+            area = abs(dx * (y[j] - ya) - (xa - x[j]) * dy)
+            if area > best:
+                best, pick = area, j
+        a = pick
+        out[i + 1] = a
+
+
+def lttb(series: pd.Series, n_out: int = DEFAULT_MAX_POINTS) -> pd.Series:
+    """Downsample a line to at most n_out points (NaNs are dropped first)."""
+    s = series.dropna()
+    if len(s) <= n_out:
+        return s
+    return s.iloc[lttb_indices(_as_float_x(s.index), s.to_numpy(), n_out)]
+
+
+def ohlc_buckets(df: pd.DataFrame, n_out: int = DEFAULT_MAX_POINTS,
+                 cols=("Open", "High", "Low", "Close")) -> pd.DataFrame:
+    """Aggregate consecutive bars into at most n_out candles (first open, max high, min low, last close)."""
+    import pandas as pd
+
+    n = len(df)
+    if n <= n_out:
+        return df[list(cols)]
+    o, h, l, c = (df[k].to_numpy(dtype=np.float64) for k in cols)
+    starts = np.unique(np.linspace(0, n, n_out + 1).astype(np.int64)[:-1])
+    ends = np.append(starts[1:], n) - 1
+    return pd.DataFrame({
+        cols[0]: o[starts],
+        cols[1]: np.fmax.reduceat(h, starts),
+        cols[2]: np.fmin.reduceat(l, starts),
+        cols[3]: c[ends],
+    }, index=df.index[starts])
+
+
+def clip_range(obj, start=None, end=None):
+    """Rows of a Series/DataFrame with start <= index <= end (either bound optional)."""
+    if start is None and end is None:
+        return obj
+    return obj.loc[start:end]
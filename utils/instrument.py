@@ -0,0 +1,154 @@
+# utils/instrument.py
+"""
+Lightweight stage timing for the hot path.
+
+    rec = Recorder(enabled=True)
+    with rec.stage("run_backtest"):
+        ...
+    @rec.timed("fit")
+    def fit(...): ...
+
+When disabled, stage() hands back a shared no-op context manager and timed()
+functions cost one attribute check, so instrumentation can stay in place.
+With track_memory=True each stage also records its peak allocation above what
+was live when it started (tracemalloc; nested stages reset the peak, so treat
+parents as approximate).
+"""
+import contextlib
+import functools
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_NULL = contextlib.nullcontext()
+
+
+class Recorder:
+    def __init__(self, enabled: bool = False, track_memory: bool = False):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.events = []  # dicts: name, start_s, dur_s, peak_mb (or None), depth, tid
+        self._t0 = time.perf_counter()
+        self._local = threading.local()
+
+    def clear(self):
+        self.events = []
+        self._t0 = time.perf_counter()
+
+    def stage(self, name: str, **args):
+        """Context manager timing the enclosed block as `name` (extra kwargs are kept as event args)."""
+        if not self.enabled:
+            return _NULL
+        return self._stage(name, args)
+
+    @contextlib.contextmanager
+    def _stage(self, name, args):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        mem = self.track_memory
+        base = 0
+        if mem:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dur = time.perf_counter() - start
+            peak = (tracemalloc.get_traced_memory()[1] - base) / 2**20 if mem and tracemalloc.is_tracing() else None
+            self._local.depth = depth
+            self.events.append({
+                "name": name, "start_s": start - self._t0, "dur_s": dur, "peak_mb": peak,
+                "depth": depth, "tid": threading.get_ident(), **({"args": args} if args else {}),
+            })
+
+    def timed(self, name: str | None = None):
+        """Decorator form of stage(); the stage name defaults to the function's qualified name."""
+        def deco(fn):
+            label = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*a, **kw):
+                if not self.enabled:
+                    return fn(*a, **kw)
+                with self._stage(label, {}):
+                    return fn(*a, **kw)
+            return wrapper
+        return deco
+
+    def merge(self, other: "Recorder"):
+        """Add another recorder's events (e.g. stages timed in a background job), shifted onto this clock."""
+        shift = other._t0 - self._t0
+        self.events.extend({**e, "start_s": e["start_s"] + shift} for e in other.events)
+
+    # ---- reporting / export ----
+    def summary(self):
+        """Per-stage totals as a DataFrame (calls, total/mean ms, max peak MB), slowest first."""
+        import pandas as pd
+
+        cols = ["stage", "calls", "total_ms", "mean_ms", "peak_mb"]
+        if not self.events:
+            return pd.DataFrame(columns=cols)
+        df = pd.DataFrame(self.events)
+        out = df.groupby("name", sort=False).agg(
+            calls=("dur_s", "size"), total_ms=("dur_s", "sum"), mean_ms=("dur_s", "mean"), peak_mb=("peak_mb", "max"),
+        )
+        out[["total_ms", "mean_ms"]] *= 1e3
+        return out.reset_index().rename(columns={"name": "stage"}).sort_values("total_ms", ascending=False)[cols]
+
+    def to_json(self) -> str:
+        return json.dumps({"events": self.events}, indent=2, default=str)
+
+    def to_chrome_trace(self) -> str:
+        """Trace Event Format; open in chrome://tracing or https://ui.perfetto.dev."""
+        pid = os.getpid()
+        trace = [{
+            "name": e["name"], "ph": "X", "pid": pid, "tid": e["tid"],
+            "ts": e["start_s"] * 1e6, "dur": e["dur_s"] * 1e6,
+            "args": {**e.get("args", {}), **({"peak_mb": e["peak_mb"]} if e["peak_mb"] is not None else {})},
+        } for e in self.events]
+        return json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}, default=str)
+
+
+class ProfileCapture:
+    """
+    One-shot profiler around an arbitrary stretch of code: start(), ..., stop() -> text report.
+    Uses pyinstrument when installed (wall-clock call tree), otherwise cProfile (top functions).
+    """
+
+    def __init__(self, engine: str | None = None):
+        if engine is None:
+            try:
+                import pyinstrument  # noqa: F401
+                engine = "pyinstrument"
+            except ImportError:
+                engine = "cprofile"
+        self.engine = engine
+        self._prof = None
+
+    def start(self):
+        if self.engine == "pyinstrument":
+            from pyinstrument import Profiler
+            self._prof = Profiler()
+            self._prof.start()
+        else:
+            import cProfile
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+
+    def stop(self, limit: int = 40) -> str:
+        if self._prof is None:
+            return ""
+        if self.engine == "pyinstrument":
+            self._prof.stop()
+            return self._prof.output_text(unicode=True, color=False)
+        import pstats
+        self._prof.disable()
+        buf = io.StringIO()
+        pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(limit)
+        return buf.getvalue()
@@ -1,6 +1,5 @@
 # utils/theming.py
 import streamlit as st
-import plotly.io as pio
 
 PALETTE = {
     "bg": "#0b1220",
@@ -29,7 +28,7 @@ PLOTLY_TEMPLATE = {
 }
 
 def apply_base_css():
-    """Inject global CSS + register Plotly template (full theme + larger fonts)."""
+    """Inject global CSS (full theme + larger fonts). The Plotly template is registered by utils.charts."""
     st.markdown(
         f"""
         <style>
@@ -349,7 +348,11 @@ def apply_base_css():
         unsafe_allow_html=True,
     )
 
-    # Plotly template stays the same
+
+def register_plotly_template():
+    """Make PLOTLY_TEMPLATE the default Plotly template (kept out of apply_base_css so plotly loads with the first chart)."""
+    import plotly.io as pio
+
     pio.templates["te_dark"] = PLOTLY_TEMPLATE
     pio.templates.default = "te_dark"
 